@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks sin conexión de la App de Gestión SELAH.
+
+Los scripts de Streamlit se ejecutan con la API de pruebas de Streamlit
+(AppTest) contra una base de datos local en SQLite que reemplaza a
+mysql.connector, sembrada con catálogos sintéticos. Uso:
+
+    python -m benchmarks.apps --materiales 1000 10000 100000
+"""
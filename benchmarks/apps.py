@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de los scripts de Streamlit contra la base local.
+
+Para cada script y cada tamaño de catálogo se siembra la base, se vacían
+las cachés de Streamlit y el pool, y se recorre una sesión típica por las
+cuatro pestañas. Por interacción se reporta el tiempo del rerun, las
+consultas ejecutadas, las conexiones prestadas por el pool y el pico de
+memoria asignada durante el rerun (tracemalloc, que también agrega algo
+de tiempo; ``--sin-memoria`` lo desactiva).
+
+    python -m benchmarks.apps --materiales 1000 10000 100000 --csv resultados.csv
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from benchmarks import bd_local
+from selah import db, instantanea
+
+RAIZ = Path(__file__).resolve().parent.parent
+SCRIPTS = ("calculadora_stream.py", "calculadora_prueba.py")
+TAMANOS_DEFAULT = (1000, 10000, 100000)
+
+REGISTRO = "🧾 Registro de Materiales"
+CALCULADORA = "💰 Calculadora de Pulseras"
+MATERIALES = "📚 Catálogo de Materiales"
+PULSERAS = "📿 Catálogo de Pulseras"
+
+SECRETOS = {"DB_HOST": "localhost", "DB_PORT": 3306, "DB_USER": "benchmark",
+            "DB_PASSWORD": "benchmark", "DB_NAME": "selah"}
+
+
+def _por_etiqueta(elementos, etiqueta):
+    return next(e for e in elementos if e.label == etiqueta)
+
+
+def _sin_accion(at):
+    pass
+
+
+def _registrar_material(at):
+    _por_etiqueta(at.text_input, "ID Producto").set_value("MBENCH01")
+    _por_etiqueta(at.text_input, "Costo Tira").set_value("120")
+    _por_etiqueta(at.text_input, "Cantidad").set_value("40")
+    for etiqueta in ("Tipo", "Piedra", "Forma", "Proveedor"):
+        campo = _por_etiqueta(at.selectbox, etiqueta)
+        campo.set_value(campo.options[1])
+    _por_etiqueta(at.button, "Registrar Producto").click()
+
+
+def _buscar_material(at):
+    at.text_input(key="buscar_0").set_value("agata rojo")
+
+
+def _elegir_material(at):
+    material = at.selectbox(key="id_0")
+    material.set_value(material.options[1])
+    at.number_input(key="cant_0").set_value(15)
+
+
+def _calcular_precio(at):
+    _por_etiqueta(at.button, "Calcular Precio").click()
+
+
+def _registrar_pulsera(at):
+    at.text_input(key="id_producto_pulsera_input").set_value("PBENCH01")
+    at.text_input(key="descripcion_pulsera_input").set_value("Pulsera benchmark")
+    _por_etiqueta(at.button, "Registrar Pulsera").click()
+
+
+def _optimizar(at):
+    at.selectbox(key="opt_clasificacion").set_value("B")
+    at.number_input(key="opt_tiempo").set_value(1.0)
+    at.button(key="opt_buscar").click()
+
+
+def _cargar_materiales(at):
+    _por_etiqueta(at.button, "🔄 Cargar Catálogo").click()
+
+
+def _filtrar_materiales(at):
+    at.text_input(key="cat_mat_piedra").set_value("Onix")
+
+
+def _cargar_pulseras(at):
+    _por_etiqueta(at.button, "🔄 Cargar Catálogo de Pulseras").click()
+
+
+def _ordenar_pulseras(at):
+    at.selectbox(key="cat_pul_orden").set_value("PRECIO")
+    at.checkbox(key="cat_pul_desc").check()
+
+
+def _siguiente(prefijo):
+    return lambda at: at.button(key=f"{prefijo}_siguiente").click()
+
+
+# (interacción, pestaña abierta, cambios en los widgets antes del rerun)
+SESION = (
+    ("Inicio", REGISTRO, _sin_accion),
+    ("Registrar material", REGISTRO, _registrar_material),
+    ("Abrir calculadora", CALCULADORA, _sin_accion),
+    ("Buscar material", CALCULADORA, _buscar_material),
+    ("Elegir material", CALCULADORA, _elegir_material),
+    ("Calcular precio", CALCULADORA, _calcular_precio),
+    ("Registrar pulsera", CALCULADORA, _registrar_pulsera),
+    ("Optimizar receta (1 s)", CALCULADORA, _optimizar),
+    ("Abrir catálogo de materiales", MATERIALES, _sin_accion),
+    ("Cargar catálogo de materiales", MATERIALES, _cargar_materiales),
+    ("Página siguiente de materiales", MATERIALES, _siguiente("cat_mat")),
+    ("Filtrar materiales", MATERIALES, _filtrar_materiales),
+    ("Abrir catálogo de pulseras", PULSERAS, _sin_accion),
+    ("Cargar catálogo de pulseras", PULSERAS, _cargar_pulseras),
+    ("Ordenar pulseras por precio", PULSERAS, _ordenar_pulseras),
+    ("Página siguiente de pulseras", PULSERAS, _siguiente("cat_pul")),
+    ("Volver a la calculadora", CALCULADORA, _sin_accion),
+)
+
+
+def _reiniciar_proceso():
+    """Deja el proceso como recién arrancado: sin cachés de Streamlit ni pool."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    db._pool = None
+    instantanea._sincronizacion["ultimo_intento"] = 0.0
+
+
+def _errores(at):
+    return "; ".join(
+        [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+    )
+
+
+def medir_script(script, n_materiales, medir_memoria=True, timeout=300, ruta_instantanea=""):
+    """
+    Recorre SESION en ``script`` con ``n_materiales`` y devuelve una fila por
+    interacción. ``ruta_instantanea`` vacía deshabilita la instantánea local.
+    """
+    bd_local.sembrar(n_materiales)
+    _reiniciar_proceso()
+    at = AppTest.from_file(str(RAIZ / script), default_timeout=timeout)
+    for clave, valor in SECRETOS.items():
+        at.secrets[clave] = valor
+    at.secrets["INSTANTANEA_RUTA"] = ruta_instantanea
+
+    filas = []
+    for interaccion, pestana, accion in SESION:
+        fila = {"script": script, "materiales": n_materiales, "interaccion": interaccion}
+        try:
+            accion(at)
+        except (StopIteration, KeyError, IndexError) as e:
+            # El widget no se dibujó (p. ej. falló el rerun anterior)
+            filas.append({**fila, "errores": f"No se pudo preparar la interacción: {e!r}"})
+            continue
+        # AppTest no conserva la pestaña abierta entre reruns
+        at.session_state["tab_activa"] = pestana
+        bd_local.CONTADORES.reiniciar()
+        if medir_memoria:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        at.run()
+        fila["segundos"] = round(time.perf_counter() - inicio, 4)
+        fila["consultas"] = bd_local.CONTADORES.consultas
+        fila["conexiones"] = bd_local.CONTADORES.conexiones
+        if medir_memoria:
+            fila["pico_mb"] = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 2)
+        fila["errores"] = _errores(at)
+        filas.append(fila)
+    return filas
+
+
+def ejecutar(scripts=SCRIPTS, tamanos=TAMANOS_DEFAULT, medir_memoria=True, timeout=300, con_instantanea=True):
+    """
+    Corre el benchmark completo y devuelve un DataFrame con los resultados.
+    Con ``con_instantanea`` cada escenario arranca con una instantánea local
+    vacía (arranque en frío) que se llena en segundo plano.
+    """
+    bd_local.instalar()
+    if medir_memoria:
+        tracemalloc.start()
+    filas = []
+    try:
+        for n_materiales in tamanos:
+            for script in scripts:
+                with tempfile.TemporaryDirectory() as directorio:
+                    ruta = os.path.join(directorio, "instantanea.sqlite") if con_instantanea else ""
+                    filas.extend(medir_script(script, n_materiales, medir_memoria, timeout, ruta))
+                    # El hilo de sincronización no debe quedar escribiendo en el directorio borrado
+                    hilo = instantanea._sincronizacion["hilo"]
+                    if hilo is not None:
+                        hilo.join()
+    finally:
+        if medir_memoria:
+            tracemalloc.stop()
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sin conexión de los scripts de Streamlit.")
+    parser.add_argument("--materiales", type=int, nargs="+", default=list(TAMANOS_DEFAULT),
+                        help="Tamaños del catálogo sintético de materiales.")
+    parser.add_argument("--scripts", nargs="+", default=list(SCRIPTS), choices=SCRIPTS)
+    parser.add_argument("--csv", help="Guarda los resultados en este archivo CSV.")
+    parser.add_argument("--sin-memoria", action="store_true",
+                        help="No medir memoria (tracemalloc agrega tiempo a cada rerun).")
+    parser.add_argument("--timeout", type=float, default=300, help="Tiempo máximo por rerun, en segundos.")
+    parser.add_argument("--sin-instantanea", action="store_true",
+                        help="Leer siempre de la base, sin la instantánea local.")
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(args.scripts, args.materiales, not args.sin_memoria, args.timeout,
+                          not args.sin_instantanea)
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.max_colwidth", 60):
+        print(resultados.to_string(index=False))
+    if args.csv:
+        resultados.to_csv(args.csv, index=False)
+    return 1 if resultados["errores"].astype(bool).any() else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
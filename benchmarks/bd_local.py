@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Base de datos local que reemplaza a MySQL en los benchmarks.
+
+``instalar()`` sustituye ``mysql.connector.pooling.MySQLConnectionPool`` y
+``mysql.connector.connect`` por equivalentes sobre un SQLite en memoria
+compartido, de modo que selah.db y los scripts funcionan sin cambios. Las
+sentencias se traducen lo justo (``%s``, ON DUPLICATE KEY UPDATE y la
+estimación de filas de EXPLAIN) y se cuentan las consultas y las
+conexiones prestadas para que el benchmark las reporte.
+"""
+
+import re
+import sqlite3
+import threading
+
+import mysql.connector
+import numpy as np
+from mysql.connector import errorcode, errors, pooling
+
+from selah import precios
+from selah.materiales import COLUMNAS_MATERIAL
+
+URI = "file:selah_benchmark?mode=memory&cache=shared"
+
+ESQUEMA = """
+DROP TABLE IF EXISTS PULSERAS_RECETA;
+DROP TABLE IF EXISTS PULSERAS;
+DROP TABLE IF EXISTS MATERIALES;
+DROP TABLE IF EXISTS PROVEEDORES;
+CREATE TABLE PROVEEDORES (
+    ID_PROVEEDOR INTEGER PRIMARY KEY,
+    NOMBRE_PROVEEDOR TEXT NOT NULL,
+    ACTUALIZADO_EN TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE TABLE MATERIALES (
+    ID_MATERIAL TEXT PRIMARY KEY,
+    TIPO TEXT, PIEDRA TEXT, FORMA TEXT, COLOR TEXT, DESCRIPCION TEXT, TEXTURA TEXT,
+    LARGO REAL, ANCHO REAL, COSTO_TIRA REAL, CANTIDAD INTEGER, COSTO_CUENTA REAL,
+    ID_PROVEEDOR INTEGER REFERENCES PROVEEDORES (ID_PROVEEDOR),
+    ACTUALIZADO_EN TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE TABLE PULSERAS (
+    ID_PRODUCTO TEXT PRIMARY KEY,
+    DESCRIPCION TEXT, COSTO REAL, PRECIO REAL, CLASIFICACION TEXT,
+    PRECIO_CLASIFICADO REAL, TIPO_HILO TEXT,
+    ACTUALIZADO_EN TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+CREATE TABLE PULSERAS_RECETA (
+    ID_PRODUCTO TEXT NOT NULL REFERENCES PULSERAS (ID_PRODUCTO) ON DELETE CASCADE,
+    ID_MATERIAL TEXT NOT NULL REFERENCES MATERIALES (ID_MATERIAL),
+    CANTIDAD INTEGER NOT NULL,
+    PRIMARY KEY (ID_PRODUCTO, ID_MATERIAL)
+);
+CREATE INDEX IDX_RECETA_MATERIAL ON PULSERAS_RECETA (ID_MATERIAL, ID_PRODUCTO);
+-- Mismos índices que sql/migraciones/004_indices_consultas.sql
+CREATE INDEX IDX_MATERIALES_PROVEEDOR ON MATERIALES (ID_PROVEEDOR, ID_MATERIAL);
+CREATE INDEX IDX_MATERIALES_TIPO ON MATERIALES (TIPO, ID_MATERIAL);
+CREATE INDEX IDX_MATERIALES_PIEDRA ON MATERIALES (PIEDRA, ID_MATERIAL);
+CREATE INDEX IDX_MATERIALES_FORMA ON MATERIALES (FORMA, ID_MATERIAL);
+CREATE INDEX IDX_MATERIALES_COSTO_CUENTA ON MATERIALES (COSTO_CUENTA, ID_MATERIAL);
+CREATE INDEX IDX_PULSERAS_CLASIFICACION ON PULSERAS (CLASIFICACION, ID_PRODUCTO);
+CREATE INDEX IDX_PULSERAS_PRECIO ON PULSERAS (PRECIO, ID_PRODUCTO);
+CREATE INDEX IDX_PULSERAS_COSTO ON PULSERAS (COSTO, ID_PRODUCTO);
+""" + "".join(
+    # Equivalente a ON UPDATE CURRENT_TIMESTAMP de sql/migraciones/003_instantanea.sql
+    f"""
+CREATE INDEX IDX_{tabla}_ACTUALIZADO ON {tabla} (ACTUALIZADO_EN);
+CREATE TRIGGER TRG_{tabla}_ACTUALIZADO AFTER UPDATE ON {tabla}
+WHEN NEW.ACTUALIZADO_EN IS OLD.ACTUALIZADO_EN BEGIN
+    UPDATE {tabla} SET ACTUALIZADO_EN = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE {clave} = NEW.{clave};
+END;
+"""
+    for tabla, clave in (("PROVEEDORES", "ID_PROVEEDOR"), ("MATERIALES", "ID_MATERIAL"), ("PULSERAS", "ID_PRODUCTO"))
+)
+
+TIPOS = ["Corazon", "Cristal", "Goldstone", "Inicial", "Perla", "Piedra", "Separador", "Zirconia"]
+PIEDRAS = ["Agata", "Apatita", "Aventurina", "Onix", "Turquesa", "Sodalita", "Otro"]
+FORMAS = ["Redonda", "Gota", "Cruz", "Corazon", "Cilindro", "Otro"]
+COLORES = ["Rojo", "Azul", "Verde", "Negro", "Blanco", "Rosa", "Morado", "Dorado"]
+TEXTURAS = ["Lisa", "Facetada"]
+HILOS = [" ", "Nylon", "Negro"]
+
+# La conexión ancla mantiene viva la base en memoria mientras dure el proceso.
+_ancla = sqlite3.connect(URI, uri=True, check_same_thread=False)
+
+
+class Contadores:
+    """Consultas ejecutadas y conexiones prestadas desde el último ``reiniciar()``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.conexiones = 0
+
+    def reiniciar(self):
+        with self._lock:
+            self.consultas = 0
+            self.conexiones = 0
+
+    def sumar(self, consultas=0, conexiones=0):
+        with self._lock:
+            self.consultas += consultas
+            self.conexiones += conexiones
+
+
+CONTADORES = Contadores()
+
+
+def _traducir(sql):
+    """Adapta una sentencia de MySQL al dialecto de SQLite."""
+    sql = sql.strip()
+    if sql.upper().startswith("EXPLAIN "):
+        # MySQL devuelve la estimación de filas en la columna "rows"; aquí
+        # se usa el conteo exacto, que basta para ejercitar el código.
+        sql = f"SELECT COUNT(*) AS rows FROM ({sql[len('EXPLAIN '):]})"
+    if "ON DUPLICATE KEY UPDATE" in sql:
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+        # Alias de fila (INSERT ... VALUES (...) AS nuevo ON DUPLICATE KEY UPDATE col = nuevo.col)
+        alias = re.search(r"\bAS (\w+)\s+ON DUPLICATE KEY UPDATE", sql)
+        if alias:
+            sql = sql.replace(alias.group(0), "ON DUPLICATE KEY UPDATE")
+            sql = re.sub(rf"\b{alias.group(1)}\.", "excluded.", sql)
+        tabla = re.search(r"INSERT INTO (\w+)", sql).group(1)
+        clave = {"MATERIALES": "ID_MATERIAL", "PULSERAS": "ID_PRODUCTO"}[tabla]
+        sql = sql.replace("ON DUPLICATE KEY UPDATE", f"ON CONFLICT ({clave}) DO UPDATE SET")
+    return sql.replace("%s", "?")
+
+
+def _error_mysql(error):
+    """Convierte un error de sqlite3 en el error de mysql.connector equivalente."""
+    if isinstance(error, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(error), errno=errorcode.ER_DUP_ENTRY)
+    if "no such column" in str(error):
+        return errors.ProgrammingError(msg=str(error), errno=errorcode.ER_BAD_FIELD_ERROR)
+    return errors.DatabaseError(msg=str(error))
+
+
+class Cursor:
+    """Cursor con la interfaz de mysql.connector que usan selah y pandas."""
+
+    def __init__(self, conexion):
+        self._cursor = conexion.cursor()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        CONTADORES.sumar(consultas=1)
+        try:
+            self._cursor.execute(_traducir(sql), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def executemany(self, sql, filas):
+        CONTADORES.sumar(consultas=1)
+        try:
+            self._cursor.executemany(_traducir(sql), [tuple(fila) for fila in filas])
+        except sqlite3.Error as e:
+            raise _error_mysql(e) from e
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Conexion:
+    """Conexión prestada; ``close()`` la devuelve al pool como en mysql.connector."""
+
+    def __init__(self, pool=None):
+        self._pool = pool
+        self._conexion = sqlite3.connect(URI, uri=True, check_same_thread=False)
+        # En caché compartida los lectores bloquean tablas enteras; InnoDB no
+        self._conexion.execute("PRAGMA read_uncommitted = 1")
+
+    def cursor(self, *args, **kwargs):
+        return Cursor(self._conexion)
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def start_transaction(self, *args, **kwargs):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def ping(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        self._conexion.rollback()
+        if self._pool is not None:
+            self._pool._devolver(self)
+        else:
+            self._conexion.close()
+
+
+class Pool:
+    """Pool con el tamaño y el PoolError por agotamiento de MySQLConnectionPool."""
+
+    def __init__(self, pool_name=None, pool_size=5, **kwargs):
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._libres = []
+        self._prestadas = 0
+
+    def get_connection(self):
+        with self._lock:
+            if self._prestadas >= self.pool_size:
+                raise errors.PoolError("Failed getting connection; pool exhausted")
+            self._prestadas += 1
+            conexion = self._libres.pop() if self._libres else None
+        CONTADORES.sumar(conexiones=1)
+        return conexion or Conexion(self)
+
+    def _devolver(self, conexion):
+        with self._lock:
+            self._prestadas -= 1
+            self._libres.append(conexion)
+
+
+def instalar():
+    """Reemplaza mysql.connector por la base local en este proceso."""
+    pooling.MySQLConnectionPool = Pool
+    mysql.connector.connect = lambda **kwargs: Conexion()
+
+
+def sembrar(n_materiales, n_pulseras=None, semilla=0):
+    """
+    Crea el esquema y lo llena con un catálogo sintético reproducible:
+    ``n_materiales`` materiales y ``n_pulseras`` pulseras (por defecto una
+    por cada diez materiales) con recetas de 1 a 3 materiales.
+    """
+    if n_pulseras is None:
+        n_pulseras = max(100, n_materiales // 10)
+    rng = np.random.default_rng(semilla)
+    _ancla.executescript(ESQUEMA)
+
+    n_proveedores = 20
+    _ancla.executemany(
+        "INSERT INTO PROVEEDORES (ID_PROVEEDOR, NOMBRE_PROVEEDOR) VALUES (?, ?)",
+        [(i + 1, f"Proveedor {i + 1:02d}") for i in range(n_proveedores)]
+    )
+
+    ids_material = [f"M{i:06d}" for i in range(n_materiales)]
+    costo_tira = np.round(rng.uniform(20, 400, n_materiales), 2)
+    cantidad = rng.integers(20, 81, n_materiales)
+    costo_cuenta = costo_tira / cantidad
+    elegir = lambda opciones: rng.integers(0, len(opciones), n_materiales)
+    tipo, piedra, forma, color, textura = (
+        elegir(TIPOS), elegir(PIEDRAS), elegir(FORMAS), elegir(COLORES), elegir(TEXTURAS)
+    )
+    proveedor = rng.integers(1, n_proveedores + 1, n_materiales)
+    _ancla.executemany(
+        f"INSERT INTO MATERIALES ({', '.join(COLUMNAS_MATERIAL)}) VALUES ({', '.join(['?'] * len(COLUMNAS_MATERIAL))})",
+        [
+            (ids_material[i], TIPOS[tipo[i]], PIEDRAS[piedra[i]], FORMAS[forma[i]], COLORES[color[i]],
+             f"{TIPOS[tipo[i]]} {PIEDRAS[piedra[i]]} {COLORES[color[i]]}", TEXTURAS[textura[i]],
+             8.0, 8.0, float(costo_tira[i]), int(cantidad[i]), float(costo_cuenta[i]), int(proveedor[i]))
+            for i in range(n_materiales)
+        ]
+    )
+
+    recetas = []
+    for _ in range(n_pulseras):
+        k = int(rng.integers(1, 4))
+        elegidos = rng.choice(n_materiales, size=min(k, n_materiales), replace=False)
+        recetas.append([(ids_material[m], int(rng.integers(5, 16))) for m in elegidos])
+    tabla = dict(zip(ids_material, costo_cuenta.tolist()))
+    hilos = [HILOS[h] for h in rng.integers(0, len(HILOS), n_pulseras)]
+    lote = precios.precios_lote(precios.costo_cuentas_recetas(recetas, tabla), hilos)
+    ids_pulsera = [f"P{i:06d}" for i in range(n_pulseras)]
+    _ancla.executemany(
+        "INSERT INTO PULSERAS (ID_PRODUCTO, DESCRIPCION, COSTO, PRECIO, CLASIFICACION, PRECIO_CLASIFICADO, TIPO_HILO) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (ids_pulsera[i], f"Pulsera {i}", float(lote["COSTO"][i]), float(lote["PRECIO"][i]),
+             str(lote["CLASIFICACION"][i]), float(lote["PRECIO_CLASIFICADO"][i]), hilos[i])
+            for i in range(n_pulseras)
+        ]
+    )
+    _ancla.executemany(
+        "INSERT INTO PULSERAS_RECETA VALUES (?, ?, ?)",
+        [(ids_pulsera[i], id_mat, cant) for i, receta in enumerate(recetas) for id_mat, cant in receta]
+    )
+    _ancla.commit()
@@ -5,186 +5,9 @@ Autor: Arie Brito + GPT-5 (adaptado y corregido a Streamlit 2025)
 """
 
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
-import pandas as pd
-
-# =====================================
-# Conexión a base de datos
-# =====================================
-def conectar_db():
-    try:
-        conexion = mysql.connector.connect(
-            host=st.secrets["DB_HOST"],
-            port=st.secrets["DB_PORT"],
-            user=st.secrets["DB_USER"],
-            password=st.secrets["DB_PASSWORD"],
-            database=st.secrets["DB_NAME"],
-            connect_timeout=10
-        )
-        if conexion.is_connected():
-            st.session_state["db_ok"] = True
-            return conexion
-        else:
-            st.session_state["db_ok"] = False
-            st.error("❌ No se pudo establecer conexión con la base de datos.")
-            return None
-    except Error as e:
-        st.session_state["db_ok"] = False
-        st.error(f"⚠️ Error de conexión con la base de datos: {e}")
-        return None
-
-
-# =====================================
-# Funciones auxiliares
-# =====================================
-def obtener_material_opciones_display():
-    conexion = conectar_db()
-    mapa = {" ": " "}
-    opciones_display = [" "]
-
-    if conexion is None:
-        return opciones_display, mapa
-
-    try:
-        cursor = conexion.cursor()
-        query = "SELECT ID_MATERIAL, TIPO, PIEDRA, FORMA, TEXTURA, LARGO, ANCHO, COLOR, DESCRIPCION FROM MATERIALES ORDER BY ID_MATERIAL"
-        cursor.execute(query)
-        result = cursor.fetchall()
-
-        # Desempaquetando 9 valores
-        for id_mat, tipo, piedra, forma, textura, largo, ancho, color, desc in result:
-            parts = []
-            if tipo and str(tipo).strip(): parts.append(tipo)
-            if piedra and str(piedra).strip(): parts.append(piedra)
-            if forma and str(forma).strip(): parts.append(forma)
-            if textura and str(textura).strip(): parts.append(textura)
-            if largo is not None and str(largo).strip(): parts.append(f"L:{largo}")
-            if ancho is not None and str(ancho).strip(): parts.append(f"A:{ancho}")
-            if desc and str(desc).strip(): parts.append(f"({desc})")
-
-            display_string = f"{id_mat} | {' - '.join(parts)}"
-            mapa[display_string] = id_mat
-            opciones_display.append(display_string)
-
-        return opciones_display, mapa
-    except Error as e:
-        st.error(f"Error al obtener catálogo de material: {e}")
-        return [" "], {" ": " "}
-    finally:
-        try:
-            if conexion.is_connected():
-                cursor.close()
-                conexion.close()
-        except Exception:
-            pass
-
-
-def obtener_costo_cuenta(id_material):
-    if not id_material or id_material == " ":
-        return 0.0
-    conexion = conectar_db()
-    if conexion is None:
-        return 0.0
-    try:
-        cursor = conexion.cursor()
-        cursor.execute("SELECT COSTO_CUENTA FROM MATERIALES WHERE ID_MATERIAL=%s", (id_material,))
-        res = cursor.fetchone()
-        return float(res[0]) if res and res[0] is not None else 0.0
-    except Error:
-        return 0.0
-    finally:
-        try:
-            if conexion.is_connected():
-                cursor.close()
-                conexion.close()
-        except Exception:
-            pass
-
-
-def obtener_proveedores():
-    conexion = conectar_db()
-    if conexion is None:
-        return []
-    try:
-        cursor = conexion.cursor()
-        cursor.execute("SELECT ID_PROVEEDOR, NOMBRE_PROVEEDOR FROM PROVEEDORES")
-        return cursor.fetchall()
-    except Error as e:
-        st.error(f"Error al obtener proveedores: {e}")
-        return []
-    finally:
-        try:
-            if conexion.is_connected():
-                cursor.close()
-                conexion.close()
-        except Exception:
-            pass
-
-
-def obtener_catalogo_materiales():
-    conexion = conectar_db()
-    if conexion is None:
-        return pd.DataFrame()
-    try:
-        query = """
-        SELECT 
-            M.ID_MATERIAL,
-            M.TIPO,
-            M.PIEDRA,
-            M.FORMA,
-            M.COLOR,
-            M.DESCRIPCION,
-            M.TEXTURA,
-            M.LARGO,
-            M.ANCHO,
-            M.COSTO_TIRA,
-            M.CANTIDAD,
-            M.COSTO_CUENTA,
-            P.NOMBRE_PROVEEDOR
-        FROM MATERIALES M
-        LEFT JOIN PROVEEDORES P ON M.ID_PROVEEDOR = P.ID_PROVEEDOR
-        ORDER BY M.ID_MATERIAL
-        """
-        return pd.read_sql(query, conexion)
-    except Error as e:
-        st.error(f"Error al obtener catálogo: {e}")
-        return pd.DataFrame()
-    finally:
-        try:
-            if conexion.is_connected():
-                conexion.close()
-        except Exception:
-            pass
-
-
-def obtener_catalogo_pulseras():
-    conexion = conectar_db()
-    if conexion is None:
-        return pd.DataFrame()
-    try:
-        query = """
-        SELECT 
-            ID_PRODUCTO,
-            DESCRIPCION,
-            COSTO,
-            PRECIO,
-            CLASIFICACION,
-            PRECIO_CLASIFICADO
-        FROM PULSERAS
-        ORDER BY ID_PRODUCTO
-        """
-        return pd.read_sql(query, conexion)
-    except Error as e:
-        st.error(f"Error al obtener catálogo de pulseras: {e}")
-        return pd.DataFrame()
-    finally:
-        try:
-            if conexion.is_connected():
-                conexion.close()
-        except Exception:
-            pass
 
+from selah import cache, db, materiales, recetas, ui
 
 # =====================================
 # Inicialización de estado (IMPORTANTE)
@@ -209,18 +32,12 @@ def init_session_state():
         "cantidad": "",
         # proveedor select uses key "Proveedor"
         "Proveedor": " ",
+        "actualizar_material": False,
         # TAB2 calculadora
         "hilo_calc": " ",
-        "id_0": " ",
-        "id_1": " ",
-        "id_2": " ",
-        "id_3": " ",
-        "id_4": " ",
-        "cant_0": 0,
-        "cant_1": 0,
-        "cant_2": 0,
-        "cant_3": 0,
-        "cant_4": 0,
+        # filas del editor de receta (se pueden agregar más)
+        "filas_receta": list(range(ui.FILAS_RECETA_INICIALES)),
+        "siguiente_fila_receta": ui.FILAS_RECETA_INICIALES,
         # registro pulsera
         "id_producto_pulsera_input": "",
         "descripcion_pulsera_input": "",
@@ -229,12 +46,17 @@ def init_session_state():
         "precio_real": None,
         "clasificacion": None,
         "precio_clasificado": None,
+        "receta": None,
+        "tipo_hilo_receta": None,
         # DB status
         "db_ok": False
     }
     for k, v in keys_defaults.items():
         if k not in st.session_state:
             st.session_state[k] = v
+    for i in st.session_state["filas_receta"]:
+        st.session_state.setdefault(f"id_{i}", " ")
+        st.session_state.setdefault(f"cant_{i}", 0)
 
 
 init_session_state()
@@ -261,17 +83,24 @@ def limpiar_form_registro():
     st.session_state["costo_tira"] = ""
     st.session_state["cantidad"] = ""
     st.session_state["Proveedor"] = " "
+    st.session_state["actualizar_material"] = False
     # no se eliminan claves, solo reseteamos valores existentes
     # limpiar también posibles mensajes de cálculo
     st.session_state.pop('costo_total', None)
     st.session_state.pop('precio_real', None)
     st.session_state.pop('clasificacion', None)
     st.session_state.pop('precio_clasificado', None)
+    st.session_state.pop('receta', None)
+    st.session_state.pop('tipo_hilo_receta', None)
 
 
 def limpiar_calculadora_materiales():
     st.session_state['hilo_calc'] = " "
-    for i in range(5):
+    for i in st.session_state["filas_receta"]:
+        ui.quitar_fila_receta(i)
+    st.session_state["filas_receta"] = list(range(ui.FILAS_RECETA_INICIALES))
+    st.session_state["siguiente_fila_receta"] = ui.FILAS_RECETA_INICIALES
+    for i in st.session_state["filas_receta"]:
         st.session_state[f"id_{i}"] = " "
         st.session_state[f"cant_{i}"] = 0
 
@@ -283,6 +112,8 @@ def limpiar_registro_pulsera():
     st.session_state.pop('precio_real', None)
     st.session_state.pop('clasificacion', None)
     st.session_state.pop('precio_clasificado', None)
+    st.session_state.pop('receta', None)
+    st.session_state.pop('tipo_hilo_receta', None)
 
 
 # =====================================
@@ -290,17 +121,14 @@ def limpiar_registro_pulsera():
 # =====================================
 st.title("Selah: Sistema de Gestión")
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "🧾 Registro de Materiales",
-    "💰 Calculadora de Pulseras",
-    "📚 Catálogo de Materiales",
-    "📿 Catálogo de Pulseras"
-])
-
 # =========================
 # TAB 1: Registro de Materiales
 # =========================
-with tab1:
+@st.fragment
+def mostrar_tab_registro():
+    """Registro de materiales y importación masiva."""
+    ui.iniciar_rerun("registro")
+    ui.mostrar_estado_conexion()
     st.subheader("🧾 Registro de Nuevos Materiales")
 
     with st.form("form_registro"):
@@ -344,18 +172,16 @@ with tab1:
             costo_tira = st.text_input("Costo Tira", key="costo_tira")
             cantidad = st.text_input("Cantidad", key="cantidad")
 
-            proveedores = obtener_proveedores()
+            proveedores, indice_proveedores = ui.obtener_proveedores()
             opciones_prov = [" "] + [p[1] for p in proveedores]
             nombre_prov_sel = st.selectbox("Proveedor", opciones_prov, key="Proveedor")
-            id_proveedor = {p[1]: p[0] for p in proveedores}.get(nombre_prov_sel) if nombre_prov_sel != " " else None
+            id_proveedor = indice_proveedores.get(nombre_prov_sel) if nombre_prov_sel != " " else None
+
+        actualizar_existente = st.checkbox("Actualizar si el ID ya existe (p. ej. nuevos costos)", key="actualizar_material")
 
         # botones (Registrar y Borrar)
         submitted = st.form_submit_button("Registrar Producto")
-        borrar = st.form_submit_button("🧹 Borrar Todo")
-
-        if borrar:
-            limpiar_form_registro()
-            st.experimental_rerun()
+        st.form_submit_button("🧹 Borrar Todo", on_click=limpiar_form_registro)
 
         # --------- VALIDACIONES ---------
         if submitted:
@@ -370,177 +196,48 @@ with tab1:
             elif id_proveedor is None:
                 st.error("Debes seleccionar un proveedor válido.")
             else:
-                conexion = conectar_db()
+                conexion = ui.conectar_db()
                 if conexion:
-                    cursor = conexion.cursor()
-                    cursor.execute("SELECT COUNT(*) FROM MATERIALES WHERE ID_MATERIAL=%s", (id_material,))
-                    if cursor.fetchone()[0] > 0:
-                        st.error("El ID ya existe.")
-                    else:
-                        try:
-                            costo_tira_f = float(costo_tira) if str(costo_tira).strip() else 0.0
-                            cantidad_i = int(cantidad) if str(cantidad).strip() else 0
-                            largo_f = float(largo) if str(largo).strip() else None
-                            ancho_f = float(ancho) if str(ancho).strip() else None
-                            costo_cuenta = costo_tira_f / cantidad_i if cantidad_i else 0
-
-                            sql = """
-                            INSERT INTO MATERIALES
-                            (ID_MATERIAL, TIPO, PIEDRA, FORMA, COLOR, DESCRIPCION,
-                             TEXTURA, LARGO, ANCHO, COSTO_TIRA, CANTIDAD,
-                             COSTO_CUENTA, ID_PROVEEDOR)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """
-
-                            datos = (
-                                id_material, tipo_final, piedra_final, forma_final, color,
-                                descripcion, textura, largo_f, ancho_f,
-                                costo_tira_f, cantidad_i, costo_cuenta, id_proveedor
-                            )
-
-                            cursor.execute(sql, datos)
-                            conexion.commit()
+                    try:
+                        costo_tira_f = float(costo_tira) if str(costo_tira).strip() else 0.0
+                        cantidad_i = int(cantidad) if str(cantidad).strip() else 0
+                        largo_f = float(largo) if str(largo).strip() else None
+                        ancho_f = float(ancho) if str(ancho).strip() else None
+                        costo_cuenta = costo_tira_f / cantidad_i if cantidad_i else 0
+
+                        datos = (
+                            id_material, tipo_final, piedra_final, forma_final, color,
+                            descripcion, textura, largo_f, ancho_f,
+                            costo_tira_f, cantidad_i, costo_cuenta, id_proveedor
+                        )
+                        resultado = materiales.registrar_material(conexion, datos, actualizar=actualizar_existente)
+                        cache.invalidar_materiales(conexion)
+                        if resultado == "actualizado":
+                            st.success(f"Producto actualizado: {id_material}")
+                            try:
+                                n = recetas.recalcular_pulseras(conexion, [id_material])
+                                if n:
+                                    cache.invalidar_pulseras(conexion)
+                                    st.info(f"{n} pulseras recalculadas con el nuevo costo")
+                            except Error as e:
+                                st.warning(f"No se pudieron recalcular las pulseras: {e}")
+                        elif resultado == "sin_cambios":
+                            st.info(f"El producto {id_material} ya estaba registrado con los mismos datos")
+                        else:
                             st.success(f"Producto registrado correctamente: {id_material}")
                             # opcional: limpiar_form_registro() al registrar
-                        except ValueError:
-                            st.error("Verifica los campos numéricos (Costo Tira, Cantidad, Largo, Ancho).")
-                        except Error as e:
+                    except ValueError:
+                        st.error("Verifica los campos numéricos (Costo Tira, Cantidad, Largo, Ancho).")
+                    except Error as e:
+                        if materiales.es_id_duplicado(e):
+                            st.error("El ID ya existe.")
+                        else:
                             st.error(f"No se pudo registrar el producto: {e}")
-                        finally:
-                            cursor.close()
-                            conexion.close()
-
-
-# =========================
-# TAB 2: Calculadora de Pulseras
-# =========================
-with tab2:
-    st.subheader("💰 Calculadora de Pulseras")
-
-    tipo_hilo = st.selectbox("Tipo de Hilo", [" ", "Nylon", "Negro"], key='hilo_calc')
-    opciones_display, material_mapa = obtener_material_opciones_display()
-
-    st.markdown("### Selección de Materiales (Máx. 5)")
-    material_seleccionados, cantidades = [], []
-
-    for i in range(5):
-        col1, col2 = st.columns(2)
-        with col1:
-            mat_desc = st.selectbox(
-                f"Material {i+1}",
-                options=opciones_display,
-                key=f"id_{i}"
-            )
-            mat_id = material_mapa.get(mat_desc, " ")
-        with col2:
-            cant = st.number_input(f"Cantidad {i+1}", min_value=0, value=st.session_state.get(f"cant_{i}", 0), step=1, key=f"cant_{i}")
-        material_seleccionados.append(mat_id)
-        cantidades.append(cant)
-
-    # botón para limpiar selección de materiales
-    col_clear1, col_clear2 = st.columns([1, 3])
-    with col_clear1:
-        if st.button("🧹 Limpiar Selección de Materiales"):
-            limpiar_calculadora_materiales()
-            st.experimental_rerun()
+                    finally:
+                        db.liberar_conexion(conexion)
 
-    # calcular precio
-    if st.button("Calcular Precio"):
-        costo_total_cuentas = sum(
-            cantidades[i] * obtener_costo_cuenta(material_seleccionados[i])
-            for i in range(5)
-            if material_seleccionados[i] != " "
-        )
-        costo_hilo = 2.4 if tipo_hilo == "Nylon" else 4.0 if tipo_hilo == "Negro" else 0.0
-        costo_mano = 40.0
-        costo_empaque = 10.0
-        costos_fijos = costo_hilo + costo_mano + costo_empaque
-        marketing = 0.15 * (costo_total_cuentas + costos_fijos)
-        precio_real = (costo_total_cuentas + costos_fijos + marketing) * 1.30
+    ui.mostrar_importacion_materiales()
 
-        if precio_real <= 160:
-            clasificacion, precio_clasificado = "C", 160.0
-        elif precio_real <= 200:
-            clasificacion, precio_clasificado = "B", 200.0
-        else:
-            clasificacion, precio_clasificado = "A", 250.0
 
-        st.success(f"**Costo total:** ${costo_total_cuentas + costos_fijos:.2f}")
-        st.write(f"**Precio real:** ${precio_real:.2f}")
-        st.info(f"**Clasificación:** {clasificacion}, Precio Clasificado: ${precio_clasificado:.2f}")
-
-        st.session_state.update({
-            'costo_total': costo_total_cuentas + costos_fijos,
-            'precio_real': precio_real,
-            'clasificacion': clasificacion,
-            'precio_clasificado': precio_clasificado
-        })
-
-    st.markdown("### Registro de Pulsera Final")
-    id_producto = st.text_input("ID Producto Pulsera", key='id_producto_pulsera_input')
-    descripcion_pulsera = st.text_input("Descripción Pulsera", key='descripcion_pulsera_input')
-
-    # botón para limpiar formulario de pulsera
-    colp1, colp2 = st.columns([1, 3])
-    with colp1:
-        if st.button("🧹 Borrar Formulario de Pulsera"):
-            limpiar_registro_pulsera()
-            st.experimental_rerun()
-
-    if st.button("Registrar Pulsera"):
-        if not id_producto or not descripcion_pulsera:
-            st.error("Debes ingresar ID y descripción del producto")
-        elif 'costo_total' not in st.session_state or st.session_state.get('costo_total') is None:
-            st.error("Primero debes calcular el precio")
-        else:
-            conexion = conectar_db()
-            if conexion:
-                cursor = conexion.cursor()
-                try:
-                    sql = """
-                    INSERT INTO PULSERAS (ID_PRODUCTO, DESCRIPCION, COSTO, PRECIO, CLASIFICACION, PRECIO_CLASIFICADO)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """
-                    datos = (
-                        id_producto,
-                        descripcion_pulsera,
-                        st.session_state['costo_total'],
-                        st.session_state['precio_real'],
-                        st.session_state['clasificacion'],
-                        st.session_state['precio_clasificado']
-                    )
-                    cursor.execute(sql, datos)
-                    conexion.commit()
-                    st.success(f"Pulsera '{descripcion_pulsera}' registrada correctamente")
-                    # opcional: limpiar_registro_pulsera()
-                except Error as e:
-                    st.error(f"No se pudo registrar la pulsera: {e}")
-                finally:
-                    cursor.close()
-                    conexion.close()
-
-
-# =========================
-# TAB 3: Catálogo de Materiales
-# =========================
-with tab3:
-    st.subheader("📚 Catálogo de Materiales")
-    if st.button("🔄 Cargar Catálogo"):
-        df = obtener_catalogo_materiales()
-        if df.empty:
-            st.warning("No hay materiales registrados o ocurrió un error.")
-        else:
-            st.dataframe(df, use_container_width=True, hide_index=True)
-
-
-# =========================
-# TAB 4: Catálogo de Pulseras
-# =========================
-with tab4:
-    st.subheader("📿 Catálogo de Pulseras")
-    if st.button("🔄 Cargar Catálogo de Pulseras"):
-        df = obtener_catalogo_pulseras()
-        if df.empty:
-            st.warning("No hay pulseras registradas o ocurrió un error.")
-        else:
-            st.dataframe(df, use_container_width=True, hide_index=True)
+# Calculadora (con los botones 🧹 de este script), catálogos y panel de depuración: ver selah.ui
+ui.mostrar_app(mostrar_tab_registro, limpiar_calculadora_materiales, limpiar_registro_pulsera)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo compartido de la App de Gestión SELAH.
+
+Los scripts de Streamlit (calculadora_stream.py y calculadora_prueba.py)
+importan de aquí la lógica y, de selah.ui, la interfaz que comparten.
+Solo selah.ui y selah.cache dependen de Streamlit; el resto se puede
+importar desde scripts o cron, y ``python -m selah`` (selah.cli) corre
+las tareas comunes sin la app.
+"""
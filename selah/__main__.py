@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""``python -m selah``: línea de comandos (ver selah.cli)."""
+
+from selah.cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de búsqueda de materiales para el editor de recetas.
+
+Se indexan los textos "ID | TIPO - PIEDRA - FORMA - ... (DESCRIPCION)" del
+selector de materiales. La búsqueda es por prefijo de palabra (todas las
+palabras de la consulta deben coincidir) y, si una palabra no tiene
+coincidencias, se intenta una coincidencia aproximada (difflib) contra el
+vocabulario del catálogo. Se devuelven solo los ``k`` mejores resultados,
+así el navegador no recibe el catálogo completo.
+"""
+
+import difflib
+import re
+import unicodedata
+
+TOP_K = 20
+# Las claves del índice son los primeros caracteres de cada palabra; las
+# filas candidatas se filtran después con startswith.
+LARGO_PREFIJO = 3
+SIMILITUD_MINIMA = 0.75
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos, para comparar "Ágata" con "agata"."""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _palabras(texto):
+    return re.findall(r"[a-z0-9.]+", normalizar(texto))
+
+
+def construir_indice(opciones_display, mapa):
+    """Índice a partir de las opciones del selector y su mapa display -> ID_MATERIAL."""
+    opciones = [o for o in opciones_display if o != " "]
+    palabras = [frozenset(_palabras(o)) for o in opciones]
+    prefijos = {}
+    for fila, palabras_fila in enumerate(palabras):
+        for palabra in palabras_fila:
+            prefijos.setdefault(palabra[:LARGO_PREFIJO], set()).add(fila)
+    return {
+        "opciones": opciones,
+        "mapa": {o: mapa[o] for o in opciones},
+        "ids": [normalizar(mapa[o]) for o in opciones],
+        "palabras": palabras,
+        "prefijos": prefijos,
+        "vocabulario": sorted(set().union(*palabras)) if palabras else [],
+    }
+
+
+def _candidatas(indice, termino):
+    if len(termino) >= LARGO_PREFIJO:
+        return indice["prefijos"].get(termino[:LARGO_PREFIJO], ())
+    filas = set()
+    for clave, filas_clave in indice["prefijos"].items():
+        if clave.startswith(termino):
+            filas |= filas_clave
+    return filas
+
+
+def _por_prefijo(indice, termino):
+    """{fila: puntaje}: 2 si alguna palabra es igual al término, 1 si empieza con él."""
+    puntajes = {}
+    for fila in _candidatas(indice, termino):
+        for palabra in indice["palabras"][fila]:
+            if palabra == termino:
+                puntajes[fila] = 2.0
+                break
+            if palabra.startswith(termino):
+                puntajes[fila] = 1.0
+    return puntajes
+
+
+def _por_similitud(indice, termino):
+    """{fila: puntaje} para palabras del vocabulario parecidas al término (errores de tipeo)."""
+    puntajes = {}
+    for palabra in difflib.get_close_matches(termino, indice["vocabulario"], n=5, cutoff=SIMILITUD_MINIMA):
+        similitud = difflib.SequenceMatcher(None, termino, palabra).ratio()
+        for fila in indice["prefijos"].get(palabra[:LARGO_PREFIJO], ()):
+            if palabra in indice["palabras"][fila]:
+                puntajes[fila] = max(puntajes.get(fila, 0.0), similitud)
+    return puntajes
+
+
+def buscar(indice, consulta, k=TOP_K):
+    """Las ``k`` opciones que mejor coinciden con ``consulta``, de mejor a peor."""
+    terminos = _palabras(consulta)
+    if not terminos:
+        return indice["opciones"][:k]
+
+    puntajes = None
+    for termino in terminos:
+        encontrados = _por_prefijo(indice, termino) or _por_similitud(indice, termino)
+        if puntajes is None:
+            puntajes = encontrados
+        else:
+            puntajes = {fila: puntajes[fila] + p for fila, p in encontrados.items() if fila in puntajes}
+        if not puntajes:
+            return []
+
+    # Prioridad a coincidencias por ID
+    consulta_id = normalizar(consulta.strip())
+    for fila in puntajes:
+        if indice["ids"][fila] == consulta_id:
+            puntajes[fila] += 10.0
+        elif indice["ids"][fila].startswith(consulta_id):
+            puntajes[fila] += 5.0
+
+    mejores = sorted(puntajes, key=lambda fila: (-puntajes[fila], fila))[:k]
+    return [indice["opciones"][fila] for fila in mejores]
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+Cachés de Streamlit compartidas por todas las sesiones del servidor.
+
+Las funciones cacheadas propagan los errores de MySQL en lugar de
+devolver un resultado vacío, para no guardar un fallo en la caché; los
+scripts los atrapan y muestran el ``st.error`` correspondiente. Cada carga
+exitosa queda además como respaldo del proceso, que los scripts muestran
+mientras el circuito de selah.db está abierto.
+
+Las lecturas van primero a la instantánea local (selah.instantanea) si ya
+tiene las tablas; la versión de la instantánea es parte de la clave de
+cada caché, así que una sincronización con cambios fuerza la recarga.
+Sin instantánea la clave es la última huella de la tabla en MySQL (ver
+``refrescar()``). Si la sincronización que sigue a una escritura falla,
+esas tablas se leen de MySQL hasta que otra sincronización las alcance.
+
+Las páginas de los catálogos se guardan compactas (ver
+consultas.compactar) en cache_resource: todas las sesiones reciben el
+mismo DataFrame de solo lectura y session_state solo guarda la
+referencia, así que la memoria no crece con los usuarios conectados.
+
+``lanzar()`` corre en otro hilo una carga independiente (p. ej. la tabla
+de costos mientras se arma el índice), para que la espera de una página
+sea la de su consulta más lenta y no la suma de todas.
+"""
+
+import concurrent.futures
+import itertools
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+from mysql.connector import Error
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from selah import busqueda, consultas, db, instantanea, metricas
+
+TTL_MATERIALES_DEFAULT = 600
+TTL_PROVEEDORES_DEFAULT = 3600
+TTL_COSTOS_DEFAULT = 300
+TTL_CATALOGO_DEFAULT = 300
+PAGINAS_CACHE_MAXIMO = 500
+BUSQUEDAS_CACHE_MAXIMO = 2000
+
+# Último resultado bueno de cada carga, por nombre de función
+_respaldo = {}
+
+# Última huella de cada tabla vista por refrescar(), para cuando no hay instantánea
+_huellas = {}
+
+# Tablas escritas cuya sincronización falló: tabla -> time.time() del fallo
+_atrasadas = {}
+
+# Número de cada índice de búsqueda construido, para distinguirlos aunque compartan versión
+_construcciones = itertools.count()
+
+# Cargas en curso en otros hilos, acotadas por el tamaño del pool
+_hilos = None
+_hilos_lock = threading.Lock()
+
+
+def _ttl_segundos(clave, default):
+    """TTL configurable desde st.secrets; si no hay secreto se usa el default."""
+    try:
+        return int(st.secrets.get(clave, default))
+    except Exception:
+        return default
+
+
+def _ruta_instantanea():
+    """Ruta de la instantánea (INSTANTANEA_RUTA); vacía la deshabilita."""
+    try:
+        return st.secrets.get("INSTANTANEA_RUTA", instantanea.RUTA_DEFAULT)
+    except Exception:
+        return instantanea.RUTA_DEFAULT
+
+
+def _secretos():
+    """Copia de st.secrets para usar fuera del hilo del script."""
+    try:
+        return dict(st.secrets)
+    except Exception:
+        return {}
+
+
+def conexion_instantanea(tablas):
+    """
+    Conexión de lectura a la instantánea si ya tiene ``tablas``, o None.
+    De paso lanza la sincronización en segundo plano cuando toca
+    (cada INSTANTANEA_INTERVALO segundos).
+    """
+    ruta = _ruta_instantanea()
+    if not ruta:
+        return None
+    try:
+        local = instantanea.conectar(ruta)
+    except (OSError, sqlite3.Error):
+        return None
+    secretos = _secretos()
+    instantanea.sincronizar_en_segundo_plano(
+        lambda: db.obtener_conexion(secretos), ruta,
+        _ttl_segundos("INSTANTANEA_INTERVALO", instantanea.INTERVALO_DEFAULT)
+    )
+    if instantanea.disponible(local, tablas) and not _atrasada(local, tablas):
+        return local
+    local.close()
+    return None
+
+
+def _atrasada(local, tablas):
+    """
+    True si alguna de ``tablas`` tiene una escritura que la instantánea aún
+    no trae: su sincronización falló y ninguna otra empezó después.
+    """
+    if not _atrasadas:
+        return False
+    sincronizadas = instantanea.sincronizadas_en(local)
+    for tabla in tablas:
+        fallo = _atrasadas.get(tabla)
+        if fallo is None:
+            continue
+        if (sincronizadas.get(tabla) or 0) > fallo:
+            _atrasadas.pop(tabla, None)
+        else:
+            return True
+    return False
+
+
+def _version(tabla):
+    """Versión de ``tabla`` en la instantánea o, si no se lee de ella, su última huella conocida."""
+    local = conexion_instantanea((tabla,))
+    if local is None:
+        return _huellas.get(tabla)
+    try:
+        return instantanea.versiones(local).get(tabla)
+    finally:
+        local.close()
+
+
+def conexion_lectura(*tablas):
+    """La instantánea si ya tiene ``tablas``; si no, una conexión del pool."""
+    local = conexion_instantanea(tablas)
+    return local if local is not None else db.obtener_conexion(st.secrets)
+
+
+def opciones_material():
+    """(opciones_display, material_mapa) del selector de la calculadora."""
+    return _opciones_material(_version("MATERIALES"))
+
+
+def indice_materiales():
+    """Índice de búsqueda del editor de recetas (ver selah.busqueda)."""
+    return _indice_materiales(_version("MATERIALES"))
+
+
+def tabla_costos():
+    """Tabla en memoria {ID_MATERIAL: COSTO_CUENTA} para preciar sin ir a la base."""
+    return _tabla_costos(_version("MATERIALES"))
+
+
+def proveedores():
+    """(lista de (ID, NOMBRE), índice NOMBRE -> ID_PROVEEDOR) de PROVEEDORES."""
+    return _proveedores(_version("PROVEEDORES"))
+
+
+@st.cache_data(ttl=_ttl_segundos("CACHE_TTL_MATERIALES", TTL_MATERIALES_DEFAULT), show_spinner=False)
+def _opciones_material(version):
+    conexion = conexion_lectura("MATERIALES")
+    try:
+        return _respaldar("opciones_material", consultas.opciones_material(conexion))
+    finally:
+        db.liberar_conexion(conexion)
+
+
+@st.cache_resource(ttl=_ttl_segundos("CACHE_TTL_MATERIALES", TTL_MATERIALES_DEFAULT), show_spinner=False)
+def _indice_materiales(version):
+    """
+    Es cache_resource (un único objeto de solo lectura compartido) para no
+    copiar el índice en cada rerun. Su "version" (versión de MATERIALES y
+    número de construcción) es la clave de las búsquedas de buscar_materiales.
+    """
+    opciones_display, mapa = _opciones_material(version)
+    indice = busqueda.construir_indice(opciones_display, mapa)
+    indice["version"] = (version, next(_construcciones))
+    return _respaldar("indice_materiales", indice)
+
+
+def buscar_materiales(indice, consulta, k=busqueda.TOP_K):
+    """
+    busqueda.buscar memorizado por (versión del índice, consulta, k): cada
+    fila de la receta solo busca de nuevo cuando cambia su texto o el índice.
+    La lista es compartida y de solo lectura.
+    """
+    return _buscar_materiales(indice["version"], consulta, k, indice)
+
+
+@st.cache_resource(max_entries=BUSQUEDAS_CACHE_MAXIMO, show_spinner=False)
+def _buscar_materiales(version, consulta, k, _indice):
+    return busqueda.buscar(_indice, consulta, k=k)
+
+
+@st.cache_data(ttl=_ttl_segundos("CACHE_TTL_COSTOS", TTL_COSTOS_DEFAULT), show_spinner=False)
+def _tabla_costos(version):
+    conexion = conexion_lectura("MATERIALES")
+    try:
+        return _respaldar("tabla_costos", consultas.tabla_costos(conexion))
+    finally:
+        db.liberar_conexion(conexion)
+
+
+@st.cache_data(ttl=_ttl_segundos("CACHE_TTL_PROVEEDORES", TTL_PROVEEDORES_DEFAULT), show_spinner=False)
+def _proveedores(version):
+    conexion = conexion_lectura("PROVEEDORES")
+    try:
+        lista = consultas.proveedores(conexion)
+    finally:
+        db.liberar_conexion(conexion)
+    return _respaldar("proveedores", (lista, {nombre: id_prov for id_prov, nombre in lista}))
+
+
+def pagina_materiales(filtros, despues_de, tamano):
+    """Página (df, hay_siguiente) de consultas.pagina_materiales, compartida y de solo lectura."""
+    return _pagina_materiales(_version("MATERIALES"), _version("PROVEEDORES"), filtros, despues_de, tamano)
+
+
+def pagina_pulseras(filtros, orden, descendente, despues_de, tamano):
+    """Página (df, hay_siguiente) de consultas.pagina_pulseras, compartida y de solo lectura."""
+    return _pagina_pulseras(_version("PULSERAS"), filtros, orden, descendente, despues_de, tamano)
+
+
+@st.cache_resource(ttl=_ttl_segundos("CACHE_TTL_CATALOGO", TTL_CATALOGO_DEFAULT),
+                   max_entries=PAGINAS_CACHE_MAXIMO, show_spinner=False)
+def _pagina_materiales(version_materiales, version_proveedores, filtros, despues_de, tamano):
+    conexion = conexion_lectura("MATERIALES", "PROVEEDORES")
+    try:
+        df, hay_siguiente = consultas.pagina_materiales(conexion, filtros, despues_de, tamano)
+    finally:
+        db.liberar_conexion(conexion)
+    return consultas.compactar(df.copy()), hay_siguiente
+
+
+@st.cache_resource(ttl=_ttl_segundos("CACHE_TTL_CATALOGO", TTL_CATALOGO_DEFAULT),
+                   max_entries=PAGINAS_CACHE_MAXIMO, show_spinner=False)
+def _pagina_pulseras(version, filtros, orden, descendente, despues_de, tamano):
+    conexion = conexion_lectura("PULSERAS")
+    try:
+        df, hay_siguiente = consultas.pagina_pulseras(conexion, filtros, orden, descendente, despues_de, tamano)
+    finally:
+        db.liberar_conexion(conexion)
+    return consultas.compactar(df.copy()), hay_siguiente
+
+
+def _semaforo_hilos():
+    """Semáforo del proceso: una conexión del pool queda para el hilo del script."""
+    global _hilos
+    if _hilos is None:
+        with _hilos_lock:
+            if _hilos is None:
+                _hilos = threading.BoundedSemaphore(max(1, db.tamano_pool(_secretos()) - 1))
+    return _hilos
+
+
+def lanzar(carga):
+    """
+    Ejecuta ``carga()`` en otro hilo y devuelve su Future; ``result()``
+    espera y relanza en el hilo del script el error que haya tenido. El
+    hilo lleva el contexto del script (st.secrets y las cachés) y la
+    ejecución de selah.metricas, pero no debe dibujar elementos: quedarían
+    fuera de su contenedor. Si ya hay tantas cargas en curso como
+    conexiones libres en el pool, la carga se hace aquí mismo.
+    """
+    futuro = concurrent.futures.Future()
+    tarea = metricas.propagar(carga)
+    semaforo = _semaforo_hilos()
+    en_hilo = semaforo.acquire(blocking=False)
+
+    def correr():
+        try:
+            futuro.set_result(tarea())
+        except Exception as e:
+            futuro.set_exception(e)
+        finally:
+            if en_hilo:
+                semaforo.release()
+
+    if not en_hilo:
+        correr()
+        return futuro
+    hilo = threading.Thread(target=correr, name="selah-carga", daemon=True)
+    add_script_run_ctx(hilo)
+    hilo.start()
+    return futuro
+
+
+def _respaldar(nombre, valor):
+    _respaldo[nombre] = valor
+    return valor
+
+
+def respaldo(nombre, default=None):
+    """
+    Último valor cargado con éxito por la función cacheada ``nombre``
+    (p. ej. "tabla_costos"), aunque su caché ya se haya invalidado.
+    """
+    return _respaldo.get(nombre, default)
+
+
+def sincronizar_instantanea(*tablas, conexion=None):
+    """
+    Trae ya a la instantánea los cambios de ``tablas`` tras una escritura,
+    para que las lecturas la vean. Usa ``conexion`` (la de la escritura, que
+    sigue abierta) o, sin ella, una del pool. Si falla, ``tablas`` se leen
+    de MySQL hasta que otra sincronización empiece después del fallo.
+    """
+    ruta = _ruta_instantanea()
+    if not ruta:
+        return
+    propia = conexion is None
+    local = None
+    try:
+        if propia:
+            conexion = db.obtener_conexion(st.secrets)
+        local = instantanea.conectar(ruta)
+        instantanea.sincronizar(conexion, local, tablas)
+    except (Error, OSError, sqlite3.Error):
+        fallo = time.time()
+        for tabla in tablas:
+            _atrasadas[tabla] = fallo
+    finally:
+        if local is not None:
+            local.close()
+        if propia:
+            db.liberar_conexion(conexion)
+
+
+def refrescar(*tablas):
+    """
+    Para los botones 🔄: compara la huella de ``tablas`` en MySQL (conteo
+    y última ACTUALIZADO_EN, ver instantanea.huella) con la última vista.
+    Si no cambió, las cachés se conservan; si cambió, la instantánea trae
+    solo las filas modificadas y su versión nueva recarga las cachés (sin
+    instantánea, la huella nueva es la que cambia la clave). Devuelve las
+    tablas que cambiaron; si la base no responde, ninguna.
+    """
+    ruta = _ruta_instantanea()
+    conexion = local = None
+    try:
+        conexion = db.obtener_conexion(st.secrets)
+        if ruta:
+            local = instantanea.conectar(ruta)
+            if instantanea.disponible(local, tablas):
+                cambios = instantanea.sincronizar(conexion, local, tablas)
+                return [tabla for tabla, filas in cambios.items() if filas]
+        cambiadas = []
+        for tabla in tablas:
+            actual = instantanea.huella(conexion, tabla)
+            if _huellas.get(tabla) != actual:
+                _huellas[tabla] = actual
+                cambiadas.append(tabla)
+        return cambiadas
+    except Exception:
+        return []
+    finally:
+        if local is not None:
+            local.close()
+        db.liberar_conexion(conexion)
+
+
+def invalidar_materiales(conexion=None):
+    """
+    Descarta las cachés que dependen de MATERIALES (p. ej. tras un INSERT).
+    ``conexion`` es la de la escritura, para sincronizar sin pedir otra al pool.
+    """
+    sincronizar_instantanea("MATERIALES", conexion=conexion)
+    _opciones_material.clear()
+    _indice_materiales.clear()
+    _buscar_materiales.clear()
+    _tabla_costos.clear()
+    _pagina_materiales.clear()
+
+
+def invalidar_proveedores(conexion=None):
+    """Descarta la caché de PROVEEDORES para forzar una recarga."""
+    sincronizar_instantanea("PROVEEDORES", conexion=conexion)
+    _proveedores.clear()
+    _pagina_materiales.clear()
+
+
+def invalidar_pulseras(conexion=None):
+    """Lleva a la instantánea las pulseras nuevas o recalculadas y descarta las páginas cacheadas."""
+    sincronizar_instantanea("PULSERAS", conexion=conexion)
+    _pagina_pulseras.clear()
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Línea de comandos de SELAH para correr precios, importaciones,
+exportaciones y recálculos desde cron o scripts, sin Streamlit.
+
+Usa los mismos módulos que la app y se conecta con el secrets.toml de
+Streamlit (``--secretos``, antes o después del comando). NumPy y pandas se importan dentro de cada
+comando: ``--help`` no los carga y ``precio`` y ``recalcular`` no cargan
+pandas, que es lo más lento de importar.
+
+    python -m selah precio --hilo Nylon M000113=12 M000011=5
+    python -m selah importar materiales lista.xlsx --actualizar
+    python -m selah importar pulseras coleccion.csv [--simular]
+    python -m selah exportar pulseras --formato Parquet --salida pulseras.parquet
+    python -m selah recalcular [ID_MATERIAL ...]
+    python -m selah migrar [--verificar]
+
+Código de salida: 0 si todo se aplicó, 1 si hubo filas con errores (o
+diferencias en ``migrar --verificar``) y 2 si falló la base o el archivo.
+"""
+
+import argparse
+import sys
+
+import mysql.connector
+from mysql.connector import Error
+
+from selah import consultas, exportacion, migraciones
+
+RUTA_SECRETOS_DEFAULT = ".streamlit/secrets.toml"
+
+
+def _conectar(args):
+    """Conexión directa (sin pool) con los secretos de ``--secretos``."""
+    return mysql.connector.connect(**migraciones.configuracion_secretos(args.secretos))
+
+
+def _error(mensaje):
+    print(mensaje, file=sys.stderr)
+
+
+def _reportar_errores(errores, columna_id):
+    for fila, id_fila, mensaje in errores:
+        _error(f"Fila {fila} ({columna_id} {id_fila or '-'}): {mensaje}")
+
+
+def _material_receta(par):
+    """(ID_MATERIAL, cantidad) de un argumento ``ID=CANTIDAD``; sin cantidad es 1."""
+    id_material, _, cantidad = par.partition("=")
+    try:
+        cantidad = int(cantidad or 1)
+        if not id_material.strip() or cantidad <= 0:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{par}' no es ID=CANTIDAD")
+    return id_material.strip(), cantidad
+
+
+def comando_precio(args):
+    from selah import precios
+
+    receta = args.materiales
+    conexion = _conectar(args)
+    try:
+        costos = consultas.costos_cuenta(conexion, [id_mat for id_mat, _ in receta])
+    finally:
+        conexion.close()
+    faltantes = [id_mat for id_mat, _ in receta if id_mat not in costos]
+    if faltantes:
+        _error(f"Materiales que no existen: {', '.join(faltantes)}")
+        return 1
+
+    precio = precios.precio_pulsera(precios.costo_cuentas_recetas([receta], costos)[0], args.hilo or " ")
+    print(f"Costo total: ${precio['COSTO']:.2f}")
+    print(f"Precio real: ${precio['PRECIO']:.2f}")
+    print(f"Clasificación: {precio['CLASIFICACION']}, Precio Clasificado: ${precio['PRECIO_CLASIFICADO']:.2f}")
+    return 0
+
+
+def comando_importar(args):
+    from selah import importacion, recetas
+
+    conexion = _conectar(args)
+    try:
+        with open(args.archivo, "rb") as archivo:
+            if args.tabla == "materiales":
+                resumen = importacion.importar_materiales(conexion, archivo, args.archivo, actualizar=args.actualizar)
+                print(f"{resumen['insertados']} materiales importados, {len(resumen['actualizados'])} actualizados")
+                if resumen["actualizados"]:
+                    n = recetas.recalcular_pulseras(conexion, resumen["actualizados"])
+                    print(f"{n} pulseras recalculadas con los nuevos costos")
+                _reportar_errores(resumen["errores"], "ID_MATERIAL")
+            else:
+                resumen = importacion.importar_pulseras(conexion, archivo, args.archivo, registrar=not args.simular)
+                for p in resumen["pulseras"]:
+                    print(f"{p['ID_PRODUCTO']}\t{p['COSTO']:.2f}\t{p['PRECIO']:.2f}\t"
+                          f"{p['CLASIFICACION']}\t{p['PRECIO_CLASIFICADO']:.2f}")
+                verbo = "se registrarían" if args.simular else "registradas"
+                print(f"{len(resumen['pulseras'])} pulseras {verbo}")
+                _reportar_errores(resumen["errores"], "ID_PRODUCTO")
+    finally:
+        conexion.close()
+    return 1 if resumen["errores"] else 0
+
+
+def comando_exportar(args):
+    salida = args.salida or exportacion.nombre_archivo(args.tabla, args.formato)
+    conexion = _conectar(args)
+    try:
+        if args.tabla == "materiales":
+            bloques = consultas.exportar_materiales(conexion)
+        else:
+            bloques = consultas.exportar_pulseras(conexion, orden=args.orden, descendente=args.descendente)
+        with open(salida, "wb") as archivo:
+            filas = exportacion.exportar(bloques, args.formato, archivo)
+    finally:
+        conexion.close()
+    print(f"{filas} filas exportadas a {salida}")
+    return 0
+
+
+def comando_recalcular(args):
+    from selah import recetas
+
+    conexion = _conectar(args)
+    try:
+        n = recetas.recalcular_pulseras(conexion, args.materiales or None)
+    finally:
+        conexion.close()
+    print(f"{n} pulseras recalculadas")
+    return 0
+
+
+def comando_migrar(args):
+    return migraciones.main(["--secretos", args.secretos] + (["--verificar"] if args.verificar else []))
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m selah", description="Tareas de SELAH sin la interfaz web.")
+    parser.add_argument("--secretos", default=RUTA_SECRETOS_DEFAULT,
+                        help="secrets.toml con DB_HOST, DB_PORT, DB_USER, DB_PASSWORD y DB_NAME.")
+    # También después del comando; SUPPRESS para no pisar el valor de arriba
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument("--secretos", default=argparse.SUPPRESS,
+                       help="secrets.toml con DB_HOST, DB_PORT, DB_USER, DB_PASSWORD y DB_NAME.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    precio = comandos.add_parser("precio", parents=[comun], help="Precio de una receta con los costos actuales.")
+    precio.add_argument("--hilo", choices=["Nylon", "Negro"], help="Tipo de hilo (por defecto sin hilo).")
+    precio.add_argument("materiales", nargs="+", type=_material_receta, metavar="ID=CANTIDAD")
+    precio.set_defaults(funcion=comando_precio)
+
+    importar = comandos.add_parser("importar", parents=[comun], help="Importación masiva desde CSV o Excel.")
+    importar.add_argument("tabla", choices=["materiales", "pulseras"])
+    importar.add_argument("archivo")
+    importar.add_argument("--actualizar", action="store_true",
+                          help="materiales: actualizar los que ya existen y recalcular sus pulseras.")
+    importar.add_argument("--simular", action="store_true",
+                          help="pulseras: validar y preciar sin registrar nada.")
+    importar.set_defaults(funcion=comando_importar)
+
+    exportar = comandos.add_parser("exportar", parents=[comun], help="Exporta un catálogo completo a CSV o Parquet.")
+    exportar.add_argument("tabla", choices=["materiales", "pulseras"])
+    exportar.add_argument("--formato", default="CSV", choices=list(exportacion.FORMATOS))
+    exportar.add_argument("--salida", help="Archivo de salida (por defecto tabla_fecha.ext).")
+    exportar.add_argument("--orden", default="ID_PRODUCTO", choices=consultas.ORDEN_PULSERAS,
+                          help="pulseras: columna de orden.")
+    exportar.add_argument("--descendente", action="store_true")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    recalcular = comandos.add_parser("recalcular", parents=[comun],
+                                     help="Vuelve a preciar pulseras con los costos actuales.")
+    recalcular.add_argument("materiales", nargs="*", metavar="ID_MATERIAL",
+                            help="Solo las pulseras que usan estos materiales (por defecto todas).")
+    recalcular.set_defaults(funcion=comando_recalcular)
+
+    migrar = comandos.add_parser("migrar", parents=[comun], help="Aplica o verifica las migraciones del esquema.")
+    migrar.add_argument("--verificar", action="store_true")
+    migrar.set_defaults(funcion=comando_migrar)
+    return parser
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.funcion(args)
+    except Error as e:
+        _error(f"Error de base de datos: {e}")
+        return 2
+    except (OSError, ValueError) as e:
+        _error(str(e))
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Consultas SQL reutilizables. Reciben una conexión ya abierta (del pool) y no
+dependen de Streamlit; el manejo de errores para la interfaz queda en los
+scripts.
+
+pandas se importa dentro de las funciones que devuelven DataFrames: las
+consultas escalares (costos, IDs) las usa también la línea de comandos
+(selah.cli), que no debe pagar el tiempo de importarlo.
+"""
+
+TAMANO_PAGINA_DEFAULT = 50
+TAMANO_BLOQUE_EXPORTACION = 5000
+# Columnas por las que se puede ordenar el catálogo de pulseras. Se
+# interpolan en el SQL, así que solo se aceptan las de esta lista.
+ORDEN_PULSERAS = ("ID_PRODUCTO", "COSTO", "PRECIO", "CLASIFICACION")
+# Las que admiten NULL: se ordenan con los NULL al final en ambos sentidos
+# (MySQL y SQLite los ponen primero en ASC) y el cursor los codifica como None
+ORDEN_CON_NULOS = ("CLASIFICACION",)
+# Texto con pocos valores distintos: se guarda como categoría
+COLUMNAS_CATEGORICAS = ("TIPO", "PIEDRA", "FORMA", "COLOR", "TEXTURA", "CLASIFICACION", "NOMBRE_PROVEEDOR")
+# Tipo de SQL de las columnas numéricas de exportar_* (DECIMAL -> float64,
+# INT -> int64; ver sql/migraciones/001_esquema_inicial.sql); el resto es
+# texto. Un bloque de read_sql con la columna toda en NULL no lo dice.
+TIPOS_EXPORTACION = {
+    "LARGO": "float64", "ANCHO": "float64", "COSTO_TIRA": "float64", "CANTIDAD": "int64",
+    "COSTO_CUENTA": "float64", "ID_PROVEEDOR": "int64",
+    "COSTO": "float64", "PRECIO": "float64", "PRECIO_CLASIFICADO": "float64",
+}
+
+
+def opciones_material(conexion):
+    """
+    Lista de opciones "ID | TIPO - PIEDRA - ..." para los selectbox de la
+    calculadora y el mapa display -> ID_MATERIAL. La primera opción es " ".
+    """
+    mapa = {" ": " "}
+    opciones_display = [" "]
+    cursor = conexion.cursor()
+    try:
+        # Se sigue obteniendo COLOR, pero se excluye del string de visualización.
+        query = "SELECT ID_MATERIAL, TIPO, PIEDRA, FORMA, TEXTURA, LARGO, ANCHO, COLOR, DESCRIPCION FROM MATERIALES ORDER BY ID_MATERIAL"
+        cursor.execute(query)
+        result = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    for id_mat, tipo, piedra, forma, textura, largo, ancho, color, desc in result:
+        parts = []
+        if tipo and str(tipo).strip(): parts.append(tipo)
+        if piedra and str(piedra).strip(): parts.append(piedra)
+        if forma and str(forma).strip(): parts.append(forma)
+        if textura and str(textura).strip(): parts.append(textura)
+        if largo is not None and str(largo).strip(): parts.append(f"L:{largo}")
+        if ancho is not None and str(ancho).strip(): parts.append(f"A:{ancho}")
+        if desc and str(desc).strip(): parts.append(f"({desc})")
+
+        display_string = f"{id_mat} | {' - '.join(parts)}"
+        mapa[display_string] = id_mat
+        opciones_display.append(display_string)
+
+    return opciones_display, mapa
+
+
+def proveedores(conexion):
+    """Lista de (ID_PROVEEDOR, NOMBRE_PROVEEDOR)."""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT ID_PROVEEDOR, NOMBRE_PROVEEDOR FROM PROVEEDORES")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def ids_validos(ids_material):
+    """IDs sin repetir y sin el valor vacío " " de los selectbox, en orden."""
+    return list(dict.fromkeys(id_mat for id_mat in ids_material if id_mat and id_mat != " "))
+
+
+def tabla_costos(conexion):
+    """Mapa completo {ID_MATERIAL: COSTO_CUENTA} de MATERIALES."""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT ID_MATERIAL, COSTO_CUENTA FROM MATERIALES")
+        return {
+            id_mat: float(costo) if costo is not None else 0.0
+            for id_mat, costo in cursor.fetchall()
+        }
+    finally:
+        cursor.close()
+
+
+def ids_existentes(conexion, ids_material):
+    """Subconjunto de ``ids_material`` que ya está en MATERIALES (una sola consulta)."""
+    ids = ids_validos(ids_material)
+    if not ids:
+        return set()
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(f"SELECT ID_MATERIAL FROM MATERIALES WHERE ID_MATERIAL IN ({marcadores})", tuple(ids))
+        return {fila[0] for fila in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def pulseras_existentes(conexion, ids_producto):
+    """Subconjunto de ``ids_producto`` que ya está en PULSERAS (una sola consulta)."""
+    ids = ids_validos(ids_producto)
+    if not ids:
+        return set()
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(f"SELECT ID_PRODUCTO FROM PULSERAS WHERE ID_PRODUCTO IN ({marcadores})", tuple(ids))
+        return {fila[0] for fila in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def costos_cuenta(conexion, ids_material):
+    """
+    Devuelve {ID_MATERIAL: COSTO_CUENTA} para todos los IDs en un solo
+    ``SELECT ... WHERE ID_MATERIAL IN (...)``. Los IDs que no existen no
+    aparecen en el resultado.
+    """
+    ids = ids_validos(ids_material)
+    if not ids:
+        return {}
+    marcadores = ", ".join(["%s"] * len(ids))
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(
+            f"SELECT ID_MATERIAL, COSTO_CUENTA FROM MATERIALES WHERE ID_MATERIAL IN ({marcadores})",
+            tuple(ids)
+        )
+        return {
+            id_mat: float(costo) if costo is not None else 0.0
+            for id_mat, costo in cursor.fetchall()
+        }
+    finally:
+        cursor.close()
+
+
+def compactar(df):
+    """
+    ``df`` con tipos angostos para compartirlo entre sesiones: las
+    COLUMNAS_CATEGORICAS como categoría, los enteros al menor tipo que los
+    contiene y los reales a float32 solo si no pierden precisión (los
+    precios siguen exactos, también como cursor de paginación).
+    """
+    import numpy as np
+    import pandas as pd
+
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in COLUMNAS_CATEGORICAS:
+            df[columna] = serie.astype("category")
+        elif pd.api.types.is_integer_dtype(serie):
+            df[columna] = pd.to_numeric(serie, downcast="integer")
+        elif pd.api.types.is_float_dtype(serie):
+            angosta = serie.astype("float32")
+            if np.array_equal(angosta.to_numpy("float64"), serie.to_numpy("float64"), equal_nan=True):
+                df[columna] = angosta
+    return df
+
+
+def _nativo(valor):
+    """Convierte escalares de NumPy (p. ej. tomados de un DataFrame) a tipos de Python para el driver."""
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+_SELECT_MATERIALES = """
+    SELECT 
+        M.ID_MATERIAL,
+        M.TIPO,
+        M.PIEDRA,
+        M.FORMA,
+        M.COLOR,
+        M.DESCRIPCION,
+        M.TEXTURA,
+        M.LARGO,
+        M.ANCHO,
+        M.COSTO_TIRA,
+        M.CANTIDAD,
+        M.COSTO_CUENTA,
+        P.NOMBRE_PROVEEDOR
+    FROM MATERIALES M
+    LEFT JOIN PROVEEDORES P ON M.ID_PROVEEDOR = P.ID_PROVEEDOR
+"""
+
+_SELECT_PULSERAS = """
+    SELECT 
+        ID_PRODUCTO,
+        DESCRIPCION,
+        COSTO,
+        PRECIO,
+        CLASIFICACION,
+        PRECIO_CLASIFICADO
+    FROM PULSERAS
+"""
+
+
+def _filtros_materiales(filtros):
+    """Condiciones WHERE (y sus parámetros) para los filtros del catálogo de materiales."""
+    condiciones, params = [], []
+    for columna in ("TIPO", "PIEDRA", "FORMA"):
+        valor = filtros.get(columna)
+        if valor and str(valor).strip():
+            condiciones.append(f"M.{columna} = %s")
+            params.append(str(valor).strip())
+    if filtros.get("ID_PROVEEDOR") is not None:
+        condiciones.append("M.ID_PROVEEDOR = %s")
+        params.append(filtros["ID_PROVEEDOR"])
+    if filtros.get("COSTO_MIN") is not None:
+        condiciones.append("M.COSTO_CUENTA >= %s")
+        params.append(filtros["COSTO_MIN"])
+    if filtros.get("COSTO_MAX") is not None:
+        condiciones.append("M.COSTO_CUENTA <= %s")
+        params.append(filtros["COSTO_MAX"])
+    return condiciones, params
+
+
+def pagina_materiales(conexion, filtros=None, despues_de=None, tamano=TAMANO_PAGINA_DEFAULT):
+    """
+    Una página del catálogo de materiales con paginación por keyset sobre
+    ID_MATERIAL: se traen las filas con ID mayor a ``despues_de`` (el último
+    ID de la página anterior) y los filtros van en el WHERE.
+
+    Devuelve (df, hay_siguiente). Se pide una fila extra para saber si hay
+    otra página sin hacer un COUNT(*).
+    """
+    import pandas as pd
+
+    condiciones, params = _filtros_materiales(filtros or {})
+    if despues_de is not None:
+        condiciones.append("M.ID_MATERIAL > %s")
+        params.append(_nativo(despues_de))
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    query = f"""
+    {_SELECT_MATERIALES}
+    {where}
+    ORDER BY M.ID_MATERIAL
+    LIMIT %s
+    """
+    params.append(int(tamano) + 1)
+    df = pd.read_sql(query, conexion, params=tuple(params))
+    return df.iloc[:tamano], len(df) > tamano
+
+
+def exportar_materiales(conexion, filtros=None, tamano=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Catálogo de materiales completo (con los mismos filtros y columnas que
+    las páginas) como un iterador de DataFrames de hasta ``tamano`` filas.
+    El cursor no usa buffer: MySQL envía las filas a medida que se leen,
+    así que la conexión queda ocupada hasta agotar el iterador.
+    """
+    import pandas as pd
+
+    condiciones, params = _filtros_materiales(filtros or {})
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    query = f"{_SELECT_MATERIALES} {where} ORDER BY M.ID_MATERIAL"
+    return pd.read_sql(query, conexion, params=tuple(params), chunksize=tamano)
+
+
+def _filtros_pulseras(filtros):
+    """Condiciones WHERE (y sus parámetros) para los filtros del catálogo de pulseras."""
+    condiciones, params = [], []
+    clasificaciones = [c for c in (filtros.get("CLASIFICACION") or []) if c]
+    if clasificaciones:
+        condiciones.append(f"CLASIFICACION IN ({', '.join(['%s'] * len(clasificaciones))})")
+        params.extend(clasificaciones)
+    if filtros.get("PRECIO_MIN") is not None:
+        condiciones.append("PRECIO >= %s")
+        params.append(filtros["PRECIO_MIN"])
+    if filtros.get("PRECIO_MAX") is not None:
+        condiciones.append("PRECIO <= %s")
+        params.append(filtros["PRECIO_MAX"])
+    return condiciones, params
+
+
+def pagina_pulseras(conexion, filtros=None, orden="ID_PRODUCTO", descendente=False,
+                    despues_de=None, tamano=TAMANO_PAGINA_DEFAULT):
+    """
+    Una página del catálogo de pulseras ordenada en el servidor.
+
+    La paginación es por keyset sobre (orden, ID_PRODUCTO): ``despues_de`` es
+    la tupla (valor de la columna de orden, ID_PRODUCTO) de la última fila
+    de la página anterior, con None (o NaN) si ese valor era NULL.
+    Devuelve (df, hay_siguiente).
+    """
+    import pandas as pd
+
+    if orden not in ORDEN_PULSERAS:
+        raise ValueError(f"Orden no soportado: {orden}")
+    direccion, op = ("DESC", "<") if descendente else ("ASC", ">")
+
+    condiciones, params = _filtros_pulseras(filtros or {})
+    if despues_de is not None:
+        valor, id_producto = (_nativo(v) for v in despues_de)
+        if orden == "ID_PRODUCTO":
+            condiciones.append(f"ID_PRODUCTO {op} %s")
+            params.append(id_producto)
+        elif orden in ORDEN_CON_NULOS and (valor is None or pd.isna(valor)):
+            # Ya en el tramo de los NULL, que van al final
+            condiciones.append(f"({orden} IS NULL AND ID_PRODUCTO {op} %s)")
+            params.append(id_producto)
+        elif orden in ORDEN_CON_NULOS:
+            condiciones.append(f"({orden} IS NULL OR {orden} {op} %s OR ({orden} = %s AND ID_PRODUCTO {op} %s))")
+            params.extend([valor, valor, id_producto])
+        else:
+            condiciones.append(f"({orden} {op} %s OR ({orden} = %s AND ID_PRODUCTO {op} %s))")
+            params.extend([valor, valor, id_producto])
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    query = f"""
+    {_SELECT_PULSERAS}
+    {where}
+    ORDER BY {_orden_pulseras(orden, direccion)}
+    LIMIT %s
+    """
+    params.append(int(tamano) + 1)
+    df = pd.read_sql(query, conexion, params=tuple(params))
+    return df.iloc[:tamano], len(df) > tamano
+
+
+def _orden_pulseras(orden, direccion):
+    if orden == "ID_PRODUCTO":
+        return f"ID_PRODUCTO {direccion}"
+    if orden in ORDEN_CON_NULOS:
+        return f"{orden} IS NULL, {orden} {direccion}, ID_PRODUCTO {direccion}"
+    return f"{orden} {direccion}, ID_PRODUCTO {direccion}"
+
+
+def exportar_pulseras(conexion, filtros=None, orden="ID_PRODUCTO", descendente=False,
+                      tamano=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Catálogo de pulseras completo, filtrado y ordenado como las páginas,
+    en DataFrames de hasta ``tamano`` filas (ver exportar_materiales).
+    """
+    import pandas as pd
+
+    if orden not in ORDEN_PULSERAS:
+        raise ValueError(f"Orden no soportado: {orden}")
+    condiciones, params = _filtros_pulseras(filtros or {})
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    query = f"{_SELECT_PULSERAS} {where} ORDER BY {_orden_pulseras(orden, 'DESC' if descendente else 'ASC')}"
+    return pd.read_sql(query, conexion, params=tuple(params), chunksize=tamano)
+
+
+def conteo_aproximado_pulseras(conexion, filtros=None):
+    """
+    Total aproximado de pulseras que cumplen los filtros, tomado de la
+    estimación de filas del optimizador (EXPLAIN) en lugar de un COUNT(*)
+    que recorrería la tabla. Devuelve None si no hay estimación.
+    """
+    condiciones, params = _filtros_pulseras(filtros or {})
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(f"EXPLAIN SELECT ID_PRODUCTO FROM PULSERAS {where}", tuple(params))
+        filas = cursor.fetchall()
+        columnas = [d[0].lower() for d in (cursor.description or [])]
+    finally:
+        cursor.close()
+    if "rows" not in columnas or not filas:
+        return None
+    estimacion = filas[0][columnas.index("rows")]
+    return int(estimacion) if estimacion is not None else None
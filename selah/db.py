@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de conexiones MySQL compartido por todo el proceso del servidor.
+
+El pool se crea una sola vez por proceso (los módulos importados sobreviven
+a los reruns de Streamlit) y cada petición toma una conexión prestada que
+devuelve al llamar a ``close()``. Las conexiones se entregan envueltas en
+selah.metricas.ConexionInstrumentada para medir cada préstamo y consulta.
+
+Un circuito protege a la app cuando MySQL no responde: tras varias fallas
+de conexión seguidas se abre y, durante un tiempo de espera, las llamadas
+fallan al instante con ``CircuitoAbierto`` en lugar de esperar el
+``connect_timeout`` cada una. Pasada la espera, una sola llamada hace de
+sonda: si conecta el circuito se cierra y si falla se vuelve a abrir.
+"""
+
+import threading
+import time
+
+from mysql.connector import pooling
+from mysql.connector.errors import Error, PoolError
+
+from selah import metricas
+
+POOL_NOMBRE = "selah_pool"
+POOL_TAMANO_DEFAULT = 5
+POOL_ESPERA_SEGUNDOS = 5.0
+CONNECT_TIMEOUT = 10
+CIRCUITO_FALLAS_DEFAULT = 3
+CIRCUITO_ESPERA_DEFAULT = 30.0
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Estado del circuito, compartido por todas las sesiones del proceso
+_circuito = {"fallas": 0, "abierto_hasta": None, "sonda": False}
+_circuito_lock = threading.Lock()
+
+
+class CircuitoAbierto(Error):
+    """La base de datos falló varias veces seguidas y no se intenta conectar por ahora."""
+
+
+def configuracion_db(secretos):
+    """Traduce los secretos (st.secrets o cualquier Mapping) a argumentos de mysql.connector."""
+    return {
+        "host": secretos["DB_HOST"],
+        "port": int(secretos["DB_PORT"]),
+        "user": secretos["DB_USER"],
+        "password": secretos["DB_PASSWORD"],
+        "database": secretos["DB_NAME"],
+        "connect_timeout": CONNECT_TIMEOUT,
+    }
+
+
+def tamano_pool(secretos):
+    """Tamaño del pool según ``DB_POOL_SIZE``, acotado al máximo de mysql.connector."""
+    try:
+        tamano = int(secretos.get("DB_POOL_SIZE", POOL_TAMANO_DEFAULT))
+    except (TypeError, ValueError):
+        tamano = POOL_TAMANO_DEFAULT
+    return max(1, min(tamano, pooling.CNX_POOL_MAXSIZE))
+
+
+def obtener_pool(secretos):
+    """Devuelve el pool del proceso, creándolo en la primera llamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=POOL_NOMBRE,
+                    pool_size=tamano_pool(secretos),
+                    pool_reset_session=True,
+                    **configuracion_db(secretos)
+                )
+    return _pool
+
+
+def _parametro_circuito(secretos, clave, default, tipo):
+    try:
+        return tipo(secretos.get(clave, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def segundos_para_reintento():
+    """Segundos que faltan para la sonda si el circuito está abierto; None si está cerrado."""
+    with _circuito_lock:
+        if _circuito["abierto_hasta"] is None:
+            return None
+        return max(0.0, _circuito["abierto_hasta"] - time.monotonic())
+
+
+def _entrar_circuito():
+    """
+    Deja pasar la llamada o lanza CircuitoAbierto. Pasada la espera deja
+    pasar una sola, la sonda, hasta que se conozca su resultado; devuelve
+    True si esta llamada es la sonda.
+    """
+    with _circuito_lock:
+        if _circuito["abierto_hasta"] is None:
+            return False
+        restante = _circuito["abierto_hasta"] - time.monotonic()
+        if restante > 0 or _circuito["sonda"]:
+            raise CircuitoAbierto(
+                msg=f"Base de datos no disponible; se reintentará en {max(restante, 0):.0f} s"
+            )
+        _circuito["sonda"] = True
+        return True
+
+
+def _salir_circuito(secretos, exito, sonda):
+    """Registra el resultado de una conexión: None = no concluyente (p. ej. pool agotado)."""
+    with _circuito_lock:
+        if sonda:
+            _circuito["sonda"] = False
+        if exito is None:
+            return
+        if exito:
+            _circuito["fallas"] = 0
+            _circuito["abierto_hasta"] = None
+            return
+        _circuito["fallas"] += 1
+        umbral = _parametro_circuito(secretos, "DB_CIRCUITO_FALLAS", CIRCUITO_FALLAS_DEFAULT, int)
+        if _circuito["fallas"] >= umbral:
+            espera = _parametro_circuito(secretos, "DB_CIRCUITO_ESPERA", CIRCUITO_ESPERA_DEFAULT, float)
+            _circuito["abierto_hasta"] = time.monotonic() + espera
+
+
+def obtener_conexion(secretos, espera=POOL_ESPERA_SEGUNDOS):
+    """
+    Presta una conexión del pool.
+
+    ``get_connection`` valida la conexión con un ping y reconecta si el
+    servidor la cerró, así que lo que se devuelve ya pasó el chequeo de
+    salud. Si el pool está agotado se reintenta hasta ``espera`` segundos
+    antes de propagar el ``PoolError``. Con el circuito abierto lanza
+    ``CircuitoAbierto`` sin intentar conectar.
+    """
+    sonda = _entrar_circuito()
+    inicio = time.perf_counter()
+    limite = time.monotonic() + espera
+    try:
+        pool = obtener_pool(secretos)
+        while True:
+            try:
+                conexion = pool.get_connection()
+                break
+            except PoolError:
+                if time.monotonic() >= limite:
+                    raise
+                time.sleep(0.05)
+    except PoolError:
+        # Pool agotado: la base responde, solo está ocupada
+        _salir_circuito(secretos, None, sonda)
+        raise
+    except Error:
+        _salir_circuito(secretos, False, sonda)
+        raise
+    except Exception:
+        _salir_circuito(secretos, None, sonda)
+        raise
+    _salir_circuito(secretos, True, sonda)
+    metricas.registrar_conexion(time.perf_counter() - inicio)
+    return metricas.ConexionInstrumentada(conexion)
+
+
+def liberar_conexion(conexion, cursor=None):
+    """Cierra el cursor y devuelve la conexión al pool, aunque esté rota."""
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    if conexion is not None:
+        try:
+            conexion.close()
+        except Exception:
+            pass
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de los catálogos a CSV o Parquet sin cargarlos completos.
+
+Las filas llegan por bloques (selah.consultas.exportar_*: read_sql con
+chunksize sobre un cursor sin buffer) y cada bloque se escribe en la
+salida antes de pedir el siguiente, así que la memoria depende del
+tamaño del bloque y no del de la tabla. Parquet necesita pyarrow, que es
+opcional.
+"""
+
+import datetime
+import io
+
+from selah import consultas
+
+# formato -> (extensión, tipo MIME)
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def nombre_archivo(tabla, formato, fecha=None):
+    """Nombre sugerido, p. ej. ``materiales_2025-06-30.csv``."""
+    fecha = fecha or datetime.date.today()
+    return f"{tabla.lower()}_{fecha:%Y-%m-%d}{FORMATOS[formato][0]}"
+
+
+def escribir_csv(bloques, salida):
+    """
+    Escribe los DataFrames de ``bloques`` en ``salida`` (archivo binario)
+    como un solo CSV en UTF-8 con BOM, para que Excel respete los acentos.
+    Devuelve el número de filas escritas.
+    """
+    filas = 0
+    texto = io.TextIOWrapper(salida, encoding="utf-8-sig", newline="")
+    try:
+        for i, bloque in enumerate(bloques):
+            bloque.to_csv(texto, index=False, header=i == 0)
+            filas += len(bloque)
+        texto.flush()
+    finally:
+        # La salida sigue siendo de quien la pasó
+        texto.detach()
+    return filas
+
+
+def _esquema_parquet(pa, bloque):
+    """
+    Esquema del archivo, fijo para todos los bloques. Las columnas
+    numéricas toman su tipo de SQL (consultas.TIPOS_EXPORTACION) y no del
+    primer bloque, donde pueden venir todas en NULL; las de texto van como
+    string.
+    """
+    esquema = pa.Schema.from_pandas(bloque, preserve_index=False)
+    for i, campo in enumerate(esquema):
+        tipo = consultas.TIPOS_EXPORTACION.get(campo.name)
+        if tipo is not None:
+            esquema = esquema.set(i, pa.field(campo.name, pa.type_for_alias(tipo)))
+        elif bloque[campo.name].dtype == object:
+            esquema = esquema.set(i, pa.field(campo.name, pa.string()))
+    return esquema
+
+
+def escribir_parquet(bloques, salida):
+    """Escribe ``bloques`` en ``salida`` como Parquet, un row group por bloque. Devuelve las filas."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Para exportar a Parquet instala pyarrow (pip install pyarrow)")
+
+    filas = 0
+    escritor = None
+    try:
+        for bloque in bloques:
+            if escritor is None:
+                esquema = _esquema_parquet(pa, bloque)
+                escritor = pq.ParquetWriter(salida, esquema)
+            for campo in esquema:
+                if pa.types.is_string(campo.type):
+                    bloque[campo.name] = bloque[campo.name].astype("string")
+                elif pa.types.is_floating(campo.type):
+                    # Columnas en NULL (None) o Decimal que read_sql no convirtió
+                    bloque[campo.name] = bloque[campo.name].astype("float64")
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            filas += len(bloque)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+
+def exportar(bloques, formato, salida):
+    """Escribe ``bloques`` en ``salida`` con el ``formato`` de FORMATOS; devuelve las filas escritas."""
+    if formato == "CSV":
+        return escribir_csv(bloques, salida)
+    if formato == "Parquet":
+        return escribir_parquet(bloques, salida)
+    raise ValueError(f"Formato no soportado: {formato}")
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Importación masiva desde CSV o Excel: materiales desde una lista de
+precios de proveedor y pulseras desde un archivo de recetas.
+
+El archivo se lee por lotes; cada fila pasa por la misma validación que el
+formulario de registro y por la misma derivación
+``COSTO_CUENTA = COSTO_TIRA / CANTIDAD``. Los duplicados se buscan con una
+sola consulta por lote y las filas válidas se insertan con ``executemany``
+dentro de una única transacción. Con ``actualizar=True`` las filas cuyo
+ID ya existe actualizan el material (upsert) en lugar de reportarse como
+error.
+
+Las pulseras de una colección nueva llegan como un archivo de recetas,
+una fila por material. Se leen completas, se precian todas con una sola
+carga de costos (precios.precios_lote) y se insertan con sus recetas en
+una transacción.
+"""
+
+import pandas as pd
+
+from selah import consultas, precios
+from selah.materiales import SQL_INSERT_MATERIAL, SQL_UPSERT_MATERIAL
+from selah.recetas import SQL_INSERT_PULSERA, SQL_INSERT_RECETA
+
+TAMANO_LOTE = 500
+
+
+def _texto(valor):
+    """Celda como texto sin espacios; vacío para None/NaN."""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return ""
+    return str(valor).strip()
+
+
+def _normalizar_columna(nombre):
+    return _texto(nombre).upper().replace(" ", "_")
+
+
+def preparar_material(fila, indice_proveedores):
+    """
+    Valida una fila (dict con columnas de MATERIALES más PROVEEDOR o
+    ID_PROVEEDOR) y devuelve la tupla lista para ``SQL_INSERT_MATERIAL``.
+    Lanza ValueError con el mismo mensaje que mostraría el formulario.
+    """
+    id_material = _texto(fila.get("ID_MATERIAL"))
+    if not id_material:
+        raise ValueError("El ID no puede quedar vacío")
+
+    id_proveedor = None
+    nombre_prov = _texto(fila.get("PROVEEDOR") or fila.get("NOMBRE_PROVEEDOR"))
+    if nombre_prov:
+        id_proveedor = indice_proveedores.get(nombre_prov)
+    elif _texto(fila.get("ID_PROVEEDOR")):
+        id_texto = _texto(fila.get("ID_PROVEEDOR"))
+        id_proveedor = next((i for i in indice_proveedores.values() if str(i) == id_texto), None)
+    if id_proveedor is None:
+        raise ValueError("Debes seleccionar un proveedor válido.")
+
+    try:
+        costo_tira_f = float(_texto(fila.get("COSTO_TIRA")))
+        cantidad_f = float(_texto(fila.get("CANTIDAD")))
+        if not cantidad_f.is_integer():
+            raise ValueError
+        cantidad_i = int(cantidad_f)
+        # Largo y Ancho pueden quedar NULL si están vacíos
+        largo, ancho = _texto(fila.get("LARGO")), _texto(fila.get("ANCHO"))
+        largo_f = float(largo) if largo else None
+        ancho_f = float(ancho) if ancho else None
+    except ValueError:
+        raise ValueError("Verifica que los campos numéricos sean correctos")
+    costo_cuenta = costo_tira_f / cantidad_i if cantidad_i != 0 else 0
+
+    return (
+        id_material, _texto(fila.get("TIPO")), _texto(fila.get("PIEDRA")), _texto(fila.get("FORMA")),
+        _texto(fila.get("COLOR")), _texto(fila.get("DESCRIPCION")), _texto(fila.get("TEXTURA")),
+        largo_f, ancho_f, costo_tira_f, cantidad_i, costo_cuenta, id_proveedor
+    )
+
+
+def _vacia(fila):
+    return all(_texto(v) == "" for v in fila.values())
+
+
+def _lotes_csv(archivo, tamano_lote):
+    # Las líneas vacías se leen (y se saltan aquí) para no correr la numeración
+    numero_fila = 1
+    for df in pd.read_csv(archivo, dtype=str, keep_default_na=False, skip_blank_lines=False,
+                          encoding="utf-8-sig", chunksize=tamano_lote):
+        df.columns = [_normalizar_columna(c) for c in df.columns]
+        lote = []
+        for fila in df.to_dict("records"):
+            numero_fila += 1
+            if not _vacia(fila):
+                lote.append((numero_fila, fila))
+        if lote:
+            yield lote
+
+
+def _lotes_excel(archivo, tamano_lote):
+    # openpyxl en modo read_only recorre la hoja sin cargarla completa
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar archivos Excel instala openpyxl (pip install openpyxl)")
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_columna(c) for c in next(filas, ())]
+        lote = []
+        for numero_fila, valores in enumerate(filas, start=2):
+            if all(_texto(v) == "" for v in valores):
+                continue
+            lote.append((numero_fila, dict(zip(encabezados, valores))))
+            if len(lote) >= tamano_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+    finally:
+        libro.close()
+
+
+def leer_lotes(archivo, nombre_archivo, tamano_lote=TAMANO_LOTE):
+    """
+    Lotes de (número de fila, fila) de un CSV o Excel, con cada fila como
+    dict de columnas normalizadas a MAYÚSCULAS. Las filas vacías se saltan
+    pero cuentan: el número es el del archivo (el encabezado es la 1).
+    """
+    if nombre_archivo.lower().endswith((".xlsx", ".xlsm")):
+        return _lotes_excel(archivo, tamano_lote)
+    return _lotes_csv(archivo, tamano_lote)
+
+
+def importar_materiales(conexion, archivo, nombre_archivo, tamano_lote=TAMANO_LOTE, actualizar=False):
+    """
+    Importa los materiales del archivo en una sola transacción.
+
+    Devuelve {"insertados": n, "actualizados": [IDs], "errores": [(fila, ID_MATERIAL, mensaje), ...]},
+    donde ``fila`` es el número de línea en el archivo (el encabezado es la 1).
+    Un error de base de datos revierte toda la importación y se propaga.
+    """
+    indice_proveedores = {nombre: id_prov for id_prov, nombre in consultas.proveedores(conexion)}
+    insertados, actualizados, errores = 0, [], []
+    vistos = set()
+    cursor = conexion.cursor()
+    try:
+        for lote in leer_lotes(archivo, nombre_archivo, tamano_lote):
+            validas = []
+            for numero_fila, fila in lote:
+                try:
+                    datos = preparar_material(fila, indice_proveedores)
+                except ValueError as e:
+                    errores.append((numero_fila, _texto(fila.get("ID_MATERIAL")), str(e)))
+                    continue
+                if datos[0] in vistos:
+                    errores.append((numero_fila, datos[0], "ID repetido en el archivo"))
+                    continue
+                vistos.add(datos[0])
+                validas.append((numero_fila, datos))
+
+            existentes = consultas.ids_existentes(conexion, [datos[0] for _, datos in validas])
+            nuevas, cambios = [], []
+            for numero, datos in validas:
+                if datos[0] not in existentes:
+                    nuevas.append(datos)
+                elif actualizar:
+                    cambios.append(datos)
+                else:
+                    errores.append((numero, datos[0], "El ID ya existe"))
+            if nuevas:
+                cursor.executemany(SQL_INSERT_MATERIAL, nuevas)
+                insertados += len(nuevas)
+            if cambios:
+                cursor.executemany(SQL_UPSERT_MATERIAL, cambios)
+                actualizados.extend(datos[0] for datos in cambios)
+        conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {"insertados": insertados, "actualizados": actualizados, "errores": sorted(errores)}
+
+
+def _agregar_fila_receta(pulsera, fila):
+    """
+    Suma una fila del archivo de recetas a ``pulsera``. DESCRIPCION y
+    TIPO_HILO pueden venir solo en la primera fila del producto; si se
+    repiten tienen que coincidir.
+    """
+    for campo, clave in (("DESCRIPCION", "descripcion"), ("TIPO_HILO", "tipo_hilo")):
+        valor = _texto(fila.get(campo))
+        if valor and pulsera[clave] and valor != pulsera[clave]:
+            raise ValueError(f"{campo} distinto en dos filas de la misma pulsera")
+        pulsera[clave] = pulsera[clave] or valor
+
+    id_material = _texto(fila.get("ID_MATERIAL"))
+    if not id_material:
+        raise ValueError("Falta el ID_MATERIAL")
+    try:
+        cantidad_f = float(_texto(fila.get("CANTIDAD")))
+        if not cantidad_f.is_integer() or cantidad_f <= 0:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Cantidad inválida para {id_material}")
+    pulsera["receta"][id_material] = pulsera["receta"].get(id_material, 0) + int(cantidad_f)
+
+
+def leer_recetas(archivo, nombre_archivo, tamano_lote=TAMANO_LOTE):
+    """
+    Agrupa por ID_PRODUCTO las filas de un archivo de recetas (columnas
+    ID_PRODUCTO, DESCRIPCION, TIPO_HILO, ID_MATERIAL y CANTIDAD).
+
+    Devuelve (pulseras, errores): ``pulseras`` es una lista, en el orden del
+    archivo, de dicts con fila, id_producto, descripcion, tipo_hilo y
+    receta {ID_MATERIAL: cantidad}; una pulsera con alguna fila inválida
+    queda en ``errores`` y no en ``pulseras``.
+    """
+    pulseras, errores, invalidas = {}, [], set()
+    for lote in leer_lotes(archivo, nombre_archivo, tamano_lote):
+        for numero_fila, fila in lote:
+            id_producto = _texto(fila.get("ID_PRODUCTO"))
+            if not id_producto:
+                errores.append((numero_fila, "", "El ID no puede quedar vacío"))
+                continue
+            pulsera = pulseras.setdefault(id_producto, {
+                "fila": numero_fila, "id_producto": id_producto, "descripcion": "", "tipo_hilo": "", "receta": {}
+            })
+            try:
+                _agregar_fila_receta(pulsera, fila)
+            except ValueError as e:
+                errores.append((numero_fila, id_producto, str(e)))
+                invalidas.add(id_producto)
+
+    validas = []
+    for id_producto, pulsera in pulseras.items():
+        if id_producto in invalidas:
+            continue
+        if not pulsera["descripcion"]:
+            errores.append((pulsera["fila"], id_producto, "Debes ingresar ID y descripción del producto"))
+        elif pulsera["tipo_hilo"] not in precios.COSTO_HILO:
+            errores.append((pulsera["fila"], id_producto,
+                            f"Tipo de hilo inválido: '{pulsera['tipo_hilo']}' ({' o '.join(precios.COSTO_HILO)})"))
+        else:
+            validas.append(pulsera)
+    return validas, errores
+
+
+def importar_pulseras(conexion, archivo, nombre_archivo, tamano_lote=TAMANO_LOTE, registrar=True):
+    """
+    Precia y registra las pulseras de un archivo de recetas (ver
+    leer_recetas) en una sola transacción: una consulta para los IDs ya
+    registrados, otra para los costos de todos los materiales usados, un
+    precios_lote para todas y un executemany para PULSERAS y otro para
+    PULSERAS_RECETA.
+
+    Devuelve {"pulseras": [dicts con ID_PRODUCTO, DESCRIPCION y el
+    precio], "errores": [(fila, ID_PRODUCTO, mensaje), ...]}. Las pulseras
+    con errores (ID ya registrado, material inexistente, ...) no se
+    registran; un error de base de datos revierte todo y se propaga. Con
+    ``registrar=False`` solo se valida y se precia, sin escribir.
+    """
+    pulseras, errores = leer_recetas(archivo, nombre_archivo, tamano_lote)
+
+    existentes = consultas.pulseras_existentes(conexion, [p["id_producto"] for p in pulseras])
+    tabla_costos = consultas.costos_cuenta(conexion, [id_mat for p in pulseras for id_mat in p["receta"]])
+    validas = []
+    for pulsera in pulseras:
+        faltantes = [id_mat for id_mat in pulsera["receta"] if id_mat not in tabla_costos]
+        if pulsera["id_producto"] in existentes:
+            errores.append((pulsera["fila"], pulsera["id_producto"], "El ID ya existe"))
+        elif faltantes:
+            errores.append((pulsera["fila"], pulsera["id_producto"],
+                            f"Materiales que no existen: {', '.join(faltantes)}"))
+        else:
+            validas.append(pulsera)
+
+    preciadas = []
+    if validas:
+        recetas = [list(p["receta"].items()) for p in validas]
+        lote = precios.precios_lote(
+            precios.costo_cuentas_recetas(recetas, tabla_costos), [p["tipo_hilo"] for p in validas]
+        )
+        for i, pulsera in enumerate(validas):
+            preciadas.append({
+                "ID_PRODUCTO": pulsera["id_producto"],
+                "DESCRIPCION": pulsera["descripcion"],
+                **{columna: valores[i].item() for columna, valores in lote.items()},
+            })
+
+    if preciadas and registrar:
+        cursor = conexion.cursor()
+        try:
+            cursor.executemany(SQL_INSERT_PULSERA, [
+                (r["ID_PRODUCTO"], r["DESCRIPCION"], r["COSTO"], r["PRECIO"], r["CLASIFICACION"],
+                 r["PRECIO_CLASIFICADO"], p["tipo_hilo"])
+                for r, p in zip(preciadas, validas)
+            ])
+            cursor.executemany(SQL_INSERT_RECETA, [
+                (p["id_producto"], id_mat, cantidad) for p in validas for id_mat, cantidad in p["receta"].items()
+            ])
+            conexion.commit()
+        except Exception:
+            conexion.rollback()
+            raise
+        finally:
+            cursor.close()
+    return {"pulseras": preciadas, "errores": sorted(errores)}
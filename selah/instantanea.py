@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Instantánea local (SQLite) de MATERIALES, PROVEEDORES y PULSERAS.
+
+Las lecturas de catálogo se hacen primero contra este archivo local: la
+app arranca con datos al instante y sigue mostrando catálogos aunque
+MySQL no responda. La instantánea se sincroniza de forma incremental
+con la columna ``ACTUALIZADO_EN`` de cada tabla (ver
+sql/migraciones/003_instantanea.sql): solo se traen las filas
+modificadas desde la última marca (menos ``MARGEN_MARCA``) y, si los
+COUNT(*) no coinciden, se reconcilian los IDs: se borran los que ya no
+están y se traen los que faltan. Si la tabla aún no tiene la columna se
+copia completa. Antes de eso se compara la huella
+de la tabla (conteo y última marca, ver ``huella()``): si no cambió desde
+la sincronización anterior no se pide nada más.
+
+Cada tabla lleva un número de versión que sube cuando una sincronización
+cambia filas; las cachés de Streamlit lo usan como parte de su clave.
+SINCRONIZADO_EN es el momento en que empezó la última sincronización
+exitosa: la instantánea tiene todo lo que MySQL tenía a esa hora.
+"""
+
+import datetime
+import decimal
+import os
+import sqlite3
+import threading
+import time
+
+from mysql.connector import errorcode, errors
+
+from selah.materiales import COLUMNAS_MATERIAL
+
+RUTA_DEFAULT = os.path.join(os.path.expanduser("~"), ".cache", "selah", "instantanea.sqlite")
+INTERVALO_DEFAULT = 60.0
+MARCA = "ACTUALIZADO_EN"
+TAMANO_LOTE = 5000
+# Segundos que se vuelven a pedir bajo la marca: una transacción que
+# confirma tarde deja filas con una marca anterior a la última vista.
+MARGEN_MARCA = 300.0
+
+# tabla -> (clave primaria, columnas copiadas)
+TABLAS = {
+    "PROVEEDORES": ("ID_PROVEEDOR", ("ID_PROVEEDOR", "NOMBRE_PROVEEDOR")),
+    "MATERIALES": ("ID_MATERIAL", COLUMNAS_MATERIAL),
+    "PULSERAS": ("ID_PRODUCTO", (
+        "ID_PRODUCTO", "DESCRIPCION", "COSTO", "PRECIO", "CLASIFICACION", "PRECIO_CLASIFICADO", "TIPO_HILO"
+    )),
+}
+
+_ESQUEMA = [
+    f"CREATE TABLE IF NOT EXISTS {tabla} ({', '.join(columnas)}, PRIMARY KEY ({clave}))"
+    for tabla, (clave, columnas) in TABLAS.items()
+] + [
+    "CREATE INDEX IF NOT EXISTS IDX_MATERIALES_PROVEEDOR ON MATERIALES (ID_PROVEEDOR)",
+    "CREATE INDEX IF NOT EXISTS IDX_PULSERAS_COSTO ON PULSERAS (COSTO, ID_PRODUCTO)",
+    "CREATE INDEX IF NOT EXISTS IDX_PULSERAS_PRECIO ON PULSERAS (PRECIO, ID_PRODUCTO)",
+    "CREATE INDEX IF NOT EXISTS IDX_PULSERAS_CLASIFICACION ON PULSERAS (CLASIFICACION, ID_PRODUCTO)",
+    """CREATE TABLE IF NOT EXISTS _SINCRONIZACION (
+        TABLA TEXT PRIMARY KEY, MARCA TEXT, SINCRONIZADO_EN REAL, VERSION INTEGER NOT NULL DEFAULT 0,
+        HUELLA TEXT
+    )""",
+]
+
+_sincronizacion = {"hilo": None, "ultimo_intento": 0.0}
+_sincronizacion_lock = threading.Lock()
+_rutas_con_esquema = set()
+
+
+class ConexionLocal:
+    """
+    Conexión a la instantánea con la interfaz que usan selah.consultas y
+    pandas: traduce los marcadores ``%s`` y el EXPLAIN del conteo
+    aproximado (aquí un COUNT(*) local es barato).
+    """
+
+    def __init__(self, ruta):
+        self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+
+    def cursor(self, *args, **kwargs):
+        return _CursorLocal(self._conexion.cursor())
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def close(self):
+        self._conexion.close()
+
+
+class _CursorLocal:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def execute(self, sql, params=()):
+        sql = sql.strip()
+        if sql.upper().startswith("EXPLAIN "):
+            sql = f"SELECT COUNT(*) AS rows FROM ({sql[len('EXPLAIN '):]})"
+        return self._cursor.execute(sql.replace("%s", "?"), tuple(params or ()))
+
+
+def conectar(ruta):
+    """Abre la instantánea en ``ruta``, creando el archivo y el esquema si hace falta."""
+    if ruta in _rutas_con_esquema:
+        return ConexionLocal(ruta)
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    conexion = ConexionLocal(ruta)
+    sqlite = conexion._conexion
+    # WAL: el hilo de sincronización escribe sin bloquear las lecturas
+    sqlite.execute("PRAGMA journal_mode=WAL")
+    for sentencia in _ESQUEMA:
+        sqlite.execute(sentencia)
+    # Instantáneas creadas antes de que existiera la huella
+    columnas = {fila[1] for fila in sqlite.execute("PRAGMA table_info(_SINCRONIZACION)")}
+    if "HUELLA" not in columnas:
+        sqlite.execute("ALTER TABLE _SINCRONIZACION ADD COLUMN HUELLA TEXT")
+    sqlite.commit()
+    _rutas_con_esquema.add(ruta)
+    return conexion
+
+
+def versiones(local):
+    """{tabla: version} de las tablas sincronizadas al menos una vez."""
+    filas = local._conexion.execute("SELECT TABLA, VERSION FROM _SINCRONIZACION").fetchall()
+    return dict(filas)
+
+
+def sincronizadas_en(local):
+    """{tabla: SINCRONIZADO_EN} (time.time()) de las tablas sincronizadas al menos una vez."""
+    filas = local._conexion.execute("SELECT TABLA, SINCRONIZADO_EN FROM _SINCRONIZACION").fetchall()
+    return dict(filas)
+
+
+def disponible(local, tablas):
+    """True si todas las ``tablas`` ya tienen una primera copia."""
+    sincronizadas = versiones(local)
+    return all(tabla in sincronizadas for tabla in tablas)
+
+
+def _valor_local(valor):
+    """Tipos de mysql.connector que sqlite3 no guarda tal cual."""
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat(sep=" ") if isinstance(valor, datetime.datetime) else valor.isoformat()
+    return valor
+
+
+def huella(conexion, tabla):
+    """
+    (filas, última ACTUALIZADO_EN) de ``tabla`` en MySQL: cambia con
+    cualquier INSERT, UPDATE o DELETE y sale de índices, sin recorrer las
+    filas. Sin la columna (antes de la migración 003_instantanea) solo hay
+    conteo y las actualizaciones no se notan.
+    """
+    if tabla not in TABLAS:
+        raise ValueError(f"Tabla no soportada: {tabla}")
+    cursor = conexion.cursor()
+    try:
+        try:
+            cursor.execute(f"SELECT COUNT(*), MAX({MARCA}) FROM {tabla}")
+        except errors.ProgrammingError as e:
+            if e.errno != errorcode.ER_BAD_FIELD_ERROR:
+                raise
+            cursor.execute(f"SELECT COUNT(*), NULL FROM {tabla}")
+        filas, ultima = cursor.fetchall()[0]
+    finally:
+        cursor.close()
+    return int(filas), _valor_local(ultima)
+
+
+def _desde(marca):
+    """Marca desde la que se piden cambios: ``marca`` menos MARGEN_MARCA."""
+    try:
+        instante = datetime.datetime.fromisoformat(marca)
+    except (TypeError, ValueError):
+        return marca
+    return (instante - datetime.timedelta(seconds=MARGEN_MARCA)).isoformat(sep=" ", timespec="milliseconds")
+
+
+def _consultar_cambios(cursor, tabla, columnas, marca):
+    """Ejecuta el SELECT de filas cambiadas; devuelve False si hubo que pedir la tabla completa."""
+    lista = ", ".join(columnas)
+    try:
+        if marca is None:
+            cursor.execute(f"SELECT {lista}, {MARCA} FROM {tabla}")
+            return False
+        # Ventana bajo la marca: las filas que no cambiaron no cuentan en el upsert
+        cursor.execute(f"SELECT {lista}, {MARCA} FROM {tabla} WHERE {MARCA} >= %s", (_desde(marca),))
+        return True
+    except errors.ProgrammingError as e:
+        if e.errno != errorcode.ER_BAD_FIELD_ERROR:
+            raise
+        cursor.execute(f"SELECT {lista}, NULL FROM {tabla}")
+        return False
+
+
+def sincronizar_tabla(conexion, local, tabla):
+    """Trae a la instantánea los cambios de ``tabla`` desde su última marca; devuelve las filas cambiadas."""
+    clave, columnas = TABLAS[tabla]
+    sqlite = local._conexion
+    fila_sync = sqlite.execute("SELECT MARCA, HUELLA FROM _SINCRONIZACION WHERE TABLA = ?", (tabla,)).fetchone()
+    marca = fila_sync[0] if fila_sync else None
+
+    # Se toma antes de leer: lo que cambie después deja otra huella
+    inicio = time.time()
+    filas_remotas, ultima = huella(conexion, tabla)
+    texto_huella = f"{filas_remotas}|{ultima}"
+    if fila_sync and fila_sync[1] == texto_huella and ultima is not None:
+        sqlite.execute("UPDATE _SINCRONIZACION SET SINCRONIZADO_EN = ? WHERE TABLA = ?", (inicio, tabla))
+        sqlite.commit()
+        return 0
+
+    actualizar = ", ".join(f"{c} = excluded.{c}" for c in columnas if c != clave)
+    distinto = f"({', '.join(f'{tabla}.{c}' for c in columnas)}) IS NOT ({', '.join(f'excluded.{c}' for c in columnas)})"
+    upsert = (
+        f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['?'] * len(columnas))}) "
+        f"ON CONFLICT ({clave}) DO UPDATE SET {actualizar} WHERE {distinto}"
+    )
+
+    cambios = 0
+    nueva_marca = marca
+    cursor = conexion.cursor()
+    try:
+        incremental = _consultar_cambios(cursor, tabla, columnas, marca)
+        if not incremental:
+            # Copia completa: lo que no llegue se borra al final
+            sqlite.execute(f"CREATE TEMP TABLE IF NOT EXISTS _IDS_{tabla} (ID PRIMARY KEY)")
+            sqlite.execute(f"DELETE FROM _IDS_{tabla}")
+        while True:
+            lote = cursor.fetchmany(TAMANO_LOTE)
+            if not lote:
+                break
+            filas = [tuple(_valor_local(v) for v in fila[:-1]) for fila in lote]
+            cambios += sqlite.executemany(upsert, filas).rowcount
+            if not incremental:
+                sqlite.executemany(f"INSERT OR IGNORE INTO _IDS_{tabla} VALUES (?)", [(f[0],) for f in filas])
+            marcas = [_valor_local(fila[-1]) for fila in lote if fila[-1] is not None]
+            if marcas:
+                nueva_marca = max([nueva_marca] + marcas if nueva_marca else marcas)
+
+        if incremental:
+            # Ni los borrados ni las filas confirmadas con una marca anterior a
+            # la ventana se ven por la marca: si los conteos difieren se
+            # reconcilian los IDs en los dos sentidos
+            if filas_remotas != sqlite.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]:
+                cursor.execute(f"SELECT {clave} FROM {tabla}")
+                sqlite.execute(f"CREATE TEMP TABLE IF NOT EXISTS _IDS_{tabla} (ID PRIMARY KEY)")
+                sqlite.execute(f"DELETE FROM _IDS_{tabla}")
+                sqlite.executemany(f"INSERT OR IGNORE INTO _IDS_{tabla} VALUES (?)", cursor.fetchall())
+                faltan = [fila[0] for fila in sqlite.execute(
+                    f"SELECT ID FROM _IDS_{tabla} WHERE ID NOT IN (SELECT {clave} FROM {tabla})"
+                )]
+                for i in range(0, len(faltan), TAMANO_LOTE):
+                    ids = faltan[i:i + TAMANO_LOTE]
+                    cursor.execute(
+                        f"SELECT {', '.join(columnas)} FROM {tabla} WHERE {clave} IN ({', '.join(['%s'] * len(ids))})",
+                        ids
+                    )
+                    filas = [tuple(_valor_local(v) for v in fila) for fila in cursor.fetchall()]
+                    cambios += sqlite.executemany(upsert, filas).rowcount
+                incremental = False
+        if not incremental:
+            cambios += sqlite.execute(
+                f"DELETE FROM {tabla} WHERE {clave} NOT IN (SELECT ID FROM _IDS_{tabla})"
+            ).rowcount
+    except Exception:
+        sqlite.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    sqlite.execute(
+        """INSERT INTO _SINCRONIZACION (TABLA, MARCA, SINCRONIZADO_EN, VERSION, HUELLA) VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (TABLA) DO UPDATE SET MARCA = excluded.MARCA, SINCRONIZADO_EN = excluded.SINCRONIZADO_EN,
+        HUELLA = excluded.HUELLA, VERSION = VERSION + (? > 0)""",
+        (tabla, nueva_marca, inicio, texto_huella, cambios)
+    )
+    sqlite.commit()
+    return cambios
+
+
+def sincronizar(conexion, local, tablas=tuple(TABLAS)):
+    """Sincroniza ``tablas``, cada una en su propia transacción; devuelve {tabla: filas cambiadas}."""
+    return {tabla: sincronizar_tabla(conexion, local, tabla) for tabla in tablas}
+
+
+def sincronizar_en_segundo_plano(obtener_conexion, ruta, intervalo=INTERVALO_DEFAULT):
+    """
+    Lanza una sincronización en un hilo si la última empezó hace más de
+    ``intervalo`` segundos y no hay otra en curso. ``obtener_conexion``
+    presta una conexión a MySQL; los errores se ignoran y se reintenta
+    en el siguiente intervalo.
+    """
+    with _sincronizacion_lock:
+        hilo = _sincronizacion["hilo"]
+        if hilo is not None and hilo.is_alive():
+            return False
+        if time.monotonic() - _sincronizacion["ultimo_intento"] < intervalo:
+            return False
+        _sincronizacion["ultimo_intento"] = time.monotonic()
+
+        def trabajo():
+            conexion = local = None
+            try:
+                conexion = obtener_conexion()
+                local = conectar(ruta)
+                sincronizar(conexion, local)
+            except Exception:
+                pass
+            finally:
+                for c in (local, conexion):
+                    if c is not None:
+                        try:
+                            c.close()
+                        except Exception:
+                            pass
+
+        hilo = threading.Thread(target=trabajo, name="selah-instantanea", daemon=True)
+        _sincronizacion["hilo"] = hilo
+        hilo.start()
+        return True
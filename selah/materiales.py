@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Escritura de materiales.
+
+El registro es una sola sentencia que se apoya en la PRIMARY KEY de
+MATERIALES: no hay un SELECT COUNT(*) previo, así que dos usuarios que
+registran el mismo ID a la vez no pueden colarse entre la verificación y
+el INSERT. El modo ``actualizar`` hace un upsert (ON DUPLICATE KEY UPDATE)
+para actualizar costos de materiales existentes; usa el alias de fila
+(``AS nuevo``, MySQL 8.0.19 o posterior) en lugar de ``VALUES(col)``,
+obsoleto desde 8.0.20.
+"""
+
+from mysql.connector import errorcode
+
+COLUMNAS_MATERIAL = (
+    "ID_MATERIAL", "TIPO", "PIEDRA", "FORMA", "COLOR", "DESCRIPCION", "TEXTURA",
+    "LARGO", "ANCHO", "COSTO_TIRA", "CANTIDAD", "COSTO_CUENTA", "ID_PROVEEDOR"
+)
+
+SQL_INSERT_MATERIAL = f"""
+INSERT INTO MATERIALES
+({", ".join(COLUMNAS_MATERIAL)})
+VALUES ({", ".join(["%s"] * len(COLUMNAS_MATERIAL))})
+"""
+
+SQL_UPSERT_MATERIAL = SQL_INSERT_MATERIAL + "AS nuevo ON DUPLICATE KEY UPDATE " + ", ".join(
+    f"{columna} = nuevo.{columna}" for columna in COLUMNAS_MATERIAL[1:]
+)
+
+# rowcount de MySQL para INSERT ... ON DUPLICATE KEY UPDATE
+_RESULTADO_UPSERT = {0: "sin_cambios", 1: "insertado", 2: "actualizado"}
+
+
+def es_id_duplicado(error):
+    """True si el error de MySQL es una violación de clave duplicada."""
+    return getattr(error, "errno", None) == errorcode.ER_DUP_ENTRY
+
+
+def registrar_material(conexion, datos, actualizar=False):
+    """
+    Registra un material (tupla en el orden de COLUMNAS_MATERIAL) con una
+    sola sentencia y hace commit.
+
+    Devuelve "insertado", "actualizado" o "sin_cambios". Sin ``actualizar``,
+    un ID repetido lanza el IntegrityError de MySQL (ver es_id_duplicado).
+    """
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(SQL_UPSERT_MATERIAL if actualizar else SQL_INSERT_MATERIAL, datos)
+        conexion.commit()
+        return _RESULTADO_UPSERT.get(cursor.rowcount, "insertado") if actualizar else "insertado"
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentación de las llamadas a la base de datos.
+
+selah.db devuelve las conexiones envueltas en ``ConexionInstrumentada``:
+cada préstamo del pool y cada consulta generan un evento con la etiqueta
+de la operación, los tiempos, las filas y la ejecución (rerun) que la
+causó. Los eventos se guardan en un buffer acotado del proceso para el
+panel de depuración y se escriben como JSON en el logger
+``selah.metricas`` (nivel DEBUG).
+
+La etiqueta y la ejecución viajan en ContextVars: los scripts llaman a
+``iniciar_rerun()`` al empezar cada ejecución y envuelven sus helpers con
+``etiqueta()``; las funciones cacheadas corren en el mismo hilo y heredan
+ambas. Sin etiqueta se usa el verbo y la tabla de la sentencia.
+"""
+
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+
+EVENTOS_MAXIMO = 2000
+LARGO_SQL = 200
+
+logger = logging.getLogger(__name__)
+
+_eventos = collections.deque(maxlen=EVENTOS_MAXIMO)
+_eventos_lock = threading.Lock()
+_contador_reruns = itertools.count(1)
+
+_rerun = contextvars.ContextVar("selah_rerun", default={})
+_etiqueta = contextvars.ContextVar("selah_etiqueta", default=None)
+
+
+def iniciar_rerun(sesion, origen):
+    """Marca el inicio de una ejecución de ``sesion``; devuelve su número."""
+    numero = next(_contador_reruns)
+    _rerun.set({"sesion": sesion, "rerun": numero, "origen": origen})
+    return numero
+
+
+@contextlib.contextmanager
+def etiqueta(nombre):
+    """Etiqueta las consultas hechas dentro del bloque (también sirve como decorador)."""
+    token = _etiqueta.set(nombre)
+    try:
+        yield
+    finally:
+        _etiqueta.reset(token)
+
+
+def propagar(funcion):
+    """
+    Envuelve ``funcion`` para que sus consultas queden en la ejecución y
+    con la etiqueta actuales aunque corra en otro hilo (los ContextVars no
+    pasan de un hilo a otro).
+    """
+    rerun, nombre = _rerun.get(), _etiqueta.get()
+
+    def envuelta(*args, **kwargs):
+        token = _rerun.set(rerun)
+        try:
+            with etiqueta(nombre):
+                return funcion(*args, **kwargs)
+        finally:
+            _rerun.reset(token)
+    return envuelta
+
+
+def _etiqueta_sql(sql):
+    """Etiqueta por defecto: verbo y tabla, p. ej. ``SELECT MATERIALES``."""
+    verbo = sql.split(None, 1)[0].upper() if sql.strip() else ""
+    tabla = re.search(r"\b(?:FROM|INTO|UPDATE)\s+`?(\w+)", sql, re.IGNORECASE)
+    return f"{verbo} {tabla.group(1)}" if tabla else verbo
+
+
+def registrar(evento):
+    """Agrega la ejecución actual al evento, lo guarda en el buffer y lo escribe en el log."""
+    evento = {"ts": round(time.time(), 3), **_rerun.get(), **evento}
+    with _eventos_lock:
+        _eventos.append(evento)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(evento, ensure_ascii=False, default=str))
+    return evento
+
+
+def eventos(sesion=None):
+    """Copia de los eventos del buffer, opcionalmente solo los de ``sesion``."""
+    with _eventos_lock:
+        copia = list(_eventos)
+    if sesion is None:
+        return copia
+    return [e for e in copia if e.get("sesion") == sesion]
+
+
+def resumen_reruns(lista_eventos):
+    """Totales por ejecución, en el orden en que ocurrieron."""
+    resumen = {}
+    for e in lista_eventos:
+        fila = resumen.setdefault(e.get("rerun"), {
+            "rerun": e.get("rerun"), "origen": e.get("origen"), "conexiones": 0,
+            "conexion_ms": 0.0, "consultas": 0, "ejecucion_ms": 0.0, "filas": 0,
+        })
+        if e["tipo"] == "conexion":
+            fila["conexiones"] += 1
+            fila["conexion_ms"] += e["conexion_ms"]
+        else:
+            fila["consultas"] += 1
+            fila["ejecucion_ms"] += e["ejecucion_ms"]
+            fila["filas"] += max(e.get("filas") or 0, 0)
+    for fila in resumen.values():
+        fila["conexion_ms"] = round(fila["conexion_ms"], 2)
+        fila["ejecucion_ms"] = round(fila["ejecucion_ms"], 2)
+    return list(resumen.values())
+
+
+def volcar(lista_eventos):
+    """Eventos como JSON Lines, para descargar o guardar."""
+    return "\n".join(json.dumps(e, ensure_ascii=False, default=str) for e in lista_eventos)
+
+
+def registrar_conexion(segundos):
+    """Evento de un préstamo del pool que tardó ``segundos``."""
+    return registrar({
+        "tipo": "conexion",
+        "etiqueta": _etiqueta.get() or "conexion",
+        "conexion_ms": round(segundos * 1000, 2),
+    })
+
+
+class CursorInstrumentado:
+    """
+    Envuelve un cursor: mide cada execute/executemany y cuenta las filas
+    leídas. El evento de una consulta se registra al ejecutar la siguiente
+    o al cerrar el cursor, cuando ya se conocen las filas.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pendiente = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        for fila in self._cursor:
+            self._contar(1)
+            yield fila
+
+    def _ejecutar(self, metodo, sql, *args):
+        self._cerrar_evento()
+        inicio = time.perf_counter()
+        error = None
+        try:
+            return metodo(sql, *args)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._pendiente = {
+                "tipo": "consulta",
+                "etiqueta": _etiqueta.get() or _etiqueta_sql(sql),
+                "sql": " ".join(sql.split())[:LARGO_SQL],
+                "ejecucion_ms": round((time.perf_counter() - inicio) * 1000, 2),
+                "filas": 0,
+                "error": error,
+            }
+
+    def execute(self, sql, params=(), *args, **kwargs):
+        return self._ejecutar(lambda s, p: self._cursor.execute(s, p, *args, **kwargs), sql, params)
+
+    def executemany(self, sql, filas, *args, **kwargs):
+        resultado = self._ejecutar(lambda s, f: self._cursor.executemany(s, f, *args, **kwargs), sql, filas)
+        self._contar(max(self._cursor.rowcount, 0))
+        return resultado
+
+    def _contar(self, n):
+        if self._pendiente is not None:
+            self._pendiente["filas"] += n
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        self._contar(fila is not None)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._contar(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._contar(len(filas))
+        return filas
+
+    def _cerrar_evento(self):
+        if self._pendiente is not None:
+            if not self._pendiente["filas"] and self._cursor.rowcount and self._cursor.rowcount > 0:
+                # INSERT/UPDATE sin fetch: filas afectadas
+                self._pendiente["filas"] = self._cursor.rowcount
+            registrar(self._pendiente)
+            self._pendiente = None
+
+    def close(self):
+        self._cerrar_evento()
+        return self._cursor.close()
+
+
+class ConexionInstrumentada:
+    """Conexión prestada cuyos cursores se instrumentan; el resto se delega."""
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self._cursores = []
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self, *args, **kwargs):
+        cursor = CursorInstrumentado(self._conexion.cursor(*args, **kwargs))
+        self._cursores.append(cursor)
+        return cursor
+
+    def close(self):
+        # Cursores que no se cerraron: sus eventos no se pierden
+        for cursor in self._cursores:
+            cursor._cerrar_evento()
+        self._cursores = []
+        return self._conexion.close()
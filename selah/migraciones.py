@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Migraciones versionadas del esquema MySQL.
+
+Cada archivo ``sql/migraciones/NNN_nombre.sql`` es una migración; se
+aplican en orden las que aún no están en SCHEMA_MIGRACIONES. El DDL de
+MySQL hace commit implícito, así que una migración no es una transacción:
+las sentencias se escriben para poder repetirse y los errores de "ya
+existe" (tabla, columna, índice, llave foránea) cuentan como sentencia ya
+aplicada. Así una base creada a mano antes de las migraciones termina con
+el mismo esquema e índices que una nueva.
+
+``verificar_indices()`` compara los índices que declaran las migraciones
+con los de la base en uso (information_schema), para detectar ambientes
+con planes de consulta distintos.
+
+    python -m selah.migraciones [--verificar] [--secretos .streamlit/secrets.toml]
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+import mysql.connector
+from mysql.connector import errorcode, errors
+
+from selah import db
+
+RUTA_MIGRACIONES = Path(__file__).resolve().parent.parent / "sql" / "migraciones"
+RUTA_SECRETOS_DEFAULT = Path(".streamlit") / "secrets.toml"
+CLAVES_CONEXION = ("DB_HOST", "DB_PORT", "DB_USER", "DB_PASSWORD", "DB_NAME")
+TABLA_MIGRACIONES = "SCHEMA_MIGRACIONES"
+BLOQUEO = "selah_migraciones"
+BLOQUEO_ESPERA_SEGUNDOS = 60
+
+# Errores de DDL que indican que la sentencia ya se había aplicado
+YA_APLICADA = {
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_FK_DUP_NAME,
+}
+
+_ARCHIVO = re.compile(r"^(\d+)_(\w+)\.sql$")
+_TABLA = re.compile(r"^\s*(?:CREATE\s+TABLE(?:\s+IF\s+NOT\s+EXISTS)?|ALTER\s+TABLE)\s+`?(\w+)", re.IGNORECASE)
+# KEY/INDEX con nombre; PRIMARY KEY (...) y FOREIGN KEY (...) no llevan nombre y no coinciden
+_INDICE = re.compile(r"\b(?:KEY|INDEX)\s+`?(\w+)`?\s*\(([^)]*)\)", re.IGNORECASE)
+
+_SQL_TABLA_MIGRACIONES = f"""
+CREATE TABLE IF NOT EXISTS {TABLA_MIGRACIONES} (
+    VERSION INT NOT NULL,
+    NOMBRE VARCHAR(100) NOT NULL,
+    APLICADA_EN TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (VERSION)
+) ENGINE=InnoDB
+"""
+
+
+def _sentencias(texto):
+    """Sentencias de un archivo .sql, sin comentarios ``--``; se separan por ``;`` al final de línea."""
+    lineas = [l for l in texto.splitlines() if not l.lstrip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lineas), flags=re.MULTILINE) if s.strip()]
+
+
+def leer_migraciones(ruta=RUTA_MIGRACIONES):
+    """Lista ordenada de (version, nombre, sentencias) de los archivos de ``ruta``."""
+    migraciones = []
+    for archivo in Path(ruta).glob("*.sql"):
+        partes = _ARCHIVO.match(archivo.name)
+        if partes is None:
+            raise ValueError(f"Nombre de migración inválido: {archivo.name} (se espera NNN_nombre.sql)")
+        migraciones.append((int(partes.group(1)), partes.group(2), _sentencias(archivo.read_text(encoding="utf-8"))))
+    migraciones.sort()
+    versiones = [m[0] for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError("Hay dos migraciones con la misma versión")
+    return migraciones
+
+
+def aplicadas(conexion):
+    """Versiones ya registradas en SCHEMA_MIGRACIONES; ninguna si la tabla aún no existe."""
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(f"SELECT VERSION FROM {TABLA_MIGRACIONES}")
+        return {fila[0] for fila in cursor.fetchall()}
+    except errors.ProgrammingError as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        return set()
+    finally:
+        cursor.close()
+
+
+def pendientes(conexion, migraciones=None):
+    """Migraciones de ``migraciones`` (por defecto las del repo) que faltan en la base."""
+    migraciones = leer_migraciones() if migraciones is None else migraciones
+    hechas = aplicadas(conexion)
+    return [m for m in migraciones if m[0] not in hechas]
+
+
+def _ejecutar(cursor, sentencia):
+    """Ejecuta una sentencia de DDL; devuelve False si ya estaba aplicada."""
+    try:
+        cursor.execute(sentencia)
+        return True
+    except errors.DatabaseError as e:
+        if e.errno in YA_APLICADA:
+            return False
+        raise
+
+
+def migrar(conexion, migraciones=None, informar=None):
+    """
+    Aplica en orden las migraciones pendientes y devuelve sus versiones.
+    Un bloqueo con nombre de MySQL evita que dos procesos migren a la vez.
+    ``informar(version, nombre, ejecutadas, ya_aplicadas)`` se llama al
+    terminar cada migración. Si una sentencia falla la migración no se
+    registra: al corregir la causa se vuelve a correr completa.
+    """
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (BLOQUEO, BLOQUEO_ESPERA_SEGUNDOS))
+        if cursor.fetchall()[0][0] != 1:
+            raise RuntimeError("Otro proceso está migrando la base; intenta de nuevo más tarde")
+        try:
+            cursor.execute(_SQL_TABLA_MIGRACIONES)
+            hechas = []
+            for version, nombre, sentencias in pendientes(conexion, migraciones):
+                resultados = [_ejecutar(cursor, sentencia) for sentencia in sentencias]
+                cursor.execute(
+                    f"INSERT INTO {TABLA_MIGRACIONES} (VERSION, NOMBRE) VALUES (%s, %s)", (version, nombre)
+                )
+                conexion.commit()
+                hechas.append(version)
+                if informar is not None:
+                    informar(version, nombre, resultados.count(True), resultados.count(False))
+            return hechas
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (BLOQUEO,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def indices_declarados(migraciones=None):
+    """{(tabla, indice): (columnas, ...)} de los KEY/INDEX con nombre de las migraciones."""
+    migraciones = leer_migraciones() if migraciones is None else migraciones
+    indices = {}
+    for _, _, sentencias in migraciones:
+        for sentencia in sentencias:
+            tabla = _TABLA.match(sentencia)
+            if tabla is None:
+                continue
+            for nombre, columnas in _INDICE.findall(sentencia):
+                indices[(tabla.group(1).upper(), nombre.upper())] = tuple(
+                    c.strip(" `").upper() for c in columnas.split(",")
+                )
+    return indices
+
+
+def verificar_indices(conexion, migraciones=None):
+    """
+    Índices declarados que faltan en la base en uso o tienen otras
+    columnas. Devuelve una lista de dicts (tabla, indice, esperado,
+    actual); vacía si el esquema coincide.
+    """
+    cursor = conexion.cursor()
+    try:
+        cursor.execute("""
+            SELECT UPPER(TABLE_NAME), UPPER(INDEX_NAME), UPPER(COLUMN_NAME)
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """)
+        actuales = {}
+        for tabla, indice, columna in cursor.fetchall():
+            actuales.setdefault((tabla, indice), []).append(columna)
+    finally:
+        cursor.close()
+
+    diferencias = []
+    for (tabla, indice), esperado in sorted(indices_declarados(migraciones).items()):
+        actual = tuple(actuales.get((tabla, indice), ()))
+        if actual != esperado:
+            diferencias.append({"tabla": tabla, "indice": indice, "esperado": esperado, "actual": actual or None})
+    return diferencias
+
+
+def leer_secretos(ruta=RUTA_SECRETOS_DEFAULT):
+    """Secretos de conexión (DB_HOST, DB_USER, ...) de un secrets.toml de Streamlit."""
+    try:
+        import tomllib
+        with open(ruta, "rb") as archivo:
+            return tomllib.load(archivo)
+    except ImportError:
+        import toml
+        return toml.load(ruta)
+
+
+def configuracion_secretos(ruta=RUTA_SECRETOS_DEFAULT):
+    """
+    Argumentos de mysql.connector a partir de un secrets.toml. Lanza
+    ValueError con un mensaje legible si falta alguna de CLAVES_CONEXION.
+    """
+    secretos = leer_secretos(ruta)
+    faltan = [clave for clave in CLAVES_CONEXION if clave not in secretos]
+    if faltan:
+        raise ValueError(f"Faltan en {ruta}: {', '.join(faltan)}")
+    return db.configuracion_db(secretos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema MySQL de SELAH.")
+    parser.add_argument("--secretos", default=str(RUTA_SECRETOS_DEFAULT),
+                        help="secrets.toml con DB_HOST, DB_PORT, DB_USER, DB_PASSWORD y DB_NAME.")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Solo reportar migraciones pendientes e índices faltantes, sin cambiar nada.")
+    args = parser.parse_args(argv)
+
+    try:
+        conexion = mysql.connector.connect(**configuracion_secretos(args.secretos))
+    except (errors.Error, OSError, ValueError) as e:
+        print(f"No se pudo conectar: {e}", file=sys.stderr)
+        return 2
+    try:
+        if args.verificar:
+            faltan = pendientes(conexion)
+            for version, nombre, _ in faltan:
+                print(f"Pendiente: {version:03d}_{nombre}")
+            diferencias = verificar_indices(conexion)
+            for d in diferencias:
+                estado = "falta" if d["actual"] is None else f"tiene ({', '.join(d['actual'])})"
+                print(f"Índice {d['tabla']}.{d['indice']} ({', '.join(d['esperado'])}): {estado}")
+            if not faltan and not diferencias:
+                print("El esquema está al día.")
+            return 1 if faltan or diferencias else 0
+
+        hechas = migrar(conexion, informar=lambda version, nombre, ejecutadas, ya: print(
+            f"{version:03d}_{nombre}: {ejecutadas} sentencias aplicadas, {ya} ya estaban"
+        ))
+        if not hechas:
+            print("No hay migraciones pendientes.")
+        return 0
+    except (errors.Error, RuntimeError) as e:
+        print(f"Error de base de datos: {e}", file=sys.stderr)
+        return 2
+    finally:
+        conexion.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Optimizador de recetas por clasificación.
+
+Dada una clasificación objetivo (C, B o A) y un conjunto de materiales
+candidatos, busca combinaciones de materiales y cantidades cuyo precio real
+caiga en esa clasificación y que maximicen el margen
+``PRECIO_CLASIFICADO - PRECIO``.
+
+La búsqueda enumera combinaciones de hasta ``max_materiales`` materiales
+distintos y todas las formas de repartir entre ellos un total de cuentas
+en [min_cuentas, max_cuentas]. Cada lote de combinaciones se evalúa de una
+vez con precios.precios_lote, en bloques de a lo más FILAS_LOTE
+(combinación, reparto) para acotar la memoria. Se descartan sin evaluar
+las combinaciones que no pueden caer en la clasificación, y la búsqueda se
+corta al agotar ``tiempo_limite`` segundos (también a mitad de un lote o
+de armar los repartos) devolviendo lo mejor encontrado.
+"""
+
+import heapq
+import itertools
+import time
+
+import numpy as np
+
+from selah import precios
+
+# (combinación, reparto) que se precian de una vez: ~0.5 MB por arreglo
+FILAS_LOTE = 1 << 16
+# Tope de cuentas para la interfaz; con 4 materiales son ~490 mil repartos
+MAX_CUENTAS = 60
+
+
+def _rango_costo_cuentas(clasificacion, tipo_hilo):
+    """
+    Rango (inferior exclusivo, superior inclusivo) del costo de cuentas
+    que produce la clasificación, invirtiendo la fórmula de precios. Se
+    ensancha un poco; la clasificación exacta se verifica al evaluar.
+    """
+    niveles = list(precios.CLASIFICACIONES)
+    if clasificacion not in niveles:
+        raise ValueError(f"Clasificación no válida: {clasificacion}")
+    nivel = niveles.index(clasificacion)
+    limites = [-np.inf] + list(precios.LIMITES_CLASIFICACION) + [np.inf]
+    factor = (1 + precios.TASA_MARKETING) * precios.MARGEN
+    fijos = precios.costo_hilo(tipo_hilo) + precios.COSTO_MANO + precios.COSTO_EMPAQUE
+    return limites[nivel] / factor - fijos - 1e-6, limites[nivel + 1] / factor - fijos + 1e-6
+
+
+def _repartos(k, min_cuentas, max_cuentas, limite_tiempo=None):
+    """
+    Matriz (M, k) con todas las cantidades >= 1 por material cuya suma está
+    en el rango. None si se llega a ``limite_tiempo`` antes de terminar.
+    """
+    bloques = [np.empty((0, k))]
+    for total in range(max(min_cuentas, k), max_cuentas + 1):
+        if limite_tiempo is not None and time.monotonic() >= limite_tiempo:
+            return None
+        cortes = list(itertools.combinations(range(1, total), k - 1))
+        bordes = np.zeros((len(cortes), k + 1))
+        bordes[:, 1:k] = np.array(cortes).reshape(len(cortes), k - 1)
+        bordes[:, k] = total
+        bloques.append(np.diff(bordes, axis=1))
+    return np.vstack(bloques)
+
+
+def optimizar(costos, clasificacion, tipo_hilo=" ", min_cuentas=15, max_cuentas=25,
+              min_materiales=1, max_materiales=3, top=10, tiempo_limite=2.0):
+    """
+    Mejores recetas para ``clasificacion``.
+
+    - costos: {ID_MATERIAL: COSTO_CUENTA} de los materiales candidatos.
+    Devuelve hasta ``top`` dicts con RECETA [(ID_MATERIAL, cantidad), ...],
+    COSTO, PRECIO, CLASIFICACION, PRECIO_CLASIFICADO y MARGEN, de mayor a
+    menor margen.
+    """
+    limite_tiempo = time.monotonic() + tiempo_limite
+    cc_min, cc_max = _rango_costo_cuentas(clasificacion, tipo_hilo)
+    precio_objetivo = float(precios.PRECIOS_CLASIFICADOS[list(precios.CLASIFICACIONES).index(clasificacion)])
+    ids = sorted(costos, key=lambda i: costos[i])
+    valores = np.array([costos[i] for i in ids], dtype=float)
+    mejores = []  # heap de (margen, desempate, resultado)
+    contador = itertools.count()
+
+    for k in range(max(1, min_materiales), max_materiales + 1):
+        if k > len(ids):
+            break
+        repartos = _repartos(k, min_cuentas, max_cuentas, limite_tiempo)
+        if repartos is None:
+            return _ordenar(mejores)
+        if not len(repartos):
+            continue
+        tamano_lote = max(1, FILAS_LOTE // len(repartos))
+        combinaciones = itertools.combinations(range(len(ids)), k)
+        while True:
+            if time.monotonic() >= limite_tiempo:
+                return _ordenar(mejores)
+            lote = np.array(list(itertools.islice(combinaciones, tamano_lote)), dtype=np.intp).reshape(-1, k)
+            if not len(lote):
+                break
+            # Las combinaciones salen en orden lexicográfico sobre los
+            # materiales ordenados por costo: el primer material de cada una
+            # es su cuenta más barata y nunca baja.
+            ultimo_primero = lote[-1, 0]
+            costos_lote = valores[lote]
+            # Poda: con la cuenta más barata y el mínimo de cuentas ya se pasa
+            # del rango, o con la más cara y el máximo no se llega.
+            posibles = (costos_lote[:, 0] * min_cuentas <= cc_max) & (costos_lote[:, -1] * max_cuentas > cc_min)
+            lote, costos_lote = lote[posibles], costos_lote[posibles]
+            if len(lote) and not _evaluar(lote, costos_lote, repartos, ids, clasificacion, tipo_hilo,
+                                          top, mejores, contador, limite_tiempo):
+                return _ordenar(mejores)
+            costo_minimo = valores[ultimo_primero] * min_cuentas
+            if costo_minimo > cc_max:
+                break
+            # Cota: las combinaciones que faltan cuestan al menos costo_minimo,
+            # así que su margen no supera el de ese costo.
+            cota = _cota_margen(max(costo_minimo, cc_min), precio_objetivo, tipo_hilo)
+            if len(mejores) == top and cota <= mejores[0][0]:
+                break
+    return _ordenar(mejores)
+
+
+def _cota_margen(costo_cuentas, precio_objetivo, tipo_hilo):
+    """
+    Margen máximo de una receta que cuesta al menos ``costo_cuentas``:
+    precio de la clasificación objetivo menos el precio real. No se
+    reclasifica, porque cc_min queda justo debajo del límite del nivel y
+    precio_pulsera lo pondría en el nivel anterior.
+    """
+    return precio_objetivo - float(precios.precios_lote([costo_cuentas], tipo_hilo)["PRECIO"][0])
+
+
+def _evaluar(lote, costos_lote, repartos, ids, clasificacion, tipo_hilo, top, mejores, contador, limite_tiempo):
+    """
+    Precia todas las (combinación, reparto) del lote, en bloques de repartos
+    de a lo más FILAS_LOTE filas, y actualiza el heap de mejores. Devuelve
+    False si se llegó a ``limite_tiempo`` antes de terminar.
+    """
+    paso = max(1, FILAS_LOTE // len(lote))
+    for inicio in range(0, len(repartos), paso):
+        if time.monotonic() >= limite_tiempo:
+            return False
+        _evaluar_bloque(lote, costos_lote, repartos[inicio:inicio + paso], ids, clasificacion, tipo_hilo,
+                        top, mejores, contador)
+    return True
+
+
+def _evaluar_bloque(lote, costos_lote, repartos, ids, clasificacion, tipo_hilo, top, mejores, contador):
+    costo_cuentas = costos_lote @ repartos.T  # (B, M)
+    lote_precios = precios.precios_lote(costo_cuentas.ravel(), tipo_hilo)
+    validos = (lote_precios["CLASIFICACION"] == clasificacion)
+    if not validos.any():
+        return
+    margen = np.where(validos, lote_precios["PRECIO_CLASIFICADO"] - lote_precios["PRECIO"], -np.inf)
+    for plano in np.argsort(-margen)[:top]:
+        if not np.isfinite(margen[plano]):
+            break
+        if len(mejores) == top and margen[plano] <= mejores[0][0]:
+            break
+        b, m = divmod(int(plano), len(repartos))
+        resultado = {
+            "RECETA": [(ids[i], int(q)) for i, q in zip(lote[b], repartos[m])],
+            "COSTO": float(lote_precios["COSTO"][plano]),
+            "PRECIO": float(lote_precios["PRECIO"][plano]),
+            "CLASIFICACION": str(lote_precios["CLASIFICACION"][plano]),
+            "PRECIO_CLASIFICADO": float(lote_precios["PRECIO_CLASIFICADO"][plano]),
+            "MARGEN": float(margen[plano]),
+        }
+        entrada = (resultado["MARGEN"], next(contador), resultado)
+        if len(mejores) < top:
+            heapq.heappush(mejores, entrada)
+        else:
+            heapq.heapreplace(mejores, entrada)
+
+
+def _ordenar(mejores):
+    return [resultado for _, _, resultado in sorted(mejores, key=lambda e: (-e[0], e[1]))]
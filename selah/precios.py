@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de precios de pulseras.
+
+Reglas (las mismas que usaba la calculadora):
+- costos fijos = hilo (Nylon 2.4 / Negro 4.0) + mano de obra 40 + empaque 10
+- marketing = 15% de (cuentas + costos fijos)
+- precio real = (cuentas + costos fijos + marketing) * 1.30
+- clasificación: C si precio real <= 160, B si <= 200, A en otro caso;
+  se venden a 160 / 200 / 250.
+
+Todo se calcula sobre arreglos de NumPy para poder preciar N recetas a la
+vez; ``precio_pulsera`` es el atajo escalar que usa la interfaz.
+"""
+
+import numpy as np
+
+COSTO_HILO = {"Nylon": 2.4, "Negro": 4.0}
+COSTO_MANO = 40.0
+COSTO_EMPAQUE = 10.0
+TASA_MARKETING = 0.15
+MARGEN = 1.30
+
+# Límite superior del precio real de cada nivel (el último no tiene límite)
+# y precio al que se vende.
+LIMITES_CLASIFICACION = np.array([160.0, 200.0])
+CLASIFICACIONES = np.array(["C", "B", "A"])
+PRECIOS_CLASIFICADOS = np.array([160.0, 200.0, 250.0])
+
+
+def costo_hilo(tipos_hilo):
+    """Costo del hilo para uno o varios tipos; los desconocidos (" ") cuestan 0."""
+    if isinstance(tipos_hilo, str):
+        return COSTO_HILO.get(tipos_hilo, 0.0)
+    return np.array([COSTO_HILO.get(t, 0.0) for t in tipos_hilo], dtype=float)
+
+
+def costo_cuentas_recetas(recetas, tabla_costos):
+    """
+    Costo de cuentas de cada receta. ``recetas`` es una secuencia de listas
+    de (ID_MATERIAL, cantidad) y ``tabla_costos`` un mapa ID -> COSTO_CUENTA;
+    los IDs que no estén en la tabla cuestan 0.
+    """
+    filas, importes = [], []
+    for i, receta in enumerate(recetas):
+        for id_mat, cantidad in receta:
+            if id_mat and id_mat != " ":
+                filas.append(i)
+                importes.append(cantidad * tabla_costos.get(id_mat, 0.0))
+    return np.bincount(
+        np.asarray(filas, dtype=np.intp),
+        weights=np.asarray(importes, dtype=float),
+        minlength=len(recetas)
+    )
+
+
+def precios_lote(costo_cuentas, tipos_hilo):
+    """
+    Precia N pulseras a la vez.
+
+    - costo_cuentas: arreglo (N,) con el costo de las cuentas de cada pulsera.
+    - tipos_hilo: un tipo de hilo para todas o una secuencia de N tipos.
+
+    Devuelve un dict de arreglos con las columnas de PULSERAS: COSTO,
+    PRECIO, CLASIFICACION y PRECIO_CLASIFICADO.
+    """
+    costo_cuentas = np.asarray(costo_cuentas, dtype=float)
+    costos_fijos = costo_hilo(tipos_hilo) + COSTO_MANO + COSTO_EMPAQUE
+    costo_total = costo_cuentas + costos_fijos
+    marketing = TASA_MARKETING * costo_total
+    precio_real = (costo_total + marketing) * MARGEN
+    nivel = np.searchsorted(LIMITES_CLASIFICACION, precio_real, side="left")
+    return {
+        "COSTO": costo_total,
+        "PRECIO": precio_real,
+        "CLASIFICACION": CLASIFICACIONES[nivel],
+        "PRECIO_CLASIFICADO": PRECIOS_CLASIFICADOS[nivel],
+    }
+
+
+def precio_pulsera(costo_cuentas, tipo_hilo):
+    """Precio de una sola pulsera, con tipos de Python (listos para session_state o SQL)."""
+    lote = precios_lote([costo_cuentas], tipo_hilo)
+    return {columna: valores[0].item() for columna, valores in lote.items()}
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Recetas (bill of materials) de las pulseras y recálculo incremental de precios.
+
+Al registrar una pulsera se guarda, en la misma transacción, qué materiales
+y cantidades se usaron (tabla PULSERAS_RECETA, ver
+sql/migraciones/002_recetas_pulsera.sql) y el tipo de hilo. Cuando cambia el COSTO_CUENTA de un material, solo se
+vuelven a preciar las pulseras cuya receta lo incluye.
+"""
+
+from selah import consultas, precios
+
+SQL_INSERT_PULSERA = """
+INSERT INTO PULSERAS (ID_PRODUCTO, DESCRIPCION, COSTO, PRECIO, CLASIFICACION, PRECIO_CLASIFICADO, TIPO_HILO)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+SQL_INSERT_RECETA = "INSERT INTO PULSERAS_RECETA (ID_PRODUCTO, ID_MATERIAL, CANTIDAD) VALUES (%s, %s, %s)"
+
+
+def armar_receta(materiales, cantidades):
+    """
+    Receta [(ID_MATERIAL, cantidad), ...] a partir de las filas de la
+    calculadora: se descartan las vacías y se suman los materiales repetidos.
+    """
+    receta = {}
+    for id_mat, cantidad in zip(materiales, cantidades):
+        if id_mat and id_mat != " " and cantidad:
+            receta[id_mat] = receta.get(id_mat, 0) + int(cantidad)
+    return list(receta.items())
+
+
+def registrar_pulsera(conexion, id_producto, descripcion, precio, receta, tipo_hilo):
+    """
+    Inserta la pulsera y su receta en una sola transacción.
+    ``precio`` es el dict devuelto por precios.precio_pulsera.
+    """
+    cursor = conexion.cursor()
+    try:
+        cursor.execute(
+            SQL_INSERT_PULSERA,
+            (id_producto, descripcion, precio["COSTO"], precio["PRECIO"],
+             precio["CLASIFICACION"], precio["PRECIO_CLASIFICADO"], tipo_hilo)
+        )
+        if receta:
+            cursor.executemany(
+                SQL_INSERT_RECETA,
+                [(id_producto, id_mat, cantidad) for id_mat, cantidad in receta]
+            )
+        conexion.commit()
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def recalcular_pulseras(conexion, ids_material=None):
+    """
+    Vuelve a preciar las pulseras que usan alguno de ``ids_material`` (todas
+    las que tienen receta si es None) y las actualiza con un solo
+    executemany. Devuelve cuántas pulseras se actualizaron.
+    """
+    if ids_material is None:
+        filtro, params = "", ()
+    else:
+        ids = consultas.ids_validos(ids_material)
+        if not ids:
+            return 0
+        marcadores = ", ".join(["%s"] * len(ids))
+        filtro = f"""
+            WHERE R.ID_PRODUCTO IN (
+                SELECT ID_PRODUCTO FROM PULSERAS_RECETA WHERE ID_MATERIAL IN ({marcadores})
+            )"""
+        params = tuple(ids)
+    cursor = conexion.cursor()
+    try:
+        # Recetas completas de las pulseras afectadas (índice inverso por ID_MATERIAL)
+        cursor.execute(
+            f"""
+            SELECT R.ID_PRODUCTO, P.TIPO_HILO, R.ID_MATERIAL, R.CANTIDAD, M.COSTO_CUENTA
+            FROM PULSERAS_RECETA R
+            JOIN PULSERAS P ON P.ID_PRODUCTO = R.ID_PRODUCTO
+            LEFT JOIN MATERIALES M ON M.ID_MATERIAL = R.ID_MATERIAL
+            {filtro}
+            ORDER BY R.ID_PRODUCTO
+            """,
+            params
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            return 0
+
+        productos, hilos, recetas, tabla_costos = [], [], [], {}
+        for id_producto, tipo_hilo, id_mat, cantidad, costo in filas:
+            if not productos or productos[-1] != id_producto:
+                productos.append(id_producto)
+                hilos.append(tipo_hilo or " ")
+                recetas.append([])
+            recetas[-1].append((id_mat, cantidad))
+            tabla_costos[id_mat] = float(costo) if costo is not None else 0.0
+
+        lote = precios.precios_lote(precios.costo_cuentas_recetas(recetas, tabla_costos), hilos)
+        cursor.executemany(
+            """
+            UPDATE PULSERAS
+            SET COSTO = %s, PRECIO = %s, CLASIFICACION = %s, PRECIO_CLASIFICADO = %s
+            WHERE ID_PRODUCTO = %s
+            """,
+            [
+                (float(lote["COSTO"][i]), float(lote["PRECIO"][i]), str(lote["CLASIFICACION"][i]),
+                 float(lote["PRECIO_CLASIFICADO"][i]), id_producto)
+                for i, id_producto in enumerate(productos)
+            ]
+        )
+        conexion.commit()
+        return len(productos)
+    except Exception:
+        conexion.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,734 @@
+# -*- coding: utf-8 -*-
+"""
+Interfaz de Streamlit compartida por calculadora_stream.py y
+calculadora_prueba.py: conexión y avisos, lecturas cacheadas, editor de
+recetas, optimizador, catálogos paginados, exportación, importación
+masiva y panel de depuración. Los scripts solo definen el formulario de
+registro de materiales y los botones de limpiar.
+"""
+
+import tempfile
+import uuid
+
+import pandas as pd
+import streamlit as st
+from mysql.connector import Error
+
+from selah import (cache, consultas, db, exportacion, importacion, metricas, migraciones, optimizador, precios,
+                   recetas)
+
+FILAS_RECETA_INICIALES = 5
+
+
+# =====================================
+# Conexión a base de datos
+# =====================================
+def conectar_db():
+    """Toma una conexión del pool compartido del proceso; close() la devuelve al pool."""
+    try:
+        conexion = db.obtener_conexion(st.secrets)
+        st.session_state["db_ok"] = True
+        return conexion
+    except db.CircuitoAbierto:
+        # Sin st.error: cada pestaña muestra un solo aviso (mostrar_estado_conexion)
+        st.session_state["db_ok"] = False
+        return None
+    except Error as e:
+        st.session_state["db_ok"] = False
+        st.error(f"⚠️ Error de conexión con la base de datos: {e}")
+        return None
+
+
+def iniciar_rerun(origen):
+    """Abre una ejecución en la instrumentación de consultas (ver selah.metricas)."""
+    if "id_sesion" not in st.session_state:
+        st.session_state["id_sesion"] = uuid.uuid4().hex[:8]
+    metricas.iniciar_rerun(st.session_state["id_sesion"], origen)
+
+
+def mostrar_estado_conexion():
+    """Aviso mientras el circuito de la base está abierto (ver selah.db)."""
+    restante = db.segundos_para_reintento()
+    if restante is not None:
+        cuando = f"en {restante:.0f} s" if restante >= 1 else "con la próxima acción"
+        st.warning(f"⚠️ La base de datos no responde: se muestran los últimos datos cargados "
+                   f"y los registros no se guardarán. Se reintentará {cuando}.")
+
+
+# =====================================
+# Funciones auxiliares
+# =====================================
+@metricas.etiqueta("obtener_costos_cuenta")
+def obtener_costos_cuenta(ids_material, tabla_costos=None):
+    """
+    Costo por cuenta de varios materiales a la vez: {ID_MATERIAL: COSTO_CUENTA}.
+    Si se pasa una tabla de costos ya cargada en memoria se lee de ella;
+    si no, se resuelve con una sola consulta IN (...).
+    """
+    ids = [i for i in ids_material if i and i != " "]
+    if not ids:
+        return {}
+    if tabla_costos is not None:
+        return {i: float(tabla_costos.get(i, 0.0)) for i in ids}
+    conexion = conectar_db()
+    if conexion is None:
+        return {}
+    try:
+        return consultas.costos_cuenta(conexion, ids)
+    except Error:
+        return {}
+    finally:
+        db.liberar_conexion(conexion)
+
+
+@metricas.etiqueta("obtener_indice_materiales")
+def obtener_indice_materiales():
+    """Índice de búsqueda de materiales (ver selah.busqueda); el último cargado o None si la base no responde."""
+    try:
+        return cache.indice_materiales()
+    except db.CircuitoAbierto:
+        return cache.respaldo("indice_materiales")
+    except Error as e:
+        st.session_state["db_ok"] = False
+        st.error(f"Error al obtener catálogo de material: {e}")
+        return cache.respaldo("indice_materiales")
+
+
+@metricas.etiqueta("obtener_tabla_costos")
+def obtener_tabla_costos(carga=cache.tabla_costos):
+    """
+    Tabla ID -> COSTO_CUENTA cacheada (ver selah.cache); si la base no
+    responde, la última cargada, o None si nunca se pudo cargar.
+    ``carga`` puede ser el ``result`` de una carga lanzada con cache.lanzar.
+    """
+    try:
+        return carga()
+    except Error:
+        return cache.respaldo("tabla_costos")
+
+
+@metricas.etiqueta("obtener_proveedores")
+def obtener_proveedores():
+    """(proveedores, índice nombre -> ID), cacheados entre sesiones (ver selah.cache)."""
+    try:
+        return cache.proveedores()
+    except db.CircuitoAbierto:
+        return cache.respaldo("proveedores", ([], {}))
+    except Error as e:
+        st.session_state["db_ok"] = False
+        st.error(f"Error al obtener proveedores: {e}")
+        return cache.respaldo("proveedores", ([], {}))
+
+
+@metricas.etiqueta("obtener_catalogo_materiales")
+def obtener_catalogo_materiales(filtros=None, despues_de=None, tamano=consultas.TAMANO_PAGINA_DEFAULT):
+    """
+    Una página del catálogo de materiales (df, hay_siguiente), filtrada en
+    SQL y compartida entre sesiones (ver selah.cache): no se modifica.
+    """
+    try:
+        return cache.pagina_materiales(filtros or {}, despues_de, tamano)
+    except db.CircuitoAbierto:
+        return pd.DataFrame(), False
+    except Error as e:
+        st.session_state["db_ok"] = False
+        st.error(f"Error al obtener catálogo: {e}")
+        return pd.DataFrame(), False
+
+
+@metricas.etiqueta("obtener_catalogo_pulseras")
+def obtener_catalogo_pulseras(filtros=None, orden="ID_PRODUCTO", descendente=False,
+                              despues_de=None, tamano=consultas.TAMANO_PAGINA_DEFAULT):
+    """
+    Una página del catálogo de pulseras (df, hay_siguiente), ordenada y
+    filtrada en SQL y compartida entre sesiones (ver selah.cache).
+    """
+    try:
+        return cache.pagina_pulseras(filtros or {}, orden, descendente, despues_de, tamano)
+    except db.CircuitoAbierto:
+        return pd.DataFrame(), False
+    except Error as e:
+        st.session_state["db_ok"] = False
+        st.error(f"Error al obtener catálogo de pulseras: {e}")
+        return pd.DataFrame(), False
+
+
+@metricas.etiqueta("obtener_conteo_pulseras")
+def obtener_conteo_pulseras(filtros=None):
+    """
+    Total aproximado de pulseras para los filtros, o None si no se pudo
+    estimar. No dibuja nada, así que puede correr con cache.lanzar.
+    """
+    try:
+        conexion = cache.conexion_lectura("PULSERAS")
+    except Error:
+        return None
+    try:
+        return consultas.conteo_aproximado_pulseras(conexion, filtros)
+    except Error:
+        return None
+    finally:
+        db.liberar_conexion(conexion)
+
+
+def agregar_fila_receta():
+    fila = st.session_state["siguiente_fila_receta"]
+    st.session_state["siguiente_fila_receta"] = fila + 1
+    st.session_state["filas_receta"] = st.session_state["filas_receta"] + [fila]
+    st.session_state[f"id_{fila}"] = " "
+    st.session_state[f"cant_{fila}"] = 0
+
+
+def quitar_fila_receta(fila):
+    st.session_state["filas_receta"] = [f for f in st.session_state["filas_receta"] if f != fila]
+    for clave in (f"id_{fila}", f"cant_{fila}", f"buscar_{fila}"):
+        st.session_state.pop(clave, None)
+
+
+def mostrar_editor_receta(indice):
+    """
+    Filas de la receta: cada una busca en el índice del servidor y su
+    selectbox solo recibe los mejores resultados, no el catálogo completo.
+    Devuelve (material_seleccionados, cantidades).
+    """
+    material_seleccionados, cantidades = [], []
+    mapa = indice["mapa"] if indice else {}
+
+    for n, fila in enumerate(st.session_state["filas_receta"], start=1):
+        col_buscar, col_mat, col_cant, col_quitar = st.columns([2, 3, 1, 0.5], vertical_alignment="bottom")
+        with col_buscar:
+            consulta = st.text_input(f"Buscar {n}", key=f"buscar_{fila}", placeholder="ID, tipo, piedra, forma...")
+        with col_mat:
+            seleccion = st.session_state.get(f"id_{fila}", " ")
+            opciones = cache.buscar_materiales(indice, consulta) if indice else []
+            if seleccion != " " and seleccion not in opciones:
+                opciones = [seleccion] + opciones
+            mat_desc = st.selectbox(f"Material {n}", options=[" "] + opciones, key=f"id_{fila}")
+        with col_cant:
+            cant = st.number_input(f"Cantidad {n}", min_value=0, step=1, key=f"cant_{fila}")
+        with col_quitar:
+            st.button("✖", key=f"quitar_{fila}", on_click=quitar_fila_receta, args=(fila,), help="Quitar material")
+        material_seleccionados.append(mapa.get(mat_desc, " "))
+        cantidades.append(cant)
+
+    st.button("➕ Agregar material", on_click=agregar_fila_receta)
+    return material_seleccionados, cantidades
+
+
+def mostrar_vista_previa(material_seleccionados, cantidades, tipo_hilo, tabla_costos):
+    """Precio de la selección actual calculado con la tabla de costos en memoria (sin consultas)."""
+    receta = list(zip(material_seleccionados, cantidades))
+    costo_cuentas = precios.costo_cuentas_recetas([receta], tabla_costos)[0]
+    vista = precios.precio_pulsera(costo_cuentas, tipo_hilo)
+
+    st.markdown("### Vista previa")
+    colv1, colv2, colv3 = st.columns(3)
+    colv1.metric("Costo total", f"${vista['COSTO']:.2f}")
+    colv2.metric("Precio real", f"${vista['PRECIO']:.2f}")
+    colv3.metric("Clasificación", vista['CLASIFICACION'], f"${vista['PRECIO_CLASIFICADO']:.2f}", delta_color="off")
+
+
+def mostrar_optimizador(indice, tabla_costos, tipo_hilo):
+    """Busca recetas que caigan en una clasificación con el mayor margen posible."""
+    with st.expander("🎯 Optimizador por clasificación"):
+        colo1, colo2, colo3 = st.columns(3)
+        clasificacion = colo1.selectbox("Clasificación objetivo", precios.CLASIFICACIONES, key='opt_clasificacion')
+        min_cuentas = colo2.number_input("Mínimo de cuentas", min_value=1, max_value=optimizador.MAX_CUENTAS,
+                                         value=15, step=1, key='opt_min_cuentas')
+        max_cuentas = colo3.number_input("Máximo de cuentas", min_value=1, max_value=optimizador.MAX_CUENTAS,
+                                         value=25, step=1, key='opt_max_cuentas')
+        colo4, colo5 = st.columns(2)
+        max_materiales = colo4.number_input("Máximo de materiales", min_value=1, max_value=4, value=3, step=1, key='opt_max_materiales')
+        tiempo_limite = colo5.number_input("Tiempo máximo (s)", min_value=0.5, max_value=30.0, value=2.0, step=0.5, key='opt_tiempo')
+        filtro = st.text_input("Limitar a materiales que coincidan con", key='opt_filtro',
+                               help="Vacío: se consideran todos los materiales con costo.")
+
+        if st.button("Buscar recetas", key='opt_buscar'):
+            if min_cuentas > max_cuentas:
+                st.error("El mínimo de cuentas no puede ser mayor que el máximo")
+                return
+            if filtro.strip():
+                if not indice:
+                    st.warning("El índice de materiales no está disponible: deja el filtro vacío para usar todos")
+                    return
+                candidatos = [indice["mapa"][opcion] for opcion in cache.buscar_materiales(indice, filtro, k=500)]
+            else:
+                candidatos = list(tabla_costos)
+            # Sin costo registrado no hay precio que optimizar
+            costos = {id_mat: tabla_costos[id_mat] for id_mat in candidatos if tabla_costos.get(id_mat, 0.0) > 0}
+            resultados = optimizador.optimizar(
+                costos, clasificacion, tipo_hilo,
+                min_cuentas=int(min_cuentas), max_cuentas=int(max_cuentas),
+                max_materiales=int(max_materiales), tiempo_limite=float(tiempo_limite)
+            )
+            if not resultados:
+                st.info("No se encontraron recetas para esa clasificación")
+                return
+            st.dataframe(pd.DataFrame([
+                {
+                    "Receta": ", ".join(f"{cantidad} x {id_mat}" for id_mat, cantidad in r["RECETA"]),
+                    "Costo": round(r["COSTO"], 2),
+                    "Precio real": round(r["PRECIO"], 2),
+                    "Clasificación": r["CLASIFICACION"],
+                    "Precio clasificado": r["PRECIO_CLASIFICADO"],
+                    "Margen": round(r["MARGEN"], 2),
+                }
+                for r in resultados
+            ]), width="stretch", hide_index=True)
+
+
+def mostrar_catalogo_paginado(prefijo, clave, cargar_pagina, cursor_de, mensaje_vacio, cargar_total=None):
+    """
+    Muestra una página de catálogo con navegación Anterior/Siguiente por keyset.
+
+    - clave: identifica filtros, orden y tamaño; si cambia se vuelve a la página 1.
+    - cargar_pagina(despues_de) -> (df, hay_siguiente)
+    - cursor_de(df): cursor keyset de la última fila de la página.
+    - cargar_total(): total (aproximado) de registros; se consulta una vez por clave,
+      en otro hilo (ver cache.lanzar), así que no debe dibujar elementos.
+    La página se guarda en session_state y solo se vuelve a consultar al navegar.
+    """
+    estado = st.session_state.get(f"{prefijo}_estado")
+    total = None
+    if estado is None or estado["clave"] != clave:
+        estado = {"clave": clave, "cursores": [None], "pagina": None, "total": None}
+        st.session_state[f"{prefijo}_estado"] = estado
+        # El total no depende de la página: se cuenta en otro hilo mientras tanto
+        total = cache.lanzar(cargar_total) if cargar_total else None
+    if estado["pagina"] is None:
+        estado["pagina"] = cargar_pagina(estado["cursores"][-1])
+    if total is not None:
+        estado["total"] = total.result()
+    df, hay_siguiente = estado["pagina"]
+
+    if df.empty:
+        st.warning(mensaje_vacio)
+        return
+    st.dataframe(df, width="stretch", hide_index=True)
+
+    # La navegación va en callbacks: corren antes del rerun del fragmento,
+    # que ya carga la nueva página.
+    col_ant, col_info, col_sig = st.columns([1, 2, 1])
+    with col_ant:
+        st.button("⬅️ Anterior", key=f"{prefijo}_anterior", disabled=len(estado["cursores"]) == 1,
+                  on_click=_ir_a_pagina, args=(estado, None))
+    with col_info:
+        total = f" · ≈ {estado['total']} registros" if estado["total"] is not None else ""
+        st.caption(f"Página {len(estado['cursores'])}{total}")
+    with col_sig:
+        st.button("Siguiente ➡️", key=f"{prefijo}_siguiente", disabled=not hay_siguiente,
+                  on_click=_ir_a_pagina, args=(estado, cursor_de(df)))
+
+
+def _ir_a_pagina(estado, cursor):
+    """Callback de navegación: con cursor avanza a la página siguiente, sin cursor retrocede."""
+    if cursor is None:
+        estado["cursores"].pop()
+    else:
+        estado["cursores"].append(cursor)
+    estado["pagina"] = None
+
+
+def _cursor_pulseras(df, orden):
+    """Cursor (valor de ``orden``, ID_PRODUCTO) de la última fila; un NULL (NaN) va como None."""
+    valor = df[orden].iloc[-1]
+    return None if pd.isna(valor) else valor, df["ID_PRODUCTO"].iloc[-1]
+
+
+def mostrar_exportacion(prefijo, tabla, exportar_bloques):
+    """
+    Descarga del catálogo completo con los filtros actuales, en CSV o
+    Parquet. El archivo se genera al hacer clic, en otro hilo y por
+    bloques (ver selah.exportacion) en un archivo temporal: dibujar el
+    botón no consulta la base.
+    - exportar_bloques(conexion): iterador de DataFrames (consultas.exportar_*).
+    La generación usa memoria acotada, pero Streamlit guarda en memoria
+    el archivo terminado hasta servirlo: para catálogos muy grandes está
+    ``python -m selah exportar``, que escribe directo al disco.
+    """
+    with st.expander("⬇️ Exportar catálogo"):
+        formato = st.radio("Formato", list(exportacion.FORMATOS), horizontal=True, key=f"{prefijo}_formato")
+        secretos = dict(st.secrets)
+
+        @metricas.etiqueta(f"exportar_{tabla.lower()}")
+        def generar():
+            conexion = db.obtener_conexion(secretos)
+            try:
+                with tempfile.TemporaryFile() as salida:
+                    exportacion.exportar(exportar_bloques(conexion), formato, salida)
+                    salida.seek(0)
+                    return salida.read()
+            finally:
+                db.liberar_conexion(conexion)
+
+        st.download_button(
+            f"Descargar {formato}", data=metricas.propagar(generar),
+            file_name=exportacion.nombre_archivo(tabla, formato), mime=exportacion.FORMATOS[formato][1],
+            on_click="ignore", key=f"{prefijo}_exportar"
+        )
+
+
+# =========================
+# Importación masiva de materiales
+# =========================
+def mostrar_importacion_materiales():
+    """Importación masiva de materiales desde una lista de precios (ver selah.importacion)."""
+    with st.expander("📥 Importación masiva (CSV / Excel)"):
+        st.caption(
+            "Columnas: ID_MATERIAL, TIPO, PIEDRA, FORMA, COLOR, DESCRIPCION, TEXTURA, "
+            "LARGO, ANCHO, COSTO_TIRA, CANTIDAD y PROVEEDOR (nombre) o ID_PROVEEDOR."
+        )
+        archivo_materiales = st.file_uploader("Lista de precios", type=["csv", "xlsx"], key="archivo_materiales")
+        actualizar_importacion = st.checkbox("Actualizar los materiales que ya existen", key="actualizar_importacion")
+        if archivo_materiales is not None and st.button("Importar Materiales"):
+            conexion = conectar_db()
+            if conexion:
+                try:
+                    resumen = importacion.importar_materiales(
+                        conexion, archivo_materiales, archivo_materiales.name, actualizar=actualizar_importacion
+                    )
+                    if resumen["insertados"] or resumen["actualizados"]:
+                        cache.invalidar_materiales(conexion)
+                    st.success(f"✅ {resumen['insertados']} materiales importados, {len(resumen['actualizados'])} actualizados")
+                    if resumen["actualizados"]:
+                        try:
+                            n = recetas.recalcular_pulseras(conexion, resumen["actualizados"])
+                            if n:
+                                cache.invalidar_pulseras(conexion)
+                                st.info(f"{n} pulseras recalculadas con los nuevos costos")
+                        except Error as e:
+                            st.warning(f"No se pudieron recalcular las pulseras: {e}")
+                    if resumen["errores"]:
+                        st.warning(f"{len(resumen['errores'])} filas con errores no se importaron")
+                        st.dataframe(
+                            pd.DataFrame(resumen["errores"], columns=["Fila", "ID_MATERIAL", "Error"]),
+                            width="stretch", hide_index=True
+                        )
+                except ValueError as e:
+                    st.error(str(e))
+                except Error as e:
+                    st.error(f"No se pudo importar el archivo (no se guardó ningún material): {e}")
+                finally:
+                    db.liberar_conexion(conexion)
+
+
+# =========================
+# TAB 2: Calculadora de Pulseras
+# =========================
+@st.fragment
+def mostrar_tab_calculadora(limpiar_materiales=None, limpiar_pulsera=None):
+    """
+    Calculadora y registro de pulseras. ``limpiar_materiales`` y
+    ``limpiar_pulsera`` son callbacks opcionales de los botones 🧹.
+    """
+    iniciar_rerun("calculadora")
+    mostrar_estado_conexion()
+    st.subheader("💰 Calculadora de Pulseras")
+
+    tipo_hilo = st.selectbox("Tipo de Hilo", [" ", "Nylon", "Negro"], key='hilo_calc')
+    # Costos e índice son consultas independientes: los costos se cargan
+    # en otro hilo mientras se arma el índice.
+    carga_costos = cache.lanzar(metricas.etiqueta("obtener_tabla_costos")(cache.tabla_costos))
+    indice = obtener_indice_materiales()
+
+    st.markdown("### Selección de Materiales")
+    material_seleccionados, cantidades = mostrar_editor_receta(indice)
+
+    if limpiar_materiales is not None:
+        col_clear1, _ = st.columns([1, 3])
+        with col_clear1:
+            st.button("🧹 Limpiar Selección de Materiales", on_click=limpiar_materiales)
+
+    # La tabla de costos se carga una vez y se refresca por TTL: mover una
+    # cantidad o un material solo recalcula en memoria.
+    tabla_costos = obtener_tabla_costos(carga_costos.result)
+    if tabla_costos is not None:
+        mostrar_vista_previa(material_seleccionados, cantidades, tipo_hilo, tabla_costos)
+        mostrar_optimizador(indice, tabla_costos, tipo_hilo)
+
+    if st.button("Calcular Precio"):
+        costos = obtener_costos_cuenta(material_seleccionados, tabla_costos)
+        costo_total_cuentas = sum(
+            cantidades[i] * costos.get(material_seleccionados[i], 0.0)
+            for i in range(len(material_seleccionados))
+            if material_seleccionados[i] != " "
+        )
+        precio = precios.precio_pulsera(costo_total_cuentas, tipo_hilo)
+
+        st.success(f"**Costo total:** ${precio['COSTO']:.2f}")
+        st.write(f"**Precio real:** ${precio['PRECIO']:.2f}")
+        st.info(f"**Clasificación:** {precio['CLASIFICACION']}, Precio Clasificado: ${precio['PRECIO_CLASIFICADO']:.2f}")
+
+        st.session_state.update({
+            'costo_total': precio['COSTO'],
+            'precio_real': precio['PRECIO'],
+            'clasificacion': precio['CLASIFICACION'],
+            'precio_clasificado': precio['PRECIO_CLASIFICADO'],
+            # receta con la que se calculó el precio; se guarda al registrar la pulsera
+            'receta': recetas.armar_receta(material_seleccionados, cantidades),
+            'tipo_hilo_receta': tipo_hilo
+        })
+
+    st.markdown("### Registro de Pulsera Final")
+    id_producto = st.text_input("ID Producto Pulsera", key='id_producto_pulsera_input')
+    descripcion_pulsera = st.text_input("Descripción Pulsera", key='descripcion_pulsera_input')
+
+    if limpiar_pulsera is not None:
+        colp1, _ = st.columns([1, 3])
+        with colp1:
+            st.button("🧹 Borrar Formulario de Pulsera", on_click=limpiar_pulsera)
+
+    if st.button("Registrar Pulsera"):
+        if not id_producto or not descripcion_pulsera:
+            st.error("Debes ingresar ID y descripción del producto")
+        elif 'costo_total' not in st.session_state or st.session_state.get('costo_total') is None:
+            st.error("Primero debes calcular el precio")
+        else:
+            conexion = conectar_db()
+            if conexion:
+                try:
+                    precio = {
+                        'COSTO': st.session_state['costo_total'],
+                        'PRECIO': st.session_state['precio_real'],
+                        'CLASIFICACION': st.session_state['clasificacion'],
+                        'PRECIO_CLASIFICADO': st.session_state['precio_clasificado']
+                    }
+                    recetas.registrar_pulsera(
+                        conexion, id_producto, descripcion_pulsera, precio,
+                        st.session_state.get('receta') or [],
+                        st.session_state.get('tipo_hilo_receta')
+                    )
+                    cache.invalidar_pulseras(conexion)
+                    st.success(f"Pulsera '{descripcion_pulsera}' registrada correctamente")
+                except Error as e:
+                    st.error(f"No se pudo registrar la pulsera: {e}")
+                finally:
+                    db.liberar_conexion(conexion)
+
+    with st.expander("📥 Registro masivo de pulseras (CSV / Excel)"):
+        st.caption(
+            "Una fila por material: ID_PRODUCTO, DESCRIPCION, TIPO_HILO (Nylon o Negro), ID_MATERIAL y CANTIDAD. "
+            "DESCRIPCION y TIPO_HILO basta con ponerlos en la primera fila de cada pulsera."
+        )
+        archivo_recetas = st.file_uploader("Archivo de recetas", type=["csv", "xlsx"], key="archivo_recetas")
+        if archivo_recetas is not None and st.button("Registrar Pulseras"):
+            conexion = conectar_db()
+            if conexion:
+                try:
+                    resumen = importacion.importar_pulseras(conexion, archivo_recetas, archivo_recetas.name)
+                    if resumen["pulseras"]:
+                        cache.invalidar_pulseras(conexion)
+                        st.success(f"✅ {len(resumen['pulseras'])} pulseras registradas")
+                        st.dataframe(pd.DataFrame(resumen["pulseras"]), width="stretch", hide_index=True)
+                    if resumen["errores"]:
+                        st.warning(f"{len(resumen['errores'])} filas con errores; esas pulseras no se registraron")
+                        st.dataframe(
+                            pd.DataFrame(resumen["errores"], columns=["Fila", "ID_PRODUCTO", "Error"]),
+                            width="stretch", hide_index=True
+                        )
+                except ValueError as e:
+                    st.error(str(e))
+                except Error as e:
+                    st.error(f"No se pudo registrar el archivo (no se guardó ninguna pulsera): {e}")
+                finally:
+                    db.liberar_conexion(conexion)
+
+
+# =========================
+# TAB 3: Catálogo de Materiales
+# =========================
+@st.fragment
+def mostrar_tab_catalogo_materiales():
+    """Catálogo de materiales paginado."""
+    iniciar_rerun("catalogo_materiales")
+    mostrar_estado_conexion()
+    st.subheader("📚 Catálogo de Materiales")
+
+    with st.expander("Filtros"):
+        colf1, colf2, colf3 = st.columns(3)
+        with colf1:
+            f_tipo = st.text_input("Tipo", key="cat_mat_tipo")
+            f_piedra = st.text_input("Piedra", key="cat_mat_piedra")
+        with colf2:
+            f_forma = st.text_input("Forma", key="cat_mat_forma")
+            proveedores_cat, indice_prov_cat = obtener_proveedores()
+            f_prov = st.selectbox("Proveedor", [" "] + [p[1] for p in proveedores_cat], key="cat_mat_prov")
+        with colf3:
+            f_costo_min = st.number_input("Costo cuenta mínimo", min_value=0.0, value=0.0, step=0.5, key="cat_mat_costo_min")
+            f_costo_max = st.number_input("Costo cuenta máximo (0 = sin límite)", min_value=0.0, value=0.0, step=0.5, key="cat_mat_costo_max")
+        tamano_cat_mat = st.selectbox("Filas por página", [25, 50, 100], index=1, key="cat_mat_tamano")
+
+    filtros_mat = {
+        "TIPO": f_tipo,
+        "PIEDRA": f_piedra,
+        "FORMA": f_forma,
+        "ID_PROVEEDOR": indice_prov_cat.get(f_prov) if f_prov != " " else None,
+        "COSTO_MIN": f_costo_min or None,
+        "COSTO_MAX": f_costo_max or None,
+    }
+
+    if st.button("🔄 Cargar Catálogo"):
+        # Solo se vuelve a consultar si la huella de las tablas cambió
+        cache.refrescar("MATERIALES", "PROVEEDORES")
+        st.session_state["cat_mat_activo"] = True
+        st.session_state.pop("cat_mat_estado", None)
+
+    if st.session_state.get("cat_mat_activo"):
+        mostrar_catalogo_paginado(
+            "cat_mat",
+            (tuple(sorted(filtros_mat.items())), tamano_cat_mat),
+            lambda despues_de: obtener_catalogo_materiales(filtros_mat, despues_de, tamano_cat_mat),
+            lambda df: df["ID_MATERIAL"].iloc[-1],
+            "No hay materiales registrados o ocurrió un error."
+        )
+
+    mostrar_exportacion("cat_mat", "MATERIALES", lambda conexion: consultas.exportar_materiales(conexion, filtros_mat))
+
+
+# =========================
+# TAB 4: Catálogo de Pulseras
+# =========================
+@st.fragment
+def mostrar_tab_catalogo_pulseras():
+    """Catálogo de pulseras paginado."""
+    iniciar_rerun("catalogo_pulseras")
+    mostrar_estado_conexion()
+    st.subheader("📿 Catálogo de Pulseras")
+
+    with st.expander("Filtros y orden"):
+        colp1, colp2, colp3 = st.columns(3)
+        with colp1:
+            f_clasif = st.multiselect("Clasificación", ["A", "B", "C"], key="cat_pul_clasif")
+            orden_pul = st.selectbox("Ordenar por", list(consultas.ORDEN_PULSERAS), key="cat_pul_orden")
+        with colp2:
+            f_precio_min = st.number_input("Precio mínimo", min_value=0.0, value=0.0, step=10.0, key="cat_pul_precio_min")
+            f_precio_max = st.number_input("Precio máximo (0 = sin límite)", min_value=0.0, value=0.0, step=10.0, key="cat_pul_precio_max")
+        with colp3:
+            desc_pul = st.checkbox("Descendente", key="cat_pul_desc")
+            tamano_cat_pul = st.selectbox("Filas por página", [25, 50, 100], index=1, key="cat_pul_tamano")
+
+    filtros_pul = {
+        "CLASIFICACION": tuple(f_clasif),
+        "PRECIO_MIN": f_precio_min or None,
+        "PRECIO_MAX": f_precio_max or None,
+    }
+
+    if st.button("🔄 Cargar Catálogo de Pulseras"):
+        cache.refrescar("PULSERAS")
+        st.session_state["cat_pul_activo"] = True
+        st.session_state.pop("cat_pul_estado", None)
+
+    if st.session_state.get("cat_pul_activo"):
+        mostrar_catalogo_paginado(
+            "cat_pul",
+            (tuple(sorted(filtros_pul.items())), orden_pul, desc_pul, tamano_cat_pul),
+            lambda despues_de: obtener_catalogo_pulseras(filtros_pul, orden_pul, desc_pul, despues_de, tamano_cat_pul),
+            lambda df: _cursor_pulseras(df, orden_pul),
+            "No hay pulseras registradas o ocurrió un error.",
+            cargar_total=lambda: obtener_conteo_pulseras(filtros_pul)
+        )
+
+    mostrar_exportacion(
+        "cat_pul", "PULSERAS",
+        lambda conexion: consultas.exportar_pulseras(conexion, filtros_pul, orden_pul, desc_pul)
+    )
+
+
+# =========================
+# Panel de depuración de consultas
+# =========================
+EJECUCIONES_PANEL = 10
+
+
+def modo_depuracion():
+    """Activo con ?debug=1 en la URL o DEBUG_CONSULTAS = true en los secretos."""
+    if st.query_params.get("debug") == "1":
+        return True
+    try:
+        return bool(st.secrets.get("DEBUG_CONSULTAS", False))
+    except Exception:
+        return False
+
+
+def mostrar_panel_consultas():
+    """Consultas de esta sesión por ejecución, en la barra lateral."""
+    if not modo_depuracion():
+        return
+    eventos = metricas.eventos(st.session_state.get("id_sesion"))
+    with st.sidebar:
+        st.subheader("🔎 Consultas a la base")
+        if not eventos:
+            st.caption("Todavía no hay consultas en esta sesión.")
+            return
+        resumen = pd.DataFrame(metricas.resumen_reruns(eventos)).tail(EJECUCIONES_PANEL)
+        st.dataframe(resumen.iloc[::-1], width="stretch", hide_index=True)
+
+        ultima = eventos[-1]["rerun"]
+        st.caption(f"Detalle de la ejecución {ultima}")
+        detalle = pd.DataFrame([e for e in eventos if e["rerun"] == ultima])
+        columnas = [c for c in ("tipo", "etiqueta", "conexion_ms", "ejecucion_ms", "filas", "error", "sql") if c in detalle]
+        st.dataframe(detalle[columnas], width="stretch", hide_index=True)
+        st.download_button("Descargar métricas (JSON Lines)", metricas.volcar(eventos),
+                           file_name="metricas_consultas.jsonl", mime="application/json")
+        mostrar_verificacion_esquema()
+
+
+def mostrar_verificacion_esquema():
+    """Migraciones pendientes e índices faltantes en la base en uso (ver selah.migraciones)."""
+    if not st.button("Verificar esquema", key="verificar_esquema"):
+        return
+    conexion = conectar_db()
+    if conexion is None:
+        return
+    try:
+        faltan = migraciones.pendientes(conexion)
+        diferencias = migraciones.verificar_indices(conexion)
+    except (Error, ValueError) as e:
+        st.error(f"No se pudo verificar el esquema: {e}")
+        return
+    finally:
+        db.liberar_conexion(conexion)
+    if not faltan and not diferencias:
+        st.success("El esquema está al día.")
+        return
+    if faltan:
+        st.warning("Migraciones pendientes: " + ", ".join(f"{v:03d}_{n}" for v, n, _ in faltan)
+                   + " (python -m selah.migraciones)")
+    if diferencias:
+        st.warning(f"{len(diferencias)} índices faltan o no coinciden")
+        st.dataframe(pd.DataFrame(diferencias), width="stretch", hide_index=True)
+
+
+# =========================
+# Pestañas
+# =========================
+def mostrar_app(mostrar_tab_registro, limpiar_materiales=None, limpiar_pulsera=None):
+    """
+    Pestañas de la app y panel de depuración. Con on_change="rerun" solo se
+    ejecuta la pestaña abierta, y cada pestaña es un fragmento que se vuelve
+    a ejecutar por separado. ``mostrar_tab_registro`` es el formulario de
+    cada script; los callbacks de limpiar van a la calculadora.
+    """
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "🧾 Registro de Materiales",
+        "💰 Calculadora de Pulseras",
+        "📚 Catálogo de Materiales",
+        "📿 Catálogo de Pulseras"
+    ], key="tab_activa", on_change="rerun")
+
+    with tab1:
+        if tab1.open:
+            mostrar_tab_registro()
+    with tab2:
+        if tab2.open:
+            mostrar_tab_calculadora(limpiar_materiales, limpiar_pulsera)
+    with tab3:
+        if tab3.open:
+            mostrar_tab_catalogo_materiales()
+    with tab4:
+        if tab4.open:
+            mostrar_tab_catalogo_pulseras()
+
+    # Va al final para incluir las consultas de la pestaña que se acaba de
+    # ejecutar; las reejecuciones de un fragmento no lo actualizan.
+    mostrar_panel_consultas()
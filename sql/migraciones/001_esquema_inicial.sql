@@ -0,0 +1,37 @@
+-- Tablas base de la app. IF NOT EXISTS: en una base creada a mano antes de
+-- las migraciones no cambia nada; los índices y las llaves foráneas de los
+-- caminos de acceso van en 004_indices_consultas.sql para que las bases
+-- existentes también los reciban.
+
+CREATE TABLE IF NOT EXISTS PROVEEDORES (
+    ID_PROVEEDOR INT NOT NULL AUTO_INCREMENT,
+    NOMBRE_PROVEEDOR VARCHAR(100) NOT NULL,
+    PRIMARY KEY (ID_PROVEEDOR)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS MATERIALES (
+    ID_MATERIAL VARCHAR(50) NOT NULL,
+    TIPO VARCHAR(50) NULL,
+    PIEDRA VARCHAR(50) NULL,
+    FORMA VARCHAR(50) NULL,
+    COLOR VARCHAR(50) NULL,
+    DESCRIPCION VARCHAR(255) NULL,
+    TEXTURA VARCHAR(50) NULL,
+    LARGO DECIMAL(8,2) NULL,
+    ANCHO DECIMAL(8,2) NULL,
+    COSTO_TIRA DECIMAL(10,2) NOT NULL,
+    CANTIDAD INT NOT NULL,
+    COSTO_CUENTA DECIMAL(12,4) NOT NULL,
+    ID_PROVEEDOR INT NULL,
+    PRIMARY KEY (ID_MATERIAL)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS PULSERAS (
+    ID_PRODUCTO VARCHAR(50) NOT NULL,
+    DESCRIPCION VARCHAR(255) NULL,
+    COSTO DECIMAL(10,2) NOT NULL,
+    PRECIO DECIMAL(10,2) NOT NULL,
+    CLASIFICACION VARCHAR(5) NULL,
+    PRECIO_CLASIFICADO DECIMAL(10,2) NULL,
+    PRIMARY KEY (ID_PRODUCTO)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,15 @@
+-- Receta (bill of materials) de cada pulsera registrada.
+-- El índice IDX_RECETA_MATERIAL es el índice inverso material -> pulseras
+-- que usa selah.recetas.recalcular_pulseras() cuando cambia un COSTO_CUENTA.
+
+ALTER TABLE PULSERAS ADD COLUMN TIPO_HILO VARCHAR(20) NULL;
+
+CREATE TABLE IF NOT EXISTS PULSERAS_RECETA (
+    ID_PRODUCTO VARCHAR(50) NOT NULL,
+    ID_MATERIAL VARCHAR(50) NOT NULL,
+    CANTIDAD INT NOT NULL,
+    PRIMARY KEY (ID_PRODUCTO, ID_MATERIAL),
+    KEY IDX_RECETA_MATERIAL (ID_MATERIAL, ID_PRODUCTO),
+    CONSTRAINT FK_RECETA_PULSERA FOREIGN KEY (ID_PRODUCTO) REFERENCES PULSERAS (ID_PRODUCTO) ON DELETE CASCADE,
+    CONSTRAINT FK_RECETA_MATERIAL FOREIGN KEY (ID_MATERIAL) REFERENCES MATERIALES (ID_MATERIAL)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
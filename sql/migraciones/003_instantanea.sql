@@ -0,0 +1,17 @@
+-- Marca de cambios para la instantánea local (selah.instantanea).
+-- ACTUALIZADO_EN se actualiza sola en cada INSERT/UPDATE que cambia la fila;
+-- la sincronización incremental solo trae las filas con marca >= la última
+-- vista, usando el índice. Columna e índice van en sentencias separadas para
+-- que cada una se pueda repetir (ver selah.migraciones).
+
+ALTER TABLE PROVEEDORES
+    ADD COLUMN ACTUALIZADO_EN TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3);
+ALTER TABLE PROVEEDORES ADD KEY IDX_PROVEEDORES_ACTUALIZADO (ACTUALIZADO_EN);
+
+ALTER TABLE MATERIALES
+    ADD COLUMN ACTUALIZADO_EN TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3);
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_ACTUALIZADO (ACTUALIZADO_EN);
+
+ALTER TABLE PULSERAS
+    ADD COLUMN ACTUALIZADO_EN TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3);
+ALTER TABLE PULSERAS ADD KEY IDX_PULSERAS_ACTUALIZADO (ACTUALIZADO_EN);
@@ -0,0 +1,22 @@
+-- Índices para los caminos de acceso de selah.consultas. InnoDB agrega la
+-- PRIMARY KEY al final de cada índice secundario; aquí se escribe explícita
+-- porque es el desempate del ORDER BY y del cursor keyset de las páginas.
+
+-- LEFT JOIN / filtro por proveedor, en el orden de la paginación. La llave
+-- foránea usa este mismo índice.
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_PROVEEDOR (ID_PROVEEDOR, ID_MATERIAL);
+ALTER TABLE MATERIALES ADD CONSTRAINT FK_MATERIAL_PROVEEDOR
+    FOREIGN KEY (ID_PROVEEDOR) REFERENCES PROVEEDORES (ID_PROVEEDOR);
+
+-- Filtros del catálogo de materiales (igualdad + ORDER BY ID_MATERIAL) y
+-- rango de costo por cuenta.
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_TIPO (TIPO, ID_MATERIAL);
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_PIEDRA (PIEDRA, ID_MATERIAL);
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_FORMA (FORMA, ID_MATERIAL);
+ALTER TABLE MATERIALES ADD KEY IDX_MATERIALES_COSTO_CUENTA (COSTO_CUENTA, ID_MATERIAL);
+
+-- Orden y filtros del catálogo de pulseras (ORDER BY columna, ID_PRODUCTO);
+-- también dan la estimación de filas del EXPLAIN del conteo aproximado.
+ALTER TABLE PULSERAS ADD KEY IDX_PULSERAS_CLASIFICACION (CLASIFICACION, ID_PRODUCTO);
+ALTER TABLE PULSERAS ADD KEY IDX_PULSERAS_PRECIO (PRECIO, ID_PRODUCTO);
+ALTER TABLE PULSERAS ADD KEY IDX_PULSERAS_COSTO (COSTO, ID_PRODUCTO);
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Códigos de salida de selah.cli contra la base local de los benchmarks."""
+
+import pytest
+from mysql.connector import errors
+
+from benchmarks import bd_local
+from selah import cli
+
+
+@pytest.fixture
+def secretos(monkeypatch):
+    """Conecta a la base local y devuelve las rutas de ``--secretos`` usadas."""
+    bd_local.sembrar(50)
+    rutas = []
+
+    def conectar(args):
+        rutas.append(args.secretos)
+        return bd_local.Conexion()
+
+    monkeypatch.setattr(cli, "_conectar", conectar)
+    return rutas
+
+
+@pytest.mark.parametrize("argv, ruta", [
+    (["precio", "M000001=2", "M000002"], cli.RUTA_SECRETOS_DEFAULT),
+    (["--secretos", "antes.toml", "precio", "M000001=2", "M000002"], "antes.toml"),
+    (["precio", "--secretos", "despues.toml", "M000001=2", "M000002"], "despues.toml"),
+])
+def test_secretos_antes_o_despues_del_comando(secretos, capsys, argv, ruta):
+    assert cli.main(argv) == 0
+    assert secretos == [ruta]
+    assert "Clasificación:" in capsys.readouterr().out
+
+
+def test_material_inexistente_sale_con_1(secretos, capsys):
+    assert cli.main(["precio", "M000001", "NO_EXISTE"]) == 1
+    assert "NO_EXISTE" in capsys.readouterr().err
+
+
+def test_importacion_con_filas_erroneas_sale_con_1(secretos, tmp_path, capsys):
+    archivo = tmp_path / "pulseras.csv"
+    archivo.write_text("ID_PRODUCTO,ID_MATERIAL,CANTIDAD\nPX1,M000001,3\nPX2,NO_EXISTE,1\n", encoding="utf-8")
+
+    assert cli.main(["importar", "pulseras", str(archivo), "--simular"]) == 1
+    assert "PX2" in capsys.readouterr().err
+
+
+def test_archivo_inexistente_sale_con_2(secretos, tmp_path):
+    assert cli.main(["importar", "materiales", str(tmp_path / "no_existe.csv")]) == 2
+
+
+def test_error_de_base_sale_con_2(monkeypatch, capsys):
+    def conectar(args):
+        raise errors.InterfaceError(msg="sin servidor")
+
+    monkeypatch.setattr(cli, "_conectar", conectar)
+    assert cli.main(["recalcular"]) == 2
+    assert "Error de base de datos" in capsys.readouterr().err
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Paginación por keyset de consultas.pagina_pulseras con valores NULL en la columna de orden."""
+
+import pytest
+
+from benchmarks import bd_local
+from selah import consultas, instantanea
+
+
+@pytest.fixture(params=["remota", "instantanea"])
+def conexion(request, tmp_path):
+    bd_local.sembrar(50, n_pulseras=40)
+    remota = bd_local.Conexion()
+    cursor = remota.cursor()
+    cursor.execute("UPDATE PULSERAS SET CLASIFICACION = NULL WHERE ID_PRODUCTO IN (%s, %s, %s, %s, %s)",
+                   ("P000003", "P000010", "P000011", "P000025", "P000039"))
+    cursor.close()
+    remota.commit()
+    if request.param == "remota":
+        yield remota
+    else:
+        local = instantanea.conectar(str(tmp_path / "instantanea.sqlite"))
+        instantanea.sincronizar(remota, local)
+        yield local
+        local.close()
+    remota.close()
+
+
+def _recorrer(conexion, orden, descendente, tamano):
+    filas, despues_de, hay_siguiente = [], None, True
+    while hay_siguiente:
+        df, hay_siguiente = consultas.pagina_pulseras(conexion, orden=orden, descendente=descendente,
+                                                      despues_de=despues_de, tamano=tamano)
+        filas.extend(zip(df[orden], df["ID_PRODUCTO"]))
+        despues_de = (df[orden].iloc[-1], df["ID_PRODUCTO"].iloc[-1])
+    return filas
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+@pytest.mark.parametrize("tamano", [3, 7])
+def test_paginas_con_clasificacion_nula(conexion, descendente, tamano):
+    filas = _recorrer(conexion, "CLASIFICACION", descendente, tamano)
+
+    ids = [id_producto for _, id_producto in filas]
+    assert sorted(ids) == [f"P{i:06d}" for i in range(40)]
+    con_valor = [(c, i) for c, i in filas if isinstance(c, str)]
+    nulas = [i for c, i in filas if not isinstance(c, str)]
+    # Los NULL al final en ambos sentidos, ordenados por ID_PRODUCTO
+    assert filas[:len(con_valor)] == sorted(con_valor, reverse=descendente)
+    assert nulas == sorted(["P000003", "P000010", "P000011", "P000025", "P000039"], reverse=descendente)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""exportacion.escribir_parquet con bloques cuyo primer bloque trae columnas en NULL."""
+
+import io
+
+import pandas as pd
+import pytest
+
+from selah import exportacion
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_parquet_usa_el_tipo_sql_de_columnas_vacias_en_el_primer_bloque():
+    bloques = [
+        pd.DataFrame({"ID_MATERIAL": ["M1"], "LARGO": [None], "ID_PROVEEDOR": [None], "COLOR": [None]}),
+        pd.DataFrame({"ID_MATERIAL": ["M2"], "LARGO": [8.5], "ID_PROVEEDOR": [3], "COLOR": ["Rojo"]}),
+    ]
+    salida = io.BytesIO()
+
+    assert exportacion.escribir_parquet(iter(bloques), salida) == 2
+    salida.seek(0)
+    tabla = pq.read_table(salida)
+    assert tabla.schema.field("LARGO").type == pa.float64()
+    assert tabla.schema.field("ID_PROVEEDOR").type == pa.int64()
+    assert tabla.schema.field("COLOR").type == pa.string()
+    assert tabla.column("LARGO").to_pylist() == [None, 8.5]
+    assert tabla.column("ID_PROVEEDOR").to_pylist() == [None, 3]
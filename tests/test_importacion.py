@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Números de fila de los errores de importación con filas vacías en el archivo."""
+
+import io
+
+import pytest
+
+from benchmarks import bd_local
+from selah import importacion
+
+RECETAS = (
+    "ID_PRODUCTO,DESCRIPCION,TIPO_HILO,ID_MATERIAL,CANTIDAD\n"
+    "P1,Pulsera uno,Nylon,M000001,3\n"
+    "\n"
+    ",,,,\n"
+    "P2,Pulsera dos,Negro,M000002,x\n"
+    "\n"
+    ",Sin ID,Nylon,M000003,1\n"
+)
+
+
+@pytest.mark.parametrize("tamano_lote", [1, 2, 500])
+def test_errores_de_recetas_con_la_fila_del_archivo(tamano_lote):
+    archivo = io.BytesIO(RECETAS.encode("utf-8"))
+
+    pulseras, errores = importacion.leer_recetas(archivo, "recetas.csv", tamano_lote)
+
+    assert [(p["fila"], p["id_producto"]) for p in pulseras] == [(2, "P1")]
+    assert [(fila, id_producto) for fila, id_producto, _ in errores] == [(5, "P2"), (7, "")]
+
+
+def test_errores_de_recetas_excel_con_la_fila_de_la_hoja():
+    openpyxl = pytest.importorskip("openpyxl")
+    libro = openpyxl.Workbook()
+    for linea in RECETAS.splitlines():
+        libro.active.append(linea.split(",") if linea else [])
+    archivo = io.BytesIO()
+    libro.save(archivo)
+    archivo.seek(0)
+
+    _, errores = importacion.leer_recetas(archivo, "recetas.xlsx", 2)
+
+    assert [(fila, id_producto) for fila, id_producto, _ in errores] == [(5, "P2"), (7, "")]
+
+
+def test_errores_de_materiales_con_la_fila_del_archivo():
+    bd_local.sembrar(50)
+    conexion = bd_local.Conexion()
+    archivo = io.BytesIO((
+        "ID_MATERIAL,TIPO,PIEDRA,FORMA,COLOR,DESCRIPCION,TEXTURA,LARGO,ANCHO,COSTO_TIRA,CANTIDAD,ID_PROVEEDOR\n"
+        "\n"
+        "MX1,Cuenta,Jade,Redonda,Verde,,Lisa,8,8,120,40,1\n"
+        ",,,,,,,,,,,\n"
+        "M000001,Cuenta,Jade,Redonda,Verde,,Lisa,8,8,120,40,1\n"
+        "MX2,Cuenta,Jade,Redonda,Verde,,Lisa,8,8,abc,40,1\n"
+    ).encode("utf-8"))
+    try:
+        resumen = importacion.importar_materiales(conexion, archivo, "materiales.csv", tamano_lote=2)
+    finally:
+        conexion.close()
+
+    assert resumen["insertados"] == 1
+    assert [(fila, id_material) for fila, id_material, _ in resumen["errores"]] == [(5, "M000001"), (6, "MX2")]
+
+
+def test_actualizar_reemplaza_los_materiales_existentes():
+    bd_local.sembrar(50)
+    conexion = bd_local.Conexion()
+    archivo = io.BytesIO((
+        "ID_MATERIAL,TIPO,PIEDRA,FORMA,COLOR,DESCRIPCION,TEXTURA,LARGO,ANCHO,COSTO_TIRA,CANTIDAD,ID_PROVEEDOR\n"
+        "M000001,Cuenta,Jade,Redonda,Verde,,Lisa,8,8,120,40,2\n"
+        "MX1,Cuenta,Jade,Redonda,Verde,,Lisa,8,8,90,30,1\n"
+    ).encode("utf-8"))
+    try:
+        resumen = importacion.importar_materiales(conexion, archivo, "materiales.csv", actualizar=True)
+        cursor = conexion.cursor()
+        cursor.execute("SELECT PIEDRA, COSTO_TIRA, COSTO_CUENTA, ID_PROVEEDOR FROM MATERIALES WHERE ID_MATERIAL = %s",
+                       ("M000001",))
+        fila = cursor.fetchone()
+        cursor.close()
+    finally:
+        conexion.close()
+
+    assert (resumen["insertados"], resumen["actualizados"], resumen["errores"]) == (1, ["M000001"], [])
+    assert fila == ("Jade", 120.0, 3.0, 2)
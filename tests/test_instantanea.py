@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""instantanea.sincronizar_tabla contra la base local de los benchmarks."""
+
+import datetime
+
+import pytest
+
+from benchmarks import bd_local
+from selah import instantanea
+
+
+@pytest.fixture
+def bases(tmp_path):
+    bd_local.sembrar(50)
+    remota = bd_local.Conexion()
+    local = instantanea.conectar(str(tmp_path / "instantanea.sqlite"))
+    instantanea.sincronizar(remota, local)
+    yield remota, local
+    local.close()
+    remota.close()
+
+
+def _marca_anterior(local, segundos):
+    """La marca guardada de PROVEEDORES menos ``segundos``, con el formato de la base."""
+    marca = local._conexion.execute("SELECT MARCA FROM _SINCRONIZACION WHERE TABLA = 'PROVEEDORES'").fetchone()[0]
+    instante = datetime.datetime.fromisoformat(marca) - datetime.timedelta(seconds=segundos)
+    return instante.isoformat(sep=" ", timespec="milliseconds")
+
+
+def _ejecutar(remota, sql, params):
+    cursor = remota.cursor()
+    cursor.execute(sql, params)
+    cursor.close()
+    remota.commit()
+
+
+def _proveedores(local):
+    return dict(local._conexion.execute("SELECT ID_PROVEEDOR, NOMBRE_PROVEEDOR FROM PROVEEDORES"))
+
+
+def test_trae_filas_confirmadas_antes_de_la_ventana(bases):
+    remota, local = bases
+    # Fuera de la ventana: solo la diferencia de conteos la delata
+    _ejecutar(
+        remota, "INSERT INTO PROVEEDORES (ID_PROVEEDOR, NOMBRE_PROVEEDOR, ACTUALIZADO_EN) VALUES (%s, %s, %s)",
+        (99, "Proveedor tardío", _marca_anterior(local, 10 * instantanea.MARGEN_MARCA))
+    )
+
+    assert instantanea.sincronizar_tabla(remota, local, "PROVEEDORES") == 1
+    proveedores = _proveedores(local)
+    assert proveedores[99] == "Proveedor tardío"
+    # La huella guardada corresponde a la instantánea completa
+    assert instantanea.sincronizar_tabla(remota, local, "PROVEEDORES") == 0
+    assert _proveedores(local) == proveedores
+
+
+def test_trae_cambios_con_marca_dentro_de_la_ventana(bases):
+    remota, local = bases
+    # Mismo conteo y marca anterior a la guardada: solo la ventana lo encuentra
+    # cuando otro cambio mueve la huella
+    _ejecutar(
+        remota, "UPDATE PROVEEDORES SET NOMBRE_PROVEEDOR = %s, ACTUALIZADO_EN = %s WHERE ID_PROVEEDOR = %s",
+        ("Proveedor renombrado", _marca_anterior(local, instantanea.MARGEN_MARCA / 2), 2)
+    )
+    _ejecutar(remota, "UPDATE PROVEEDORES SET NOMBRE_PROVEEDOR = %s WHERE ID_PROVEEDOR = %s", ("Proveedor nuevo", 3))
+
+    assert instantanea.sincronizar_tabla(remota, local, "PROVEEDORES") == 2
+    proveedores = _proveedores(local)
+    assert proveedores[2] == "Proveedor renombrado"
+    assert proveedores[3] == "Proveedor nuevo"
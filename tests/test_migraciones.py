@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""selah.migraciones contra una conexión falsa que imita los errores de MySQL."""
+
+import pytest
+from mysql.connector import errorcode, errors
+
+from selah import migraciones
+
+
+class _Cursor:
+    def __init__(self, base):
+        self._base = base
+        self._filas = []
+
+    def execute(self, sql, params=()):
+        self._base.ejecutadas.append(sql)
+        self._filas = []
+        if sql.startswith("SELECT GET_LOCK"):
+            self._base.bloqueada = True
+            self._filas = [(1,)]
+        elif sql.startswith("SELECT RELEASE_LOCK"):
+            self._base.bloqueada = False
+            self._filas = [(1,)]
+        elif sql.startswith(f"SELECT VERSION FROM {migraciones.TABLA_MIGRACIONES}"):
+            if self._base.registradas is None:
+                raise errors.ProgrammingError(msg="no existe", errno=errorcode.ER_NO_SUCH_TABLE)
+            self._filas = [(v,) for v in sorted(self._base.registradas)]
+        elif sql.lstrip().startswith(f"CREATE TABLE IF NOT EXISTS {migraciones.TABLA_MIGRACIONES}"):
+            if self._base.registradas is None:
+                self._base.registradas = set()
+        elif sql.startswith(f"INSERT INTO {migraciones.TABLA_MIGRACIONES}"):
+            self._base.registradas.add(params[0])
+        elif sql in self._base.errores:
+            raise errors.DatabaseError(msg=sql, errno=self._base.errores[sql])
+
+    def fetchall(self):
+        return self._filas
+
+    def close(self):
+        pass
+
+
+class _Conexion:
+    def __init__(self, registradas=None, errores=None):
+        self.registradas = registradas
+        self.errores = errores or {}
+        self.ejecutadas = []
+        self.bloqueada = False
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        pass
+
+
+def _escribir(ruta, archivos):
+    for nombre, texto in archivos.items():
+        (ruta / nombre).write_text(texto, encoding="utf-8")
+
+
+def test_leer_migraciones_ordena_por_version(tmp_path):
+    _escribir(tmp_path, {
+        "010_diez.sql": "-- comentario\nALTER TABLE T ADD KEY IDX_T_A (A);\n",
+        "002_dos.sql": "CREATE TABLE B (ID INT);\nCREATE TABLE C (ID INT);\n",
+        "001_uno.sql": "CREATE TABLE A (ID INT);\n",
+    })
+    leidas = migraciones.leer_migraciones(tmp_path)
+    assert [(v, n) for v, n, _ in leidas] == [(1, "uno"), (2, "dos"), (10, "diez")]
+    assert leidas[1][2] == ["CREATE TABLE B (ID INT)", "CREATE TABLE C (ID INT)"]
+    assert leidas[2][2] == ["ALTER TABLE T ADD KEY IDX_T_A (A)"]
+
+
+@pytest.mark.parametrize("archivos", [{"sin_version.sql": ""}, {"001_a.sql": "", "001_b.sql": ""}])
+def test_leer_migraciones_rechaza_nombres_invalidos(tmp_path, archivos):
+    _escribir(tmp_path, {"002_bien.sql": "", **archivos})
+    with pytest.raises(ValueError):
+        migraciones.leer_migraciones(tmp_path)
+
+
+def test_migrar_aplica_en_orden_las_pendientes():
+    pendientes = [(3, "tres", ["S3"]), (1, "uno", ["S1a", "S1b"]), (2, "dos", ["S2"])]
+    conexion = _Conexion(registradas={1})
+    informes = []
+
+    hechas = migraciones.migrar(conexion, sorted(pendientes), informar=lambda *args: informes.append(args))
+
+    assert hechas == [2, 3]
+    assert conexion.registradas == {1, 2, 3}
+    assert "S1a" not in conexion.ejecutadas
+    assert conexion.ejecutadas.index("S2") < conexion.ejecutadas.index("S3")
+    assert informes == [(2, "dos", 1, 0), (3, "tres", 1, 0)]
+    assert not conexion.bloqueada
+
+
+def test_migrar_cuenta_ya_existe_como_aplicada():
+    errores = {sentencia: errno for sentencia, errno in zip(["S1", "S2", "S3", "S4"], migraciones.YA_APLICADA)}
+    conexion = _Conexion(errores=errores)
+    informes = []
+
+    hechas = migraciones.migrar(conexion, [(1, "uno", ["S1", "S2", "S3", "S4", "S5"])],
+                                informar=lambda *args: informes.append(args))
+
+    assert hechas == [1]
+    assert conexion.registradas == {1}
+    assert informes == [(1, "uno", 1, 4)]
+
+
+def test_migracion_con_error_no_se_registra():
+    conexion = _Conexion(errores={"S2": errorcode.ER_PARSE_ERROR})
+
+    with pytest.raises(errors.DatabaseError):
+        migraciones.migrar(conexion, [(1, "uno", ["S1"]), (2, "dos", ["S2", "S3"])])
+
+    assert conexion.registradas == {1}
+    assert "S3" not in conexion.ejecutadas
+    assert not conexion.bloqueada
+
+
+def test_tablas_del_repo_son_innodb_utf8mb4():
+    for version, nombre, sentencias in migraciones.leer_migraciones():
+        for sentencia in sentencias:
+            if sentencia.upper().startswith("CREATE TABLE"):
+                assert "ENGINE=InnoDB DEFAULT CHARSET=utf8mb4" in sentencia, f"{version:03d}_{nombre}"
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""optimizador.optimizar contra una búsqueda exhaustiva."""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from selah import optimizador, precios
+
+
+def _exhaustivo(costos, clasificacion, tipo_hilo, min_cuentas, max_cuentas, max_materiales, top):
+    """Margen de todas las (combinación, reparto) que caen en la clasificación, sin podas ni cotas."""
+    valores = np.array(list(costos.values()))
+    margenes = []
+    for k in range(1, max_materiales + 1):
+        repartos = optimizador._repartos(k, min_cuentas, max_cuentas)
+        combinaciones = np.array(list(itertools.combinations(range(len(valores)), k))).reshape(-1, k)
+        lote = precios.precios_lote((valores[combinaciones] @ repartos.T).ravel(), tipo_hilo)
+        validos = lote["CLASIFICACION"] == clasificacion
+        margenes.extend((lote["PRECIO_CLASIFICADO"] - lote["PRECIO"])[validos])
+    return sorted(margenes, reverse=True)[:top]
+
+
+@pytest.mark.parametrize("clasificacion", ["C", "B", "A"])
+@pytest.mark.parametrize("tipo_hilo", ["Nylon", "Negro"])
+def test_optimizar_igual_que_exhaustivo(clasificacion, tipo_hilo):
+    azar = random.Random(5)
+    costos = {f"M{i:03d}": round(azar.uniform(0.5, 8.0), 2) for i in range(40)}
+    resultados = optimizador.optimizar(
+        costos, clasificacion, tipo_hilo, min_cuentas=1, max_cuentas=20,
+        max_materiales=2, top=5, tiempo_limite=60.0
+    )
+    esperado = _exhaustivo(costos, clasificacion, tipo_hilo, 1, 20, 2, 5)
+    assert [r["MARGEN"] for r in resultados] == pytest.approx(esperado)
+    for r in resultados:
+        assert r["CLASIFICACION"] == clasificacion
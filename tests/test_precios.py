@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""precios.precios_lote contra la fórmula escalar que usaba la calculadora."""
+
+import random
+
+import numpy as np
+import pytest
+
+from selah import precios
+
+HILOS = [" ", "Nylon", "Negro", "Otro"]
+
+
+def _precio_base(costo_cuentas, tipo_hilo):
+    """La fórmula escalar original, tal cual."""
+    if tipo_hilo == "Nylon":
+        costo_hilo = 2.4
+    elif tipo_hilo == "Negro":
+        costo_hilo = 4.0
+    else:
+        costo_hilo = 0
+    mano = 40
+    empaque = 10
+    fijos = costo_hilo + mano + empaque
+    marketing = 0.15 * (costo_cuentas + fijos)
+    precio = (costo_cuentas + fijos + marketing) * 1.30
+    if precio <= 160:
+        clasificacion, precio_clasificado = "C", 160
+    elif precio <= 200:
+        clasificacion, precio_clasificado = "B", 200
+    else:
+        clasificacion, precio_clasificado = "A", 250
+    return {"COSTO": costo_cuentas + fijos, "PRECIO": precio,
+            "CLASIFICACION": clasificacion, "PRECIO_CLASIFICADO": precio_clasificado}
+
+
+def _frontera(limite, tipo_hilo):
+    """
+    Costos de cuentas consecutivos (en floats) alrededor de ``limite``: el
+    mayor cuyo precio base no lo supera y el siguiente, que ya lo supera.
+    """
+    costo = limite / 1.30 / 1.15 - (precios.costo_hilo(tipo_hilo) + 50)
+    while _precio_base(costo, tipo_hilo)["PRECIO"] > limite:
+        costo = np.nextafter(costo, -np.inf)
+    while _precio_base(np.nextafter(costo, np.inf), tipo_hilo)["PRECIO"] <= limite:
+        costo = np.nextafter(costo, np.inf)
+    return float(costo), float(np.nextafter(costo, np.inf))
+
+
+def _comparar(costos, tipos_hilo):
+    lote = precios.precios_lote(costos, tipos_hilo)
+    for i, (costo, tipo_hilo) in enumerate(zip(costos, tipos_hilo)):
+        esperado = _precio_base(costo, tipo_hilo)
+        assert lote["COSTO"][i] == esperado["COSTO"]
+        assert lote["PRECIO"][i] == esperado["PRECIO"]
+        assert lote["CLASIFICACION"][i] == esperado["CLASIFICACION"]
+        assert lote["PRECIO_CLASIFICADO"][i] == esperado["PRECIO_CLASIFICADO"]
+
+
+@pytest.mark.parametrize("tipo_hilo", HILOS)
+@pytest.mark.parametrize("limite", [160.0, 200.0])
+def test_igual_que_formula_base_en_los_limites(limite, tipo_hilo):
+    debajo, encima = _frontera(limite, tipo_hilo)
+    assert _precio_base(debajo, tipo_hilo)["PRECIO"] <= limite < _precio_base(encima, tipo_hilo)["PRECIO"]
+    _comparar([debajo, encima], [tipo_hilo, tipo_hilo])
+
+
+@pytest.mark.parametrize("tipo_hilo", HILOS)
+def test_precio_igual_al_limite_queda_en_el_nivel_inferior(tipo_hilo):
+    # 160 sí es alcanzable exactamente: searchsorted(side="left") debe dar C, como <=
+    debajo, _ = _frontera(160.0, tipo_hilo)
+    assert _precio_base(debajo, tipo_hilo)["PRECIO"] == 160.0
+    resultado = precios.precio_pulsera(debajo, tipo_hilo)
+    assert (resultado["CLASIFICACION"], resultado["PRECIO_CLASIFICADO"]) == ("C", 160.0)
+
+
+def test_igual_que_formula_base_con_hilo_por_pulsera():
+    azar = random.Random(7)
+    costos = [round(azar.uniform(0, 150), 2) for _ in range(500)] + [0.0]
+    tipos_hilo = [azar.choice(HILOS) for _ in costos]
+    _comparar(costos, tipos_hilo)